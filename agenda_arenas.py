@@ -0,0 +1,269 @@
+from __future__ import annotations
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from esqueleto import Evento, Luta, StatusLuta
+from log_eventos import log
+
+
+class IndiceDeIntervalos:
+    """Intervalos [inicio, fim) sem sobreposição de um recurso (arena ou robô), ordenados pelo início.
+
+    Como os intervalos não se sobrepõem, um conflito só pode envolver os vizinhos da posição de
+    inserção, e a busca é uma bisseção: O(log n). Para achar horário livre o índice mantém também
+    os blocos ocupados: intervalos encostados, e as pausas do recurso (a arena fechada à noite),
+    fundidos num só. Numa agenda cheia o bloco é um só e proximo_livre salta direto para o fim
+    dele, em vez de andar luta por luta desde o começo do evento.
+    """
+    def __init__(self, pausas: Iterable[Tuple[datetime, datetime]] = ()):
+        self._inicios: List[datetime] = []
+        self._fins: List[datetime] = []
+        self._lutas: List[int] = []
+        self._pausas: List[Tuple[datetime, datetime]] = sorted(pausas)
+        self._blocos_inicio: List[datetime] = []
+        self._blocos_fim: List[datetime] = []
+        for inicio, fim in self._pausas:
+            self._ocupar(inicio, fim)
+
+    def _ocupar(self, inicio: datetime, fim: datetime):
+        """Funde [inicio, fim) com os blocos que ele toca ou sobrepõe."""
+        primeiro = bisect_left(self._blocos_fim, inicio)
+        ultimo = bisect_right(self._blocos_inicio, fim)
+        if primeiro < ultimo:
+            inicio = min(inicio, self._blocos_inicio[primeiro])
+            fim = max(fim, self._blocos_fim[ultimo - 1])
+        self._blocos_inicio[primeiro:ultimo] = [inicio]
+        self._blocos_fim[primeiro:ultimo] = [fim]
+
+    def _liberar(self, inicio: datetime, fim: datetime):
+        """Tira [inicio, fim) do bloco que o contém; pausas que cruzavam o trecho voltam a ocupá-lo."""
+        indice = bisect_right(self._blocos_inicio, inicio) - 1
+        bloco_inicio, bloco_fim = self._blocos_inicio[indice], self._blocos_fim[indice]
+        restos = [(a, b) for a, b in ((bloco_inicio, inicio), (fim, bloco_fim)) if a < b]
+        self._blocos_inicio[indice:indice + 1] = [a for a, _ in restos]
+        self._blocos_fim[indice:indice + 1] = [b for _, b in restos]
+        for pausa_inicio, pausa_fim in self._pausas[max(bisect_left(self._pausas, (inicio,)) - 1, 0):]:
+            if pausa_inicio >= fim:
+                break
+            if pausa_fim > inicio:
+                self._ocupar(max(pausa_inicio, inicio), min(pausa_fim, fim))
+
+    def conflito(self, inicio: datetime, fim: datetime) -> Optional[int]:
+        """ID da luta que ocupa algum instante de [inicio, fim), ou None."""
+        indice = bisect_left(self._inicios, inicio)
+        if indice > 0 and self._fins[indice - 1] > inicio:
+            return self._lutas[indice - 1]
+        if indice < len(self._inicios) and self._inicios[indice] < fim:
+            return self._lutas[indice]
+        return None
+
+    def proximo_livre(self, inicio: datetime, duracao: timedelta) -> datetime:
+        """Primeiro instante >= inicio em que cabe um intervalo de `duracao` fora dos blocos ocupados.
+
+        Só percorre as lacunas menores que `duracao` entre `inicio` e a resposta."""
+        indice = bisect_right(self._blocos_inicio, inicio) - 1
+        if indice >= 0 and self._blocos_fim[indice] > inicio:
+            inicio = self._blocos_fim[indice]
+        indice += 1
+        while indice < len(self._blocos_inicio) and self._blocos_inicio[indice] < inicio + duracao:
+            inicio = self._blocos_fim[indice]
+            indice += 1
+        return inicio
+
+    def inserir(self, inicio: datetime, fim: datetime, id_luta: int):
+        if not self._inicios or inicio >= self._inicios[-1]:
+            # Caso comum ao agendar em ordem: a luta vai para o fim da agenda
+            self._inicios.append(inicio)
+            self._fins.append(fim)
+            self._lutas.append(id_luta)
+        else:
+            indice = bisect_left(self._inicios, inicio)
+            self._inicios.insert(indice, inicio)
+            self._fins.insert(indice, fim)
+            self._lutas.insert(indice, id_luta)
+        self._ocupar(inicio, fim)
+
+    def remover(self, inicio: datetime, id_luta: int):
+        indice = bisect_left(self._inicios, inicio)
+        while self._lutas[indice] != id_luta:
+            indice += 1
+        self._liberar(self._inicios[indice], self._fins[indice])
+        del self._inicios[indice], self._fins[indice], self._lutas[indice]
+
+    def lutas_entre(self, inicio: datetime, fim: datetime) -> List[int]:
+        """IDs das lutas que começam em [inicio, fim) ou que ainda ocupam `inicio`."""
+        indice = bisect_left(self._inicios, inicio)
+        if indice > 0 and self._fins[indice - 1] > inicio:
+            indice -= 1
+        final = bisect_left(self._inicios, fim)
+        return self._lutas[indice:final]
+
+    def __len__(self) -> int:
+        return len(self._inicios)
+
+
+class AgendaDeArenas:
+    """Distribui as lutas de um evento entre arenas e horários, sem conflito de robô ou de arena.
+
+    Cada arena e cada robô tem um IndiceDeIntervalos; como os robôs são indexados pelo ID,
+    competições de combate diferentes do mesmo evento disputam os mesmos horários.
+    """
+    def __init__(self, evento: Evento, arenas: List[str], duracao_luta: timedelta = timedelta(minutes=10),
+                 intervalo_entre_lutas: timedelta = timedelta(0), abertura: time = time(9), encerramento: time = time(18)):
+        if not arenas:
+            raise ValueError("Informe pelo menos uma arena.")
+        self.evento: Evento = evento
+        self.duracao_luta: timedelta = duracao_luta
+        self.intervalo_entre_lutas: timedelta = intervalo_entre_lutas
+        self.abertura: time = abertura
+        self.encerramento: time = encerramento
+        self._arenas: Dict[str, IndiceDeIntervalos] = {arena: IndiceDeIntervalos(self._horarios_fechados()) for arena in arenas}
+        self._robos: Dict[int, IndiceDeIntervalos] = {}
+        self._lutas: Dict[int, Luta] = {}
+
+    # --- Janela do evento ---
+
+    def _horarios_fechados(self) -> List[Tuple[datetime, datetime]]:
+        """Noites e o período depois do evento, como pausas das arenas. Começam `intervalo_entre_lutas`
+        depois do encerramento: a última luta do dia só precisa terminar até ele."""
+        pausas = []
+        dia = self.evento.data_inicio
+        while dia <= self.evento.data_fim:
+            pausas.append((datetime.combine(dia, self.encerramento) + self.intervalo_entre_lutas,
+                           datetime.combine(dia + timedelta(days=1), self.abertura)))
+            dia += timedelta(days=1)
+        return pausas
+
+    def _ajustar_a_janela(self, instante: datetime, duracao: timedelta) -> datetime:
+        """Move o instante para dentro do horário de funcionamento de algum dia do evento."""
+        dia: date = max(instante.date(), self.evento.data_inicio)
+        while dia <= self.evento.data_fim:
+            abertura = datetime.combine(dia, self.abertura)
+            inicio = max(instante, abertura)
+            if inicio + duracao <= datetime.combine(dia, self.encerramento):
+                return inicio
+            dia += timedelta(days=1)
+        raise ValueError("Sem horários disponíveis dentro das datas do evento.")
+
+    # --- Agendamento ---
+
+    def _recursos(self, luta: Luta) -> List[IndiceDeIntervalos]:
+        indices = []
+        for inscricao in (luta.competidor1, luta.competidor2):
+            indices.append(self._robos.setdefault(inscricao.robo.id, IndiceDeIntervalos()))
+        return indices
+
+    def _inicio_minimo(self, luta: Luta, nao_antes: Optional[datetime]) -> datetime:
+        inicio = nao_antes or datetime.combine(self.evento.data_inicio, self.abertura)
+        if luta.chave is not None:
+            # A luta só pode começar depois das lutas que definem seus competidores
+            for anterior in luta.chave.lutas_anteriores(luta):
+                if anterior.fim is not None:
+                    inicio = max(inicio, anterior.fim + self.intervalo_entre_lutas)
+        return inicio
+
+    def agendar(self, luta: Luta, nao_antes: Optional[datetime] = None) -> Tuple[str, datetime]:
+        """Coloca a luta no primeiro horário em que a arena e os dois robôs estão livres."""
+        if luta.competidor1 is None or luta.competidor2 is None:
+            raise ValueError("A luta ainda não possui dois competidores.")
+        for inscricao in (luta.competidor1, luta.competidor2):
+            if not inscricao.robo.disponivel:
+                raise ValueError(f"Robô {inscricao.robo.nome} indisponível.")
+        if luta.id in self._lutas:
+            self.cancelar(luta)
+        ocupacao = self.duracao_luta + self.intervalo_entre_lutas
+        robos = self._recursos(luta)
+        instante = self._inicio_minimo(luta, nao_antes)
+        while True:
+            instante = self._ajustar_a_janela(instante, self.duracao_luta)
+            livre_robos = max(indice.proximo_livre(instante, ocupacao) for indice in robos)
+            if livre_robos > instante:
+                instante = livre_robos
+                continue
+            livre_arena, arena = min((indice.proximo_livre(instante, ocupacao), nome) for nome, indice in self._arenas.items())
+            if livre_arena == instante:
+                break
+            instante = livre_arena
+        self._reservar(luta, arena, instante, instante + self.duracao_luta)
+        return arena, instante
+
+    def _reservar(self, luta: Luta, arena: str, inicio: datetime, fim: datetime):
+        luta.arena, luta.inicio, luta.fim = arena, inicio, fim
+        ocupado_ate = fim + self.intervalo_entre_lutas
+        self._arenas[arena].inserir(inicio, ocupado_ate, luta.id)
+        for indice in self._recursos(luta):
+            indice.inserir(inicio, ocupado_ate, luta.id)
+        self._lutas[luta.id] = luta
+
+    def cancelar(self, luta: Luta):
+        """Libera o horário e a arena da luta."""
+        if self._lutas.pop(luta.id, None) is None:
+            return
+        self._arenas[luta.arena].remover(luta.inicio, luta.id)
+        for indice in self._recursos(luta):
+            indice.remover(luta.inicio, luta.id)
+        luta.arena = luta.inicio = luta.fim = None
+
+    def agendar_chave(self, lutas: List[Luta]) -> int:
+        """Agenda, em ordem de rodada, todas as lutas que já têm os dois competidores."""
+        agendadas = 0
+        for luta in sorted(lutas, key=lambda luta: luta.rodada):
+            if luta.competidor1 is not None and luta.competidor2 is not None and luta.id not in self._lutas:
+                self.agendar(luta)
+                agendadas += 1
+        return agendadas
+
+    def conflito_de_robo(self, robo_id: int, inicio: datetime, fim: datetime) -> Optional[int]:
+        indice = self._robos.get(robo_id)
+        return indice.conflito(inicio, fim) if indice is not None else None
+
+    def conflito_de_arena(self, arena: str, inicio: datetime, fim: datetime) -> Optional[int]:
+        return self._arenas[arena].conflito(inicio, fim)
+
+    # --- Atrasos ---
+
+    def registrar_atraso(self, luta: Luta, novo_fim: datetime) -> List[Luta]:
+        """Estende a luta até `novo_fim` e reagenda só as lutas afetadas; devolve as que mudaram de horário."""
+        if luta.id not in self._lutas:
+            raise ValueError("A luta não está agendada.")
+        inicio, fim_anterior, arena = luta.inicio, luta.fim, luta.arena
+        recursos = [self._arenas[arena]] + self._recursos(luta)
+        ids_afetadas = {id_luta for indice in recursos
+                        for id_luta in indice.lutas_entre(fim_anterior, novo_fim + self.intervalo_entre_lutas)
+                        if id_luta != luta.id}
+        afetadas = sorted((self._lutas[id_luta] for id_luta in ids_afetadas), key=lambda l: l.inicio)
+        # As afetadas saem dos índices antes da extensão entrar: os índices nunca guardam intervalos
+        # sobrepostos, que é o que proximo_livre supõe. Lutas já concluídas não mudam de horário.
+        afetadas = [(afetada, afetada.inicio) for afetada in afetadas if afetada.status != StatusLuta.CONCLUIDA]
+        for afetada, _ in afetadas:
+            self.cancelar(afetada)
+        self.cancelar(luta)
+        self._reservar(luta, arena, inicio, novo_fim)
+        log.info("Luta ID %s estendida até %s; %s lutas afetadas.", luta.id, novo_fim, len(afetadas))
+
+        reagendadas: List[Luta] = []
+        fila: deque = deque()
+        if luta.chave is not None:
+            fila.extend(luta.chave.lutas_seguintes(luta))
+        for afetada, inicio_anterior in afetadas:
+            self.agendar(afetada, max(inicio_anterior, self._inicio_minimo(afetada, None)))
+            reagendadas.append(afetada)
+            if afetada.chave is not None:
+                fila.extend(afetada.chave.lutas_seguintes(afetada))
+        # Agendada por agendar, nenhuma luta conflita com outra; resta a ordem da chave: lutas
+        # seguintes que agora começariam antes do fim das anteriores
+        while fila:
+            afetada = fila.popleft()
+            if afetada.id not in self._lutas or afetada.status == StatusLuta.CONCLUIDA:
+                continue
+            minimo = self._inicio_minimo(afetada, None)
+            if afetada.inicio >= minimo:
+                continue
+            self.agendar(afetada, minimo)
+            if afetada not in reagendadas:
+                reagendadas.append(afetada)
+            if afetada.chave is not None:
+                fila.extend(afetada.chave.lutas_seguintes(afetada))
+        return reagendadas
@@ -0,0 +1,31 @@
+from __future__ import annotations
+from typing import Dict, List
+
+from esqueleto import CompeticaoCombate, CompeticaoSeguidorDeLinha, Evento, Resultado
+from formatos import ELIMINATORIA_SIMPLES, SUICO
+from log_eventos import log
+
+
+class AgendadorDeTorneio:
+    """Regenera as estruturas e classificações de todas as competições de um evento.
+
+    Roda no processo principal. O trabalho caro é montar as lutas de cada chave, e elas são
+    objetos do domínio que precisam nascer neste processo. A classificação do seguidor de linha
+    já sai pronta do ranking incremental. Um pool de processos só acrescentaria serialização.
+
+    Cada chave é gerada de novo no formato da chave atual (ver formatos.py); competições ainda
+    sem chave ficam com a eliminatória simples.
+    """
+    def regenerar(self, evento: Evento) -> Dict[int, List[Resultado]]:
+        """Gera as chaves de combate e devolve a classificação de cada seguidor, por ID de competição."""
+        classificacoes: Dict[int, List[Resultado]] = {}
+        total = sum(len(competicao.inscricoes) for competicao in evento.competicoes)
+        log.info("Regenerando %s competições do evento '%s' (%s inscrições).", len(evento.competicoes), evento.nome, total)
+        for competicao in evento.competicoes:
+            if isinstance(competicao, CompeticaoCombate):
+                chave = competicao.chave_batalha
+                formato = chave.formato if chave is not None else ELIMINATORIA_SIMPLES
+                competicao.gerar_estrutura(formato, chave.total_rodadas if formato == SUICO else None)
+            elif isinstance(competicao, CompeticaoSeguidorDeLinha):
+                classificacoes[competicao.id] = competicao.gerar_classificacao()
+        return classificacoes
@@ -0,0 +1,380 @@
+from __future__ import annotations
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import nullcontext
+from datetime import date, datetime
+from functools import partial
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from esqueleto import (
+    Competicao, CompeticaoCombate, CompeticaoSeguidorDeLinha, Equipe, Evento, Inscricao, Organizador,
+    RegistroDeVoltas, Robo,
+)
+from identificadores import espaco_de_ids, get_alocador, reatribuir_id
+from log_eventos import log
+from persistencia import (
+    TIPO_COMBATE, TIPO_SEGUIDOR, VERSAO, ErroDeSnapshot, _Escritor, _Leitor, _STATUS_COMPETICAO, _STATUS_EVENTO,
+    _STATUS_INSCRICAO, _gravar_chave, _gravar_equipe, _gravar_robo, _gravar_usuario, _ler_chave, _ler_equipe,
+    _ler_robo, _ler_usuario,
+)
+
+# Arquivo de temporada: eventos encerrados num banco SQLite, abertos sob demanda. Ao abrir, só
+# robôs, equipes e o cabeçalho dos eventos são lidos; `Evento.competicoes`,
+# `Competicao.inscricoes` (com os índices e o ranking), `CompeticaoCombate.chave_batalha` (com as
+# lutas) e `Inscricao.tomadas_de_tempo` são carregados no primeiro acesso (ver
+# esqueleto.CarregavelSobDemanda). Os registros reaproveitam a codificação do snapshot.
+#
+# Cada carga é uma Unidade. Quando os itens carregados (competições, inscrições, lutas e voltas)
+# passam da capacidade, as unidades carregadas há mais tempo são descartadas e voltam a ser
+# lidas do banco no próximo acesso. Uma unidade modificada desde a carga não é descartada:
+# passa a ser dado vivo. Descartar recria os objetos na próxima carga, então referências
+# guardadas fora do grafo (índices, por exemplo) deixam de ser as do evento.
+#
+# Como competições, inscrições, lutas e voltas só são lidas no acesso, o maior ID de cada um
+# desses tipos fica na tabela maiores_ids e é reservado no alocador ao abrir o arquivo: novos
+# registros criados antes da carga não repetem IDs arquivados.
+CAPACIDADE_PADRAO = 1_000_000
+
+_ESQUEMA = """
+CREATE TABLE meta (versao INTEGER NOT NULL);
+CREATE TABLE robos (id INTEGER PRIMARY KEY, dados BLOB NOT NULL);
+CREATE TABLE equipes (id INTEGER PRIMARY KEY, ordem INTEGER NOT NULL, dados BLOB NOT NULL);
+CREATE TABLE eventos (id INTEGER PRIMARY KEY, ordem INTEGER NOT NULL, nome TEXT NOT NULL, inicio INTEGER NOT NULL,
+                      fim INTEGER NOT NULL, status INTEGER NOT NULL, organizador BLOB NOT NULL);
+CREATE TABLE competicoes (numero INTEGER PRIMARY KEY, id INTEGER NOT NULL, id_evento INTEGER NOT NULL, ordem INTEGER NOT NULL,
+                          tipo INTEGER NOT NULL, nome TEXT NOT NULL, status INTEGER NOT NULL, chave BLOB);
+CREATE INDEX competicoes_do_evento ON competicoes (id_evento, ordem);
+CREATE TABLE inscricoes (id INTEGER PRIMARY KEY, numero_competicao INTEGER NOT NULL, ordem INTEGER NOT NULL,
+                         id_robo INTEGER NOT NULL, data REAL NOT NULL, status INTEGER NOT NULL,
+                         melhor_tempo REAL, voltas BLOB NOT NULL);
+CREATE INDEX inscricoes_da_competicao ON inscricoes (numero_competicao, ordem);
+CREATE TABLE maiores_ids (tipo TEXT PRIMARY KEY, id INTEGER NOT NULL);
+"""
+
+_ATRIBUTOS_INSCRICOES = ("inscricoes", "_inscricoes_por_status", "_inscricao_por_robo")
+_ATRIBUTOS_RANKING = ("_ranking", "_ordem_inscricao")
+
+
+class Unidade:
+    """Grupo de atributos de um objeto carregados (e descartados) juntos.
+
+    `mae` é a unidade cuja carga criou o dono; `depende_de` é outra unidade que precisa estar
+    carregada antes desta e cujo descarte leva esta junto (a chave referencia as inscrições).
+    """
+    def __init__(self, dono: object, atributos: Tuple[str, ...], carregar: Callable[[object], int],
+                 assinar: Callable[[object], object], mae: Optional[Unidade] = None,
+                 depende_de: Optional[Unidade] = None):
+        self.dono = dono
+        self.atributos = atributos
+        self._carregar = carregar
+        self._assinar = assinar
+        self.mae = mae
+        self.depende_de = depende_de
+        self.filhas: List[Unidade] = []        # Criadas pela carga desta unidade
+        self.dependentes: List[Unidade] = []   # Declararam depende_de=self
+        self.carregada: bool = False
+        self.tamanho: int = 0
+        self.assinatura: object = None
+
+    def garantir(self):
+        # Ordem das travas: a da competição antes da do gerenciador. É a ordem de quem já segura a
+        # trava da competição e toca num atributo sob demanda (ex.: um juiz registrando uma volta);
+        # a carga das inscrições, que chama receber_inscricoes, não pode inverter essa ordem.
+        with _trava_da_competicao(self.dono), _gerenciador.trava:
+            if self.carregada:
+                return
+            if self.depende_de is not None:
+                self.depende_de.garantir()
+            _gerenciador.carregando.append(self)
+            try:
+                self.tamanho = self._carregar(self.dono)
+            finally:
+                _gerenciador.carregando.pop()
+            self.carregada = True
+            # A carga pode mexer na versão do dono (ex.: reaplicar resultados de uma chave suíça)
+            for unidade in set(self.dono.__dict__["_sob_demanda"].values()):
+                if unidade.carregada:
+                    unidade.assinatura = unidade._assinar(unidade.dono)
+            _gerenciador.registrar(self)
+
+    def modificada(self) -> bool:
+        return self.assinatura != self._assinar(self.dono)
+
+    def _ascendentes(self) -> Iterator[Unidade]:
+        yield self
+        for outra in (self.mae, self.depende_de):
+            if outra is not None:
+                yield from outra._ascendentes()
+
+
+def _trava_da_competicao(dono: object):
+    if isinstance(dono, Inscricao):
+        dono = dono.competicao
+    return dono.trava if isinstance(dono, Competicao) else nullcontext()
+
+
+def sob_demanda(dono: object, atributos: Tuple[str, ...], carregar: Callable[[object], int],
+                assinar: Callable[[object], object], mae: Optional[Unidade] = None,
+                depende_de: Optional[Unidade] = None) -> Unidade:
+    """Tira `atributos` do objeto e faz com que sejam carregados por `carregar` no primeiro acesso.
+
+    `carregar(dono)` preenche os atributos e devolve quantos itens carregou; `assinar(dono)`
+    resume o estado do dono para detectar modificações antes de um descarte.
+    """
+    for nome in atributos:
+        dono.__dict__.pop(nome, None)
+    unidade = Unidade(dono, atributos, carregar, assinar, mae, depende_de)
+    unidades = dono.__dict__.setdefault("_sob_demanda", {})
+    for nome in atributos:
+        unidades[nome] = unidade
+    if mae is not None:
+        mae.filhas.append(unidade)
+    if depende_de is not None:
+        depende_de.dependentes.append(unidade)
+    return unidade
+
+
+class _Gerenciador:
+    def __init__(self, capacidade: int):
+        self.trava = threading.RLock()
+        self.capacidade: int = capacidade
+        self.carregadas: OrderedDict = OrderedDict()  # Unidade -> None, da carga mais antiga à mais recente
+        self.total: int = 0
+        self.carregando: List[Unidade] = []
+
+    def registrar(self, unidade: Unidade):
+        self.carregadas[unidade] = None
+        self.total += unidade.tamanho
+        if self.total > self.capacidade:
+            self.aliviar(self.capacidade, unidade)
+
+    def aliviar(self, limite: int, recente: Optional[Unidade] = None):
+        """Descarta as unidades mais antigas até o total caber em `limite`.
+
+        Não descarta as que estão sendo carregadas, a `recente` nem as unidades de que elas dependem.
+        """
+        protegidas = {ascendente for unidade in self.carregando + ([recente] if recente else [])
+                      for ascendente in unidade._ascendentes()}
+        for unidade in list(self.carregadas):
+            if self.total <= limite:
+                break
+            if unidade not in self.carregadas or unidade in protegidas:
+                continue
+            if unidade.modificada():
+                # Vira dado vivo e deixa de contar para a capacidade
+                del self.carregadas[unidade]
+                self.total -= unidade.tamanho
+            elif self._pode_descartar(unidade, protegidas):
+                self._descartar(unidade)
+
+    def _pode_descartar(self, unidade: Unidade, protegidas: set) -> bool:
+        if not unidade.carregada:
+            return True
+        if unidade in protegidas or unidade.modificada():
+            return False
+        return all(self._pode_descartar(outra, protegidas) for outra in unidade.filhas + unidade.dependentes)
+
+    def _descartar(self, unidade: Unidade):
+        if not unidade.carregada:
+            return
+        for outra in unidade.filhas + unidade.dependentes:
+            self._descartar(outra)
+        unidade.filhas = []
+        for nome in unidade.atributos:
+            unidade.dono.__dict__.pop(nome, None)
+        unidade.carregada = False
+        if unidade in self.carregadas:
+            del self.carregadas[unidade]
+            self.total -= unidade.tamanho
+
+
+_gerenciador = _Gerenciador(CAPACIDADE_PADRAO)
+
+
+def configurar_capacidade(capacidade: int):
+    """Define quantos itens (competições, inscrições, lutas e voltas) podem ficar carregados."""
+    if capacidade <= 0:
+        raise ValueError("A capacidade deve ser positiva.")
+    with _gerenciador.trava:
+        _gerenciador.capacidade = capacidade
+        _gerenciador.aliviar(capacidade)
+
+
+def itens_carregados() -> int:
+    return _gerenciador.total
+
+
+def descartar_nao_modificados():
+    """Libera tudo o que foi carregado e não foi modificado (ex.: ao fechar uma tela do arquivo)."""
+    with _gerenciador.trava:
+        _gerenciador.aliviar(0)
+
+
+# --- Escrita ---------------------------------------------------------------------------
+
+def _blob(gravar: Callable, *argumentos) -> bytes:
+    escritor = _Escritor()
+    gravar(escritor, *argumentos)
+    return bytes(escritor.dados)
+
+
+def arquivar_temporada(caminho: str, eventos: Iterable[Evento], equipes: Iterable[Equipe] = ()):
+    """Grava os eventos (e as equipes) num novo arquivo de temporada em `caminho`."""
+    eventos, equipes = list(eventos), list(equipes)
+    robos: Dict[int, Robo] = {robo.id: robo for equipe in equipes for robo in equipe.robos}
+    conexao = sqlite3.connect(caminho)
+    try:
+        with conexao:
+            conexao.executescript(_ESQUEMA)
+            conexao.execute("INSERT INTO meta VALUES (?)", (VERSAO,))
+            conexao.executemany("INSERT INTO equipes VALUES (?, ?, ?)",
+                                ((equipe.id, ordem, _blob(_gravar_equipe, equipe)) for ordem, equipe in enumerate(equipes)))
+            maiores: Dict[str, int] = {}
+            for ordem_evento, evento in enumerate(eventos):
+                conexao.execute("INSERT INTO eventos VALUES (?, ?, ?, ?, ?, ?, ?)", (
+                    evento.id, ordem_evento, evento.nome, evento.data_inicio.toordinal(), evento.data_fim.toordinal(),
+                    _STATUS_EVENTO.index(evento.status), _blob(_gravar_usuario, evento.organizador)))
+                for ordem, competicao in enumerate(evento.competicoes):
+                    _arquivar_competicao(conexao, evento, ordem, competicao, robos, maiores)
+            conexao.executemany("INSERT INTO maiores_ids VALUES (?, ?)", maiores.items())
+            conexao.executemany("INSERT INTO robos VALUES (?, ?)",
+                                ((robo.id, _blob(_gravar_robo, robo)) for robo in robos.values()))
+    finally:
+        conexao.close()
+
+
+def _maior(maiores: Dict[str, int], tipo: str, valores: Iterable[int]):
+    maiores[tipo] = max(maiores.get(tipo, 0), max(valores, default=0))
+
+
+def _arquivar_competicao(conexao: sqlite3.Connection, evento: Evento, ordem: int, competicao: Competicao,
+                         robos: Dict[int, Robo], maiores: Dict[str, int]):
+    combate = isinstance(competicao, CompeticaoCombate)
+    chave = _blob(_gravar_chave, competicao.chave_batalha) if combate else None
+    _maior(maiores, espaco_de_ids(type(competicao)), (competicao.id,))
+    if combate and competicao.chave_batalha is not None:
+        lutas = competicao.chave_batalha.lutas
+        _maior(maiores, "Luta", (luta.id for luta in lutas))
+        _maior(maiores, "ResultadoDeLuta", (luta.sequencia_resultado for luta in lutas))
+    # IDs de competição só são únicos por tipo, então a tabela tem a própria numeração
+    numero = conexao.execute("INSERT INTO competicoes VALUES (NULL, ?, ?, ?, ?, ?, ?, ?)", (
+        competicao.id, evento.id, ordem, TIPO_COMBATE if combate else TIPO_SEGUIDOR, competicao.nome,
+        _STATUS_COMPETICAO.index(competicao.status), chave)).lastrowid
+    linhas = []
+    for ordem_inscricao, inscricao in enumerate(competicao.inscricoes):
+        robos.setdefault(inscricao.robo.id, inscricao.robo)
+        voltas = inscricao.tomadas_de_tempo
+        linhas.append((inscricao.id, numero, ordem_inscricao, inscricao.robo.id,
+                       inscricao.data_inscricao.timestamp(), _STATUS_INSCRICAO.index(inscricao.status),
+                       inscricao.melhor_tempo, voltas.ids.tobytes() + voltas.tempos.tobytes()
+                       + voltas.instantes.tobytes() + voltas.juizes.tobytes()))
+        _maior(maiores, "TomadaDeTempo", voltas.ids)
+    _maior(maiores, "Inscricao", (linha[0] for linha in linhas))
+    conexao.executemany("INSERT INTO inscricoes VALUES (?, ?, ?, ?, ?, ?, ?, ?)", linhas)
+
+
+# --- Leitura sob demanda -----------------------------------------------------------------
+
+class ArquivoDeTemporada:
+    """Arquivo de temporada aberto: `eventos` e `equipes` prontos, o resto carregado no acesso."""
+    def __init__(self, caminho: str):
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        linha = self._conexao.execute("SELECT versao FROM meta").fetchone()
+        if linha is None or not 1 <= linha[0] <= VERSAO:
+            raise ErroDeSnapshot("Versão de arquivo não suportada.")
+        self.versao: int = linha[0]
+        for tipo, maior in self._conexao.execute("SELECT tipo, id FROM maiores_ids"):
+            if maior:
+                get_alocador().reservar(tipo, maior)
+        self.robos: Dict[int, Robo] = {}
+        for (dados,) in self._conexao.execute("SELECT dados FROM robos"):
+            robo = _ler_robo(self._leitor(dados))
+            self.robos[robo.id] = robo
+        self.equipes: List[Equipe] = [_ler_equipe(self._leitor(dados), self.robos) for (dados,) in
+                                      self._conexao.execute("SELECT dados FROM equipes ORDER BY ordem")]
+        self.eventos: List[Evento] = [self._evento(*linha) for linha in self._conexao.execute(
+            "SELECT id, nome, inicio, fim, status, organizador FROM eventos ORDER BY ordem").fetchall()]
+
+    def fechar(self):
+        self._conexao.close()
+
+    def _leitor(self, dados: bytes) -> _Leitor:
+        leitor = _Leitor(dados)
+        leitor.versao = self.versao
+        return leitor
+
+    def _consultar(self, sql: str, *parametros) -> List[tuple]:
+        with _gerenciador.trava:
+            return self._conexao.execute(sql, parametros).fetchall()
+
+    def _evento(self, id_evento: int, nome: str, inicio: int, fim: int, status: int, organizador: bytes) -> Evento:
+        evento = Evento(nome, date.fromordinal(inicio), date.fromordinal(fim),
+                        _ler_usuario(self._leitor(organizador), Organizador))
+        reatribuir_id(evento, id_evento)
+        evento.status = _STATUS_EVENTO[status]
+        sob_demanda(evento, ("competicoes",), self._carregar_competicoes, lambda dono: dono.versao)
+        return evento
+
+    def _carregar_competicoes(self, evento: Evento) -> int:
+        unidade = evento._sob_demanda["competicoes"]
+        competicoes: List[Competicao] = []
+        for numero, id_competicao, tipo, nome, status in self._consultar(
+                "SELECT numero, id, tipo, nome, status FROM competicoes WHERE id_evento = ? ORDER BY ordem", evento.id):
+            classe = CompeticaoCombate if tipo == TIPO_COMBATE else CompeticaoSeguidorDeLinha
+            competicao = classe(nome, evento)
+            reatribuir_id(competicao, id_competicao)
+            competicao._status = _STATUS_COMPETICAO[status]
+            atributos = _ATRIBUTOS_INSCRICOES + (_ATRIBUTOS_RANKING if tipo == TIPO_SEGUIDOR else ())
+            inscricoes = sob_demanda(competicao, atributos, partial(self._carregar_inscricoes, numero),
+                                     lambda dono: dono.versao, mae=unidade)
+            if tipo == TIPO_COMBATE:
+                sob_demanda(competicao, ("chave_batalha",), partial(self._carregar_chave, numero), lambda dono: dono.versao,
+                            mae=unidade, depende_de=inscricoes)
+            competicoes.append(competicao)
+        evento.competicoes = competicoes
+        return len(competicoes)
+
+    def _carregar_inscricoes(self, numero: int, competicao: Competicao) -> int:
+        unidade = competicao._sob_demanda["inscricoes"]
+        competicao.inscricoes = []
+        competicao._inscricoes_por_status = {status: {} for status in _STATUS_INSCRICAO}
+        competicao._inscricao_por_robo = {}
+        if isinstance(competicao, CompeticaoSeguidorDeLinha):
+            competicao._ranking = []
+            competicao._ordem_inscricao = {}
+        novas = []
+        for id_inscricao, id_robo, data, status, melhor_tempo in self._consultar(
+                "SELECT id, id_robo, data, status, melhor_tempo FROM inscricoes WHERE numero_competicao = ? ORDER BY ordem",
+                numero):
+            inscricao = Inscricao(self.robos[id_robo], competicao, datetime.fromtimestamp(data))
+            reatribuir_id(inscricao, id_inscricao)
+            inscricao.status = _STATUS_INSCRICAO[status]
+            inscricao.melhor_tempo = melhor_tempo
+            sob_demanda(inscricao, ("tomadas_de_tempo",), self._carregar_voltas,
+                        lambda dono: len(dono.tomadas_de_tempo), mae=unidade)
+            novas.append(inscricao)
+        competicao.receber_inscricoes(novas)
+        return len(novas)
+
+    def _carregar_chave(self, numero: int, competicao: CompeticaoCombate) -> int:
+        (dados,) = self._consultar("SELECT chave FROM competicoes WHERE numero = ?", numero)[0]
+        chave = _ler_chave(self._leitor(dados), self.robos, {insc.id: insc for insc in competicao.inscricoes})
+        if chave is not None:
+            chave.competicao = competicao
+        competicao.chave_batalha = chave
+        return len(chave.lutas) if chave is not None else 0
+
+    def _carregar_voltas(self, inscricao: Inscricao) -> int:
+        (dados,) = self._consultar("SELECT voltas FROM inscricoes WHERE id = ?", inscricao.id)[0]
+        voltas = RegistroDeVoltas()
+        coluna = len(dados) // 4
+        for indice, destino in enumerate((voltas.ids, voltas.tempos, voltas.instantes, voltas.juizes)):
+            destino.frombytes(dados[indice * coluna:(indice + 1) * coluna])
+        inscricao.tomadas_de_tempo = voltas
+        return len(voltas)
+
+
+def abrir_temporada(caminho: str) -> ArquivoDeTemporada:
+    log.info("Abrindo arquivo de temporada %s.", caminho)
+    return ArquivoDeTemporada(caminho)
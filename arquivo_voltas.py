@@ -0,0 +1,174 @@
+from __future__ import annotations
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from arquivo_temporada import sob_demanda
+from esqueleto import CompeticaoSeguidorDeLinha, Inscricao, RegistroDeVoltas, StatusCompeticao, TomadaDeTempo
+from log_eventos import log
+from persistencia import ErroDeSnapshot
+
+# Arquivo de voltas selado: as voltas de uma competição de seguidor de linha já finalizada, em
+# registros de largura fixa num arquivo lido por mmap. Vários processos que abrem o mesmo
+# arquivo compartilham as páginas do cache do sistema; as consultas fazem bisseção direto sobre
+# o mapa e devolvem fatias memoryview, sem copiar os registros.
+#
+#   cabeçalho   MAGICO, versão, total de voltas, total de inscrições
+#   voltas      (inscrição, tempo, instante, ID da volta, juiz), ordenadas por inscrição e tempo
+#   instantes   (instante, índice da volta), ordenados por instante: consultas por janela de tempo
+#   robôs       (robô, inscrição, primeira volta, quantidade), ordenados por robô
+MAGICO = b"SOFTVOLT"
+VERSAO = 1
+
+CABECALHO = struct.Struct("<8sHxxxxxxQQ")
+VOLTA = struct.Struct("<qddqq")
+INSTANTE = struct.Struct("<dq")
+ROBO = struct.Struct("<qqqq")
+
+
+class _Chaves:
+    """Vista de um campo de uma seção do mapa como sequência, para usar com bisect sem copiar."""
+    __slots__ = ("_dados", "_inicio", "_passo", "_formato", "_total")
+
+    def __init__(self, dados: memoryview, inicio: int, passo: int, formato: str, total: int):
+        self._dados, self._inicio, self._passo, self._formato, self._total = dados, inicio, passo, formato, total
+
+    def __len__(self) -> int:
+        return self._total
+
+    def __getitem__(self, indice: int):
+        return struct.unpack_from(self._formato, self._dados, self._inicio + indice * self._passo)[0]
+
+
+def selar_competicao(competicao: CompeticaoSeguidorDeLinha, caminho: str, liberar: bool = True) -> ArquivoDeVoltas:
+    """Grava as voltas da competição finalizada em `caminho` e devolve o arquivo aberto.
+
+    Com `liberar=True` as voltas saem da memória: `tomadas_de_tempo` de cada inscrição passa a
+    ser lido do arquivo no próximo acesso (o melhor tempo e o ranking continuam em memória).
+    """
+    if competicao.status != StatusCompeticao.FINALIZADA:
+        raise ValueError("Só competições finalizadas podem ser seladas.")
+    voltas: List[Tuple[int, float, float, int, int]] = []
+    robos: List[Tuple[int, int]] = []
+    with competicao.trava:
+        inscricoes = list(competicao.inscricoes)
+        for inscricao in inscricoes:
+            registro = inscricao.tomadas_de_tempo
+            robos.append((inscricao.robo.id, inscricao.id))
+            voltas.extend(zip([inscricao.id] * len(registro), registro.tempos, registro.instantes,
+                              registro.ids, registro.juizes))
+    voltas.sort()
+    primeira: dict = {}
+    for indice, volta in enumerate(voltas):
+        primeira.setdefault(volta[0], indice)
+    contagem = {inscricao.id: len(inscricao.tomadas_de_tempo) for inscricao in inscricoes}
+    instantes = sorted((volta[2], indice) for indice, volta in enumerate(voltas))
+
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(CABECALHO.pack(MAGICO, VERSAO, len(voltas), len(robos)))
+        for volta in voltas:
+            arquivo.write(VOLTA.pack(*volta))
+        for instante in instantes:
+            arquivo.write(INSTANTE.pack(*instante))
+        for id_robo, id_inscricao in sorted(robos):
+            arquivo.write(ROBO.pack(id_robo, id_inscricao, primeira.get(id_inscricao, 0), contagem[id_inscricao]))
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(temporario, caminho)
+    log.info("Competição '%s' selada em %s (%s voltas).", competicao.nome, caminho, len(voltas))
+
+    selado = ArquivoDeVoltas(caminho)
+    if liberar:
+        for inscricao in inscricoes:
+            sob_demanda(inscricao, ("tomadas_de_tempo",), selado._carregar_voltas,
+                        lambda dono: len(dono.tomadas_de_tempo))
+    return selado
+
+
+class ArquivoDeVoltas:
+    """Leitor de um arquivo de voltas selado (somente leitura, via mmap)."""
+    def __init__(self, caminho: str):
+        self.caminho: str = caminho
+        with open(caminho, "rb") as arquivo:
+            self._mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        self._dados = memoryview(self._mapa)
+        if len(self._dados) < CABECALHO.size:
+            raise ErroDeSnapshot("Arquivo de voltas truncado.")
+        magico, versao, self.total_voltas, self.total_inscricoes = CABECALHO.unpack_from(self._dados, 0)
+        if magico != MAGICO:
+            raise ErroDeSnapshot("Arquivo não é um arquivo de voltas do sistema.")
+        if versao != VERSAO:
+            raise ErroDeSnapshot("Versão de arquivo de voltas não suportada.")
+        self._inicio_voltas = CABECALHO.size
+        self._inicio_instantes = self._inicio_voltas + self.total_voltas * VOLTA.size
+        self._inicio_robos = self._inicio_instantes + self.total_voltas * INSTANTE.size
+        if len(self._dados) < self._inicio_robos + self.total_inscricoes * ROBO.size:
+            raise ErroDeSnapshot("Arquivo de voltas truncado.")
+        self._inscricoes = _Chaves(self._dados, self._inicio_voltas, VOLTA.size, "<q", self.total_voltas)
+        self._instantes = _Chaves(self._dados, self._inicio_instantes, INSTANTE.size, "<d", self.total_voltas)
+        self._robos = _Chaves(self._dados, self._inicio_robos, ROBO.size, "<q", self.total_inscricoes)
+
+    def fechar(self):
+        """Fecha o mapa; fatias devolvidas pelas consultas precisam ter sido liberadas antes."""
+        self._dados.release()
+        self._mapa.close()
+
+    def __enter__(self) -> ArquivoDeVoltas:
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def _fatia(self, inicio: int, fim: int) -> memoryview:
+        return self._dados[self._inicio_voltas + inicio * VOLTA.size:self._inicio_voltas + fim * VOLTA.size]
+
+    def _faixa(self, id_inscricao: int) -> Tuple[int, int]:
+        inicio = bisect_left(self._inscricoes, id_inscricao)
+        return inicio, bisect_left(self._inscricoes, id_inscricao + 1, inicio)
+
+    def voltas_da_inscricao(self, id_inscricao: int) -> memoryview:
+        """Registros da inscrição (formato VOLTA), do menor tempo para o maior; leia com `registros()`."""
+        return self._fatia(*self._faixa(id_inscricao))
+
+    def historico_do_robo(self, id_robo: int) -> memoryview:
+        """Registros das voltas do robô nesta competição (vazio se ele não competiu)."""
+        indice = bisect_left(self._robos, id_robo)
+        if indice == self.total_inscricoes or self._robos[indice] != id_robo:
+            return self._fatia(0, 0)
+        _, _, primeira, quantidade = ROBO.unpack_from(self._dados, self._inicio_robos + indice * ROBO.size)
+        return self._fatia(primeira, primeira + quantidade)
+
+    def melhor_volta(self, id_inscricao: int) -> Optional[TomadaDeTempo]:
+        inicio, fim = self._faixa(id_inscricao)
+        if inicio == fim:
+            return None
+        _, tempo, instante, id_tomada, id_juiz = VOLTA.unpack_from(self._dados, self._inicio_voltas + inicio * VOLTA.size)
+        return TomadaDeTempo._da_coluna(id_tomada, tempo, instante, id_juiz)
+
+    def voltas_entre(self, inicio: datetime, fim: datetime) -> Iterator[Tuple[int, TomadaDeTempo]]:
+        """(ID da inscrição, volta) registradas em [inicio, fim), em ordem de registro."""
+        primeiro = bisect_left(self._instantes, inicio.timestamp())
+        ultimo = bisect_left(self._instantes, fim.timestamp(), primeiro)
+        for _, indice in INSTANTE.iter_unpack(
+                self._dados[self._inicio_instantes + primeiro * INSTANTE.size:self._inicio_instantes + ultimo * INSTANTE.size]):
+            id_inscricao, tempo, instante, id_tomada, id_juiz = VOLTA.unpack_from(
+                self._dados, self._inicio_voltas + indice * VOLTA.size)
+            yield id_inscricao, TomadaDeTempo._da_coluna(id_tomada, tempo, instante, id_juiz)
+
+    def _carregar_voltas(self, inscricao: Inscricao) -> int:
+        """Devolve as voltas seladas à inscrição, na ordem de registro (ver selar_competicao)."""
+        registro = RegistroDeVoltas()
+        for _, tempo, instante, id_tomada, id_juiz in sorted(registros(self.voltas_da_inscricao(inscricao.id)),
+                                                               key=lambda volta: (volta[2], volta[3])):
+            registro.registrar(tempo, instante, id_tomada, id_juiz)
+        inscricao.tomadas_de_tempo = registro
+        return len(registro)
+
+
+def registros(fatia: memoryview) -> Iterator[Tuple[int, float, float, int, int]]:
+    """(inscrição, tempo, instante, ID da volta, juiz) de cada registro de uma fatia, sem copiá-la."""
+    return VOLTA.iter_unpack(fatia)
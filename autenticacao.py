@@ -0,0 +1,262 @@
+from __future__ import annotations
+import asyncio
+import hashlib
+import hmac
+import os
+import queue
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+from log_eventos import log
+
+if TYPE_CHECKING:
+    from esqueleto import Usuario
+
+# Autenticação dos usuários: senhas guardadas como hash com sal e custo ajustável, índice
+# e-mail -> usuário e um cache de sessões em memória. O hash só é calculado no login; as
+# chamadas seguintes apresentam o token da sessão, validado por uma consulta ao dicionário.
+# Criar um usuário não espera o hash: a senha vai para uma fila atendida por threads daemon
+# (agendar_hash_de_senha) e só o Future fica no usuário, então importações e restaurações não
+# pagam o custo na construção e o texto da senha só vive até um trabalhador tirá-lo da fila.
+#
+# Formato do hash: "algoritmo$custo$sal$derivada" (sal e derivada em hexadecimal). O custo é o
+# expoente: N = 2**custo no scrypt, 40 * 2**custo iterações no PBKDF2 (usado só quando o
+# hashlib não tem scrypt). Hashes antigos continuam válidos depois de uma mudança de custo e
+# são refeitos no próximo login bem-sucedido.
+ALGORITMO = "scrypt" if hasattr(hashlib, "scrypt") else "pbkdf2_sha256"
+CUSTO_PADRAO = 14
+CUSTO_MINIMO = 4
+TAMANHO_SAL = 16
+TAMANHO_DERIVADA = 32
+TTL_PADRAO = 12 * 60 * 60  # uma jornada de evento, em segundos
+TRABALHADORES_DE_HASH = min(4, os.cpu_count() or 1)
+
+_custo: int = CUSTO_PADRAO
+
+
+class ErroDeAutenticacao(PermissionError):
+    """Credenciais recusadas ou sessão inválida."""
+
+
+def configurar_custo(custo: int) -> int:
+    """Define o custo dos próximos hashes e devolve o anterior."""
+    global _custo
+    if custo < CUSTO_MINIMO:
+        raise ValueError(f"O custo mínimo do hash de senha é {CUSTO_MINIMO}.")
+    anterior, _custo = _custo, custo
+    return anterior
+
+
+def _derivar(algoritmo: str, senha: str, sal: bytes, custo: int) -> bytes:
+    if algoritmo == "scrypt":
+        n = 1 << custo
+        return hashlib.scrypt(senha.encode("utf-8"), salt=sal, n=n, r=8, p=1, maxmem=256 * 8 * n + (1 << 20),
+                              dklen=TAMANHO_DERIVADA)
+    if algoritmo == "pbkdf2_sha256":
+        return hashlib.pbkdf2_hmac("sha256", senha.encode("utf-8"), sal, 40 << custo, TAMANHO_DERIVADA)
+    raise ValueError("Algoritmo de hash de senha desconhecido.")
+
+
+def gerar_hash_de_senha(senha: str, custo: Optional[int] = None) -> str:
+    """Hash da senha com um sal novo; `custo` padrão é o de configurar_custo."""
+    custo = _custo if custo is None else custo
+    sal = os.urandom(TAMANHO_SAL)
+    return f"{ALGORITMO}${custo}${sal.hex()}${_derivar(ALGORITMO, senha, sal, custo).hex()}"
+
+
+def verificar_hash(senha: str, hash_senha: str) -> bool:
+    algoritmo, custo, sal, derivada = hash_senha.split("$")
+    calculada = _derivar(algoritmo, senha, bytes.fromhex(sal), int(custo))
+    return hmac.compare_digest(calculada, bytes.fromhex(derivada))
+
+
+def precisa_novo_hash(hash_senha: str) -> bool:
+    """O hash foi feito com outro algoritmo ou outro custo que os atuais."""
+    algoritmo, custo, _, _ = hash_senha.split("$")
+    return algoritmo != ALGORITMO or int(custo) != _custo
+
+
+_fila_de_hashes: "queue.SimpleQueue[Tuple[Future, str, int]]" = queue.SimpleQueue()
+_trabalhadores_de_hash: List[threading.Thread] = []
+_trava_trabalhadores = threading.Lock()
+
+
+def _calcular_hashes():
+    while True:
+        futuro, senha, custo = _fila_de_hashes.get()
+        if futuro.set_running_or_notify_cancel():
+            try:
+                futuro.set_result(gerar_hash_de_senha(senha, custo))
+            except BaseException as erro:
+                futuro.set_exception(erro)
+        del futuro, senha  # não segura a última senha enquanto espera a próxima
+
+
+def agendar_hash_de_senha(senha: str) -> Future:
+    """Põe o hash da senha (com o custo atual) na fila dos trabalhadores e devolve o Future do hash.
+
+    Os trabalhadores são threads daemon (o hashlib libera o GIL durante o hash): hashes que ninguém
+    esperou não seguram o fim do processo."""
+    with _trava_trabalhadores:
+        if len(_trabalhadores_de_hash) < TRABALHADORES_DE_HASH:
+            trabalhador = threading.Thread(target=_calcular_hashes, daemon=True,
+                                           name=f"hash-de-senha-{len(_trabalhadores_de_hash)}")
+            trabalhador.start()
+            _trabalhadores_de_hash.append(trabalhador)
+    futuro: Future = Future()
+    _fila_de_hashes.put((futuro, senha, _custo))
+    return futuro
+
+
+def _normalizar(email: str) -> str:
+    return email.strip().casefold()
+
+
+class DiretorioDeUsuarios:
+    """Índice e-mail -> usuário (sem diferenciar maiúsculas). Se o e-mail de um usuário mudar,
+    ele precisa ser removido e cadastrado de novo."""
+    def __init__(self, usuarios: Iterable[Usuario] = ()):
+        self.trava = threading.Lock()
+        self._por_email: Dict[str, Usuario] = {}
+        for usuario in usuarios:
+            self.cadastrar(usuario)
+
+    def cadastrar(self, usuario: Usuario):
+        chave = _normalizar(usuario.email)
+        with self.trava:
+            atual = self._por_email.get(chave)
+            if atual is not None and atual is not usuario:
+                raise ValueError("E-mail já cadastrado.")
+            self._por_email[chave] = usuario
+
+    def remover(self, usuario: Usuario):
+        chave = _normalizar(usuario.email)
+        with self.trava:
+            if self._por_email.get(chave) is usuario:
+                del self._por_email[chave]
+
+    def por_email(self, email: str) -> Optional[Usuario]:
+        return self._por_email.get(_normalizar(email))
+
+    def __len__(self) -> int:
+        return len(self._por_email)
+
+
+class Sessao:
+    __slots__ = ("token", "usuario", "expira_em")
+
+    def __init__(self, token: str, usuario: Usuario, expira_em: float):
+        self.token: str = token
+        self.usuario: Usuario = usuario
+        self.expira_em: float = expira_em
+
+
+class CacheDeSessoes:
+    """Sessões abertas, indexadas pelo token.
+
+    Todas têm o mesmo TTL, então a ordem de criação é também a ordem de expiração: as
+    vencidas saem pelo início do OrderedDict a cada acesso, sem varrer o cache inteiro.
+    """
+    def __init__(self, ttl: float = TTL_PADRAO, relogio: Callable[[], float] = time.monotonic):
+        self.ttl: float = ttl
+        self._relogio = relogio
+        self.trava = threading.Lock()
+        self._sessoes: "OrderedDict[str, Sessao]" = OrderedDict()
+
+    def _expurgar(self, agora: float):
+        while self._sessoes:
+            sessao = next(iter(self._sessoes.values()))
+            if sessao.expira_em > agora:
+                break
+            self._sessoes.popitem(last=False)
+
+    def criar(self, usuario: Usuario) -> Sessao:
+        token = secrets.token_urlsafe(32)
+        with self.trava:
+            agora = self._relogio()
+            self._expurgar(agora)
+            sessao = self._sessoes[token] = Sessao(token, usuario, agora + self.ttl)
+        return sessao
+
+    def validar(self, token: str) -> Optional[Usuario]:
+        """Usuário da sessão, ou None se o token não existe ou já expirou."""
+        with self.trava:
+            self._expurgar(self._relogio())
+            sessao = self._sessoes.get(token)
+        return sessao.usuario if sessao is not None else None
+
+    def encerrar(self, token: str) -> Optional[Sessao]:
+        with self.trava:
+            return self._sessoes.pop(token, None)
+
+    def encerrar_do_usuario(self, usuario: Usuario) -> int:
+        """Encerra todas as sessões do usuário (ex.: depois de uma troca de senha)."""
+        with self.trava:
+            tokens = [token for token, sessao in self._sessoes.items() if sessao.usuario is usuario]
+            for token in tokens:
+                del self._sessoes[token]
+        return len(tokens)
+
+    def __len__(self) -> int:
+        with self.trava:
+            self._expurgar(self._relogio())
+            return len(self._sessoes)
+
+
+class Autenticador:
+    """Login por e-mail e senha, devolvendo um token de sessão.
+
+    `entrar` é a versão assíncrona: o hash roda num pool de threads próprio (o hashlib libera o
+    GIL durante o scrypt/PBKDF2), então muitos logins simultâneos não travam o laço de eventos.
+    """
+    def __init__(self, diretorio: Optional[DiretorioDeUsuarios] = None, sessoes: Optional[CacheDeSessoes] = None,
+                 trabalhadores: Optional[int] = None):
+        self.diretorio: DiretorioDeUsuarios = diretorio if diretorio is not None else DiretorioDeUsuarios()
+        self.sessoes: CacheDeSessoes = sessoes if sessoes is not None else CacheDeSessoes()
+        self._executor = ThreadPoolExecutor(trabalhadores, thread_name_prefix="autenticacao")
+        # E-mails desconhecidos também pagam um hash, para o tempo de resposta não revelar quem existe
+        self._hash_ficticio: str = gerar_hash_de_senha(secrets.token_hex(8))
+
+    def autenticar(self, email: str, senha: str) -> str:
+        """Confere a senha (operação cara) e abre uma sessão; devolve o token."""
+        usuario = self.diretorio.por_email(email)
+        if usuario is None or usuario.senha_hash is None:
+            verificar_hash(senha, self._hash_ficticio)
+            raise ErroDeAutenticacao("E-mail ou senha inválidos.")
+        if not usuario.verificar_senha(senha):
+            raise ErroDeAutenticacao("E-mail ou senha inválidos.")
+        if precisa_novo_hash(usuario.senha_hash):
+            usuario.definir_senha(senha)
+        usuario.login()
+        return self.sessoes.criar(usuario).token
+
+    async def entrar(self, email: str, senha: str) -> str:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.autenticar, email, senha)
+
+    def validar(self, token: str) -> Usuario:
+        """Usuário dono do token, sem recalcular hash nenhum."""
+        usuario = self.sessoes.validar(token)
+        if usuario is None:
+            raise ErroDeAutenticacao("Sessão inválida ou expirada.")
+        return usuario
+
+    def sair(self, token: str):
+        sessao = self.sessoes.encerrar(token)
+        if sessao is not None:
+            sessao.usuario.logout()
+
+    def trocar_senha(self, token: str, senha_atual: str, nova_senha: str):
+        """Troca a senha do dono da sessão e encerra todas as sessões dele."""
+        usuario = self.validar(token)
+        if not usuario.verificar_senha(senha_atual):
+            raise ErroDeAutenticacao("Senha atual incorreta.")
+        usuario.definir_senha(nova_senha)
+        quantidade = self.sessoes.encerrar_do_usuario(usuario)
+        log.info("Senha de %s alterada; %s sessão(ões) encerrada(s).", usuario.nome, quantidade)
+
+    def encerrar(self):
+        self._executor.shutdown()
@@ -0,0 +1 @@
+"""Benchmarks do domínio do torneio (ver benchmarks/torneio.py)."""
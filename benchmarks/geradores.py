@@ -0,0 +1,51 @@
+from __future__ import annotations
+import random
+from datetime import date
+from typing import List, Tuple
+
+from esqueleto import Competicao, Juiz, LiderDeEquipe, Organizador, Robo
+
+# Geradores sintéticos com semente: a mesma (tamanho, semente) produz sempre o mesmo evento,
+# então duas execuções do benchmark (em commits diferentes) medem exatamente o mesmo trabalho.
+ROBOS_POR_EQUIPE = 10
+PROPORCAO_COMBATE = 0.5
+
+
+class Cenario:
+    """Evento com uma competição de cada tipo e robôs já cadastrados, ainda sem inscrições."""
+    def __init__(self, tamanho: int, semente: int):
+        self.tamanho: int = tamanho
+        self.semente: int = semente
+        self.aleatorio = random.Random(semente)
+        # Usuários sintéticos não fazem login: sem senha, nenhum hash roda em segundo plano durante as medições
+        self.organizador = Organizador("Organizador", "organizador@bench.com", None)
+        self.evento = self.organizador.criar_evento(f"Evento {tamanho}", date(2025, 1, 1), date(2025, 1, 3))
+        self.combate: Competicao = self.organizador.adicionar_competicao(self.evento, "Combate", "combate")
+        self.seguidor: Competicao = self.organizador.adicionar_competicao(self.evento, "Seguidor", "seguidor")
+        self.juiz = Juiz("Juiz", "juiz@bench.com", None)
+        self.lideres: List[LiderDeEquipe] = []
+        # (líder, robô, competição) de cada inscrição a ser feita, na ordem em que será feita
+        self.destinos: List[Tuple[LiderDeEquipe, Robo, Competicao]] = []
+
+
+def gerar_cenario(tamanho: int, semente: int = 0, proporcao_combate: float = PROPORCAO_COMBATE) -> Cenario:
+    """Cria equipes e robôs para `tamanho` inscrições, divididas entre combate e seguidor de linha."""
+    cenario = Cenario(tamanho, semente)
+    aleatorio = cenario.aleatorio
+    lider = None
+    for numero in range(tamanho):
+        if numero % ROBOS_POR_EQUIPE == 0:
+            equipe = len(cenario.lideres)
+            lider = LiderDeEquipe(f"Líder {equipe}", f"lider{equipe}@bench.com", None)
+            lider.cadastrar_equipe(f"Equipe {equipe}")
+            cenario.lideres.append(lider)
+        robo = lider.cadastrar_robo(f"Robô {numero}", round(aleatorio.uniform(0.5, 3.0), 2))
+        robo.rating = aleatorio.gauss(1500.0, 200.0)
+        competicao = cenario.combate if aleatorio.random() < proporcao_combate else cenario.seguidor
+        cenario.destinos.append((lider, robo, competicao))
+    return cenario
+
+
+def tempo_de_volta(aleatorio: random.Random) -> float:
+    """Tempo de volta plausível para um seguidor de linha, em segundos (com centésimos)."""
+    return round(max(5.0, aleatorio.gauss(20.0, 4.0)), 2)
@@ -0,0 +1,194 @@
+"""Mede as operações principais do torneio em eventos sintéticos de tamanhos crescentes.
+
+Uso (na raiz do repositório):
+
+    python -m benchmarks.torneio --tamanhos 10 1000 100000 --saida atual.json --comparar anterior.json
+
+Para cada tamanho e operação o resultado traz o número de operações, o tempo total, a vazão
+(operações por segundo) e o pico de memória alocada durante a operação (tracemalloc). O JSON
+gerado pode ser comparado com o de outro commit para apontar regressões.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+from benchmarks.geradores import gerar_cenario, tempo_de_volta
+from esqueleto import PainelDeVisualizacao, StatusLuta
+
+VERSAO_FORMATO = 1
+TAMANHOS_PADRAO = (10, 1000, 100000)
+VOLTAS_POR_ROBO = 3
+REPETICOES_CLASSIFICACAO = 5
+TOLERANCIA = 0.2  # Variação aceita antes de apontar uma regressão
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def medir(operacao: str, tamanho: int, operacoes: int, funcao: Callable[[], object], memoria: bool = True) -> Dict:
+    """Executa `funcao` uma vez e devolve a linha de resultado da operação."""
+    gc.collect()
+    if memoria:
+        tracemalloc.start()
+    inicio = time.perf_counter()
+    funcao()
+    segundos = time.perf_counter() - inicio
+    pico = None
+    if memoria:
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {
+        "operacao": operacao,
+        "tamanho": tamanho,
+        "operacoes": operacoes,
+        "segundos": segundos,
+        "operacoes_por_segundo": operacoes / segundos if segundos > 0 else None,
+        "pico_memoria": pico,
+    }
+
+
+def executar(tamanho: int, semente: int = 0, memoria: bool = True) -> List[Dict]:
+    """Roda todas as operações, em sequência, sobre um evento de `tamanho` inscrições."""
+    cenario = gerar_cenario(tamanho, semente)
+    combate, seguidor, juiz = cenario.combate, cenario.seguidor, cenario.juiz
+    resultados: List[Dict] = []
+
+    def inscrever():
+        for lider, robo, competicao in cenario.destinos:
+            lider.inscrever_robo(robo, competicao)
+
+    def aprovar():
+        for competicao in (combate, seguidor):
+            for inscricao in competicao.inscricoes:
+                cenario.organizador.aprovar_inscricao(inscricao)
+
+    def registrar_tempos():
+        aleatorio = cenario.aleatorio
+        for _ in range(VOLTAS_POR_ROBO):
+            for inscricao in seguidor.inscricoes:
+                juiz.registrar_tomada_de_tempo(inscricao, tempo_de_volta(aleatorio))
+
+    def classificar():
+        for _ in range(REPETICOES_CLASSIFICACAO):
+            seguidor.gerar_classificacao()
+
+    def disputar():
+        # As lutas estão em ordem de rodada, então uma passada basta para chegar ao campeão
+        aleatorio = cenario.aleatorio
+        for luta in combate.chave_batalha.lutas:
+            if luta.status != StatusLuta.CONCLUIDA:
+                vencedor = luta.competidor1 if aleatorio.random() < 0.5 else luta.competidor2
+                juiz.registrar_vencedor_luta(luta, vencedor)
+
+    painel = PainelDeVisualizacao()
+
+    def renderizar():
+        saida = io.StringIO()
+        painel.ver_chave_de_batalha(combate, saida)
+        painel.ver_classificacao_seguidor(seguidor, saida=saida)
+        painel.ver_resultados_evento(cenario.evento, saida)
+
+    resultados.append(medir("inscrever_robo", tamanho, len(cenario.destinos), inscrever, memoria))
+    resultados.append(medir("aprovar_inscricao", tamanho, tamanho, aprovar, memoria))
+    resultados.append(medir("gerar_estrutura", tamanho, 1, combate.gerar_estrutura, memoria))
+    resultados.append(medir("registrar_tomada_de_tempo", tamanho, VOLTAS_POR_ROBO * len(seguidor.inscricoes),
+                            registrar_tempos, memoria))
+    resultados.append(medir("gerar_classificacao", tamanho, REPETICOES_CLASSIFICACAO, classificar, memoria))
+    lutas = sum(1 for luta in combate.chave_batalha.lutas if luta.status != StatusLuta.CONCLUIDA)
+    resultados.append(medir("registrar_vencedor_luta", tamanho, lutas, disputar, memoria))
+    resultados.append(medir("painel", tamanho, 3, renderizar, memoria))
+    return resultados
+
+
+def _commit() -> Optional[str]:
+    try:
+        saida = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                               text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return saida.stdout.strip() or None
+
+
+def executar_suite(tamanhos: Iterable[int] = TAMANHOS_PADRAO, semente: int = 0, memoria: bool = True) -> Dict:
+    resultados = []
+    for tamanho in tamanhos:
+        resultados.extend(executar(tamanho, semente, memoria))
+    return {
+        "versao": VERSAO_FORMATO,
+        "commit": _commit(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "semente": semente,
+        "tracemalloc": memoria,  # Com tracemalloc a vazão cai; só compare execuções com o mesmo valor
+        "resultados": resultados,
+    }
+
+
+def comparar(anterior: Dict, atual: Dict, tolerancia: float = TOLERANCIA) -> List[Dict]:
+    """Operações que ficaram mais lentas ou alocaram mais memória que `anterior`, além da tolerância."""
+    base = {(linha["operacao"], linha["tamanho"]): linha for linha in anterior["resultados"]}
+    regressoes = []
+    for linha in atual["resultados"]:
+        antes = base.get((linha["operacao"], linha["tamanho"]))
+        if antes is None:
+            continue
+        for metrica, pior in (("operacoes_por_segundo", lambda a, d: d < a * (1 - tolerancia)),
+                              ("pico_memoria", lambda a, d: d > a * (1 + tolerancia))):
+            valor_anterior, valor_atual = antes.get(metrica), linha.get(metrica)
+            if valor_anterior and valor_atual is not None and pior(valor_anterior, valor_atual):
+                regressoes.append({"operacao": linha["operacao"], "tamanho": linha["tamanho"], "metrica": metrica,
+                                   "anterior": valor_anterior, "atual": valor_atual})
+    return regressoes
+
+
+def _tabela(resultado: Dict) -> str:
+    linhas = [f"{'operação':<28}{'tamanho':>10}{'ops/s':>16}{'pico (KiB)':>14}"]
+    for linha in resultado["resultados"]:
+        vazao = linha["operacoes_por_segundo"]
+        pico = linha["pico_memoria"]
+        linhas.append(f"{linha['operacao']:<28}{linha['tamanho']:>10}"
+                      f"{vazao if vazao is None else round(vazao, 1):>16}"
+                      f"{'-' if pico is None else pico // 1024:>14}")
+    return "\n".join(linhas)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do domínio do torneio.")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=list(TAMANHOS_PADRAO))
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--sem-memoria", action="store_true", help="não mede memória (vazão sem o custo do tracemalloc)")
+    parser.add_argument("--saida", help="arquivo JSON de saída (padrão: benchmarks/resultados/<commit>.json)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para apontar regressões")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    argumentos = parser.parse_args(argv)
+
+    resultado = executar_suite(argumentos.tamanhos, argumentos.semente, not argumentos.sem_memoria)
+    saida = argumentos.saida or os.path.join(RAIZ, "benchmarks", "resultados", f"{resultado['commit'] or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    print(_tabela(resultado))
+    print(f"Resultados gravados em {saida}")
+
+    if argumentos.comparar:
+        with open(argumentos.comparar, encoding="utf-8") as arquivo:
+            regressoes = comparar(json.load(arquivo), resultado, argumentos.tolerancia)
+        for regressao in regressoes:
+            print(f"REGRESSÃO {regressao['operacao']} ({regressao['tamanho']}): {regressao['metrica']} "
+                  f"{regressao['anterior']:.1f} -> {regressao['atual']:.1f}")
+        return 1 if regressoes else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
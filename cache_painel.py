@@ -0,0 +1,51 @@
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+
+class CacheLRU:
+    """Cache com descarte do item usado há mais tempo, compartilhado entre painéis e eventos.
+
+    As chaves usadas pelo painel já incluem a versão da competição ou do evento, então uma
+    mutação torna a entrada antiga inalcançável e ela acaba descartada pelo LRU.
+    """
+    def __init__(self, capacidade: int = 4096):
+        if capacidade <= 0:
+            raise ValueError("A capacidade do cache deve ser positiva.")
+        self.capacidade: int = capacidade
+        self._itens: OrderedDict = OrderedDict()
+        self._trava = threading.Lock()
+        self.acertos: int = 0
+        self.falhas: int = 0
+
+    def obter(self, chave: Hashable) -> Optional[object]:
+        with self._trava:
+            valor = self._itens.get(chave)
+            if valor is not None:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+            else:
+                self.falhas += 1
+            return valor
+
+    def guardar(self, chave: Hashable, valor: object):
+        with self._trava:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+
+    def obter_ou_calcular(self, chave: Hashable, calcular: Callable[[], object]) -> object:
+        valor = self.obter(chave)
+        if valor is None:
+            valor = calcular()
+            self.guardar(chave, valor)
+        return valor
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+
+    def __len__(self) -> int:
+        return len(self._itens)
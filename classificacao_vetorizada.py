@@ -0,0 +1,61 @@
+from __future__ import annotations
+from typing import List, Optional
+
+from esqueleto import CompeticaoSeguidorDeLinha, Inscricao, Resultado
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional; sem ele a classificação é calculada em Python puro
+    np = None
+
+
+def numpy_disponivel() -> bool:
+    return np is not None
+
+
+def gerar_classificacao_vetorizada(competicao: CompeticaoSeguidorDeLinha, limite: Optional[int] = None) -> List[Resultado]:
+    """Recalcula a classificação inteira a partir das colunas de voltas.
+
+    Com NumPy, todas as voltas viram um único vetor "ragged" (um trecho por inscrição): o melhor
+    tempo de cada trecho sai de `np.minimum.reduceat` e a ordem de um `argsort` estável, então
+    empates ficam na ordem de inscrição e dividem a mesma posição, como no ranking incremental.
+    """
+    with competicao.trava:
+        inscricoes: List[Inscricao] = [insc for insc in competicao.inscricoes if len(insc.tomadas_de_tempo)]
+        if np is None:
+            melhores = [min(insc.tomadas_de_tempo.tempos) for insc in inscricoes]
+        elif inscricoes:
+            # concatenate copia os dados, liberando os buffers antes de soltar a trava
+            trechos = [np.frombuffer(insc.tomadas_de_tempo.tempos, dtype=np.float64) for insc in inscricoes]
+            tempos = np.concatenate(trechos)
+            del trechos
+    if not inscricoes:
+        return []
+    if np is None:
+        return _classificar_em_python(inscricoes, melhores, limite)
+
+    tamanhos = np.fromiter((len(insc.tomadas_de_tempo) for insc in inscricoes), dtype=np.int64, count=len(inscricoes))
+    inicios = np.zeros(len(inscricoes), dtype=np.int64)
+    np.cumsum(tamanhos[:-1], out=inicios[1:])
+    melhores = np.minimum.reduceat(tempos, inicios)
+    ordem = np.argsort(melhores, kind="stable")
+    ordenados = melhores[ordem]
+    # Posição de cada linha = 1 + primeira linha com o mesmo tempo (1º, 2º, 2º, 4º...)
+    posicoes = np.searchsorted(ordenados, ordenados, side="left") + 1
+    if limite is not None:
+        ordem, ordenados, posicoes = ordem[:limite], ordenados[:limite], posicoes[:limite]
+    return [Resultado(int(posicao), inscricoes[indice], float(tempo))
+            for indice, tempo, posicao in zip(ordem.tolist(), ordenados.tolist(), posicoes.tolist())]
+
+
+def _classificar_em_python(inscricoes: List[Inscricao], melhores: List[float], limite: Optional[int]) -> List[Resultado]:
+    ordem = sorted(range(len(inscricoes)), key=melhores.__getitem__)
+    resultados: List[Resultado] = []
+    posicao = 0
+    tempo_anterior: Optional[float] = None
+    for linha, indice in enumerate(ordem[:limite]):
+        if melhores[indice] != tempo_anterior:
+            posicao = linha + 1
+            tempo_anterior = melhores[indice]
+        resultados.append(Resultado(posicao, inscricoes[indice], melhores[indice]))
+    return resultados
@@ -0,0 +1,163 @@
+from __future__ import annotations
+import glob
+import os
+import threading
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from esqueleto import Equipe, Evento, Inscricao, Luta, TomadaDeTempo
+from persistencia import (
+    aplicar_acoes, carregar_snapshot, codificar_tomada, codificar_vitoria, ler_acoes, salvar_snapshot
+)
+
+PREFIXO_SEGMENTO = "diario."
+PREFIXO_CHECKPOINT = "checkpoint."
+
+
+def _numero(caminho: str) -> int:
+    return int(os.path.basename(caminho).split(".")[1])
+
+
+def _segmentos(diretorio: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(diretorio, PREFIXO_SEGMENTO + "*.log")), key=_numero)
+
+
+def _checkpoints(diretorio: str) -> List[str]:
+    return sorted(glob.glob(os.path.join(diretorio, PREFIXO_CHECKPOINT + "*.snap")), key=_numero)
+
+
+class DiarioWAL:
+    """Diário write-ahead das ações dos juízes, dividido em segmentos.
+
+    Cada chamada só retorna depois que o registro está em disco (fsync). As gravações de
+    juízes concorrentes são agrupadas por uma thread de commit: tudo o que chegou enquanto
+    o fsync anterior rodava vai no mesmo write + fsync (group commit).
+    """
+    def __init__(self, diretorio: str, tamanho_maximo_segmento: int = 64 * 1024 * 1024,
+                 espera_de_grupo: float = 0.0):
+        os.makedirs(diretorio, exist_ok=True)
+        self.diretorio: str = diretorio
+        self.tamanho_maximo_segmento: int = tamanho_maximo_segmento
+        self.espera_de_grupo: float = espera_de_grupo  # Tempo extra para juntar mais registros por fsync
+        segmentos = _segmentos(diretorio)
+        self._numero_segmento: int = _numero(segmentos[-1]) + 1 if segmentos else 1
+        self._arquivo = self._abrir_segmento(self._numero_segmento)
+
+        self._condicao = threading.Condition()
+        self._pendentes: List[bytes] = []
+        self._lote_aberto: int = 1      # Lote que recebe os próximos registros
+        self._lote_gravado: int = 0     # Último lote já em disco
+        self._erro: Optional[BaseException] = None
+        self._fechando: bool = False
+        self.total_fsyncs: int = 0
+        self._thread = threading.Thread(target=self._laco_de_commit, name="diario-wal", daemon=True)
+        self._thread.start()
+
+    def _abrir_segmento(self, numero: int):
+        return open(os.path.join(self.diretorio, f"{PREFIXO_SEGMENTO}{numero:08d}.log"), "ab")
+
+    # --- Interface usada pelo Juiz ---
+
+    def registrar_tomada(self, inscricao: Inscricao, tomada: TomadaDeTempo):
+        self._anexar(codificar_tomada(inscricao, tomada))
+
+    def registrar_vitoria(self, luta: Luta, vencedor: Inscricao):
+        self._anexar(codificar_vitoria(luta, vencedor))
+
+    def _anexar(self, registro: bytes):
+        with self._condicao:
+            if self._fechando:
+                raise ValueError("O diário já foi fechado.")
+            self._pendentes.append(registro)
+            lote = self._lote_aberto
+            self._condicao.notify_all()
+            while self._lote_gravado < lote and self._erro is None:
+                self._condicao.wait()
+            if self._erro is not None:
+                raise self._erro
+
+    # --- Thread de commit ---
+
+    def _laco_de_commit(self):
+        while True:
+            with self._condicao:
+                while not self._pendentes and not self._fechando:
+                    self._condicao.wait()
+                if not self._pendentes:
+                    return
+            if self.espera_de_grupo:
+                time.sleep(self.espera_de_grupo)
+            with self._condicao:
+                lote, dados = self._lote_aberto, b"".join(self._pendentes)
+                self._pendentes = []
+                self._lote_aberto += 1
+            try:
+                self._arquivo.write(dados)
+                self._arquivo.flush()
+                os.fsync(self._arquivo.fileno())
+                self.total_fsyncs += 1
+                if self._arquivo.tell() >= self.tamanho_maximo_segmento:
+                    self._rotacionar()
+            except OSError as erro:
+                with self._condicao:
+                    self._erro = erro
+                    self._condicao.notify_all()
+                return
+            with self._condicao:
+                self._lote_gravado = lote
+                self._condicao.notify_all()
+
+    def _rotacionar(self):
+        self._arquivo.close()
+        self._numero_segmento += 1
+        self._arquivo = self._abrir_segmento(self._numero_segmento)
+
+    # --- Manutenção ---
+
+    def compactar(self, evento: Evento, equipes: Iterable[Equipe] = ()):
+        """Grava um checkpoint do evento e descarta os segmentos que ele já cobre.
+
+        Deve ser chamado sem juízes registrando ações (por exemplo, entre rodadas), para que
+        o estado em memória corresponda exatamente ao que já está no diário.
+        """
+        with self._condicao:
+            while self._pendentes or self._lote_gravado < self._lote_aberto - 1:
+                self._condicao.wait()
+            self._rotacionar()
+            primeiro_segmento = self._numero_segmento
+        salvar_snapshot(evento, os.path.join(self.diretorio, f"{PREFIXO_CHECKPOINT}{primeiro_segmento:08d}.snap"), equipes)
+        for caminho in _segmentos(self.diretorio):
+            if _numero(caminho) < primeiro_segmento:
+                os.remove(caminho)
+        for caminho in _checkpoints(self.diretorio):
+            if _numero(caminho) < primeiro_segmento:
+                os.remove(caminho)
+
+    def fechar(self):
+        with self._condicao:
+            self._fechando = True
+            self._condicao.notify_all()
+        self._thread.join()
+        self._arquivo.close()
+
+
+def recuperar(diretorio: str, evento: Optional[Evento] = None) -> Tuple[Optional[Evento], List[Equipe], int]:
+    """Carrega o último checkpoint (se houver) e reaplica os segmentos seguintes.
+
+    Sem checkpoint, as ações são reaplicadas sobre o `evento` informado. Devolve o evento,
+    as equipes do checkpoint e quantas ações foram reaplicadas.
+    """
+    equipes: List[Equipe] = []
+    primeiro_segmento = 0
+    checkpoints = _checkpoints(diretorio)
+    if checkpoints:
+        evento, equipes = carregar_snapshot(checkpoints[-1])
+        primeiro_segmento = _numero(checkpoints[-1])
+    if evento is None:
+        return None, equipes, 0
+    aplicadas = 0
+    for caminho in _segmentos(diretorio):
+        if _numero(caminho) >= primeiro_segmento:
+            with open(caminho, "rb") as arquivo:
+                aplicadas += aplicar_acoes(evento, ler_acoes(arquivo.read()))
+    return evento, equipes, aplicadas
@@ -1,9 +1,66 @@
-
 from __future__ import annotations
 from enum import Enum
 from datetime import date, datetime
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from array import array
+from bisect import bisect_left
+from concurrent.futures import Future
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+import gc
+import sys
+import threading
+import time
+
+from autenticacao import agendar_hash_de_senha, gerar_hash_de_senha, verificar_hash
+from identificadores import novo_id, proximo_id
+from log_eventos import log
+from ratings import RATING_INICIAL, trava_dos_ratings, variacao_elo
+
+
+@contextmanager
+def _carga_em_lote():
+    """Pausa o coletor de lixo cíclico enquanto muitos objetos são criados de uma vez."""
+    reativar = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if reativar:
+            gc.enable()
+
+
+# Observadores de mutação (ver indices.py): recebem cada inscrição, volta e luta alterada em
+# qualquer competição. Diferente das assinaturas de Competicao, que levam só os deltas de
+# apresentação do painel. Sem observadores o custo é um teste de lista vazia.
+_observadores_de_mutacao: List[Callable[[object], None]] = []
+
+
+def observar_mutacoes(callback: Callable[[object], None]):
+    _observadores_de_mutacao.append(callback)
+
+
+def cancelar_observacao(callback: Callable[[object], None]):
+    _observadores_de_mutacao.remove(callback)
+
+
+def _notificar_mutacao(mutacao: object):
+    for callback in list(_observadores_de_mutacao):
+        callback(mutacao)
+
+
+class CarregavelSobDemanda:
+    """Permite que atributos pesados sejam carregados só no primeiro acesso (ver arquivo_temporada.py).
+
+    `_sob_demanda` mapeia o nome do atributo para a unidade que o carrega. O __getattr__ só é
+    chamado quando o atributo não está no objeto, então objetos comuns não pagam nada.
+    """
+    def __getattr__(self, nome: str):
+        unidades = self.__dict__.get("_sob_demanda")
+        if unidades is None or nome not in unidades:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{nome}'")
+        unidades[nome].garantir()
+        return self.__dict__[nome]
 
 
 class TipoPerfil(Enum):
@@ -36,34 +93,60 @@ class StatusLuta(Enum):
 
 class Usuario(ABC):
     """Classe base abstrata para todos os usuários do sistema."""
-    def __init__(self, nome: str, email: str, senha: str):
-        self.id: int = id(self)  # Simulação de um ID único
+    ESPACO_DE_IDS = "Usuario"  # Organizador, Juiz e LiderDeEquipe numeram juntos (ver identificadores.espaco_de_ids)
+
+    def __init__(self, nome: str, email: str, senha: Optional[str], senha_hash: Optional[str] = None):
+        self.id: int = novo_id(self)
         self.nome: str = nome
         self.email: str = email
-        self.senha: str = senha  # Em um sistema real, isso seria um hash
+        # Só o hash com sal fica guardado (ver autenticacao.py). Ele é caro de propósito, então é
+        # calculado em segundo plano e o usuário guarda só o Future; o primeiro uso do hash (login
+        # ou gravação) espera por ele. Quem já tem o hash, como um snapshot, o passa pronto.
+        self._trava_senha = threading.Lock()
+        self._hash_agendado: Optional[Future] = (
+            agendar_hash_de_senha(senha) if senha is not None and senha_hash is None else None)
+        self._senha_hash: Optional[str] = senha_hash
         self.data_cadastro: date = date.today()
 
+    @property
+    def senha_hash(self) -> Optional[str]:
+        with self._trava_senha:
+            if self._hash_agendado is not None:
+                self._senha_hash = self._hash_agendado.result()
+                self._hash_agendado = None
+            return self._senha_hash
+
+    def definir_senha(self, senha: str):
+        senha_hash = gerar_hash_de_senha(senha)
+        with self._trava_senha:
+            if self._hash_agendado is not None:
+                self._hash_agendado.cancel()
+            self._senha_hash, self._hash_agendado = senha_hash, None
+
+    def verificar_senha(self, senha: str) -> bool:
+        return self.senha_hash is not None and verificar_hash(senha, self.senha_hash)
+
     def login(self):
-        print(f"Usuário {self.nome} logado.")
+        log.info("Usuário %s logado.", self.nome)
         pass
 
     def logout(self):
-        print(f"Usuário {self.nome} deslogado.")
+        log.info("Usuário %s deslogado.", self.nome)
         pass
 
 class Organizador(Usuario):
     """Representa um usuário com permissões para gerenciar eventos."""
-    def __init__(self, nome: str, email: str, senha: str):
-        super().__init__(nome, email, senha)
+    def __init__(self, nome: str, email: str, senha: Optional[str], senha_hash: Optional[str] = None):
+        super().__init__(nome, email, senha, senha_hash)
         self.perfil = TipoPerfil.ORGANIZADOR
 
     def criar_evento(self, nome: str, data_inicio: date, data_fim: date) -> Evento:
-        print(f"Organizador {self.nome} criou o evento '{nome}'.")
+        log.info("Organizador %s criou o evento '%s'.", self.nome, nome)
         novo_evento = Evento(nome, data_inicio, data_fim, self)
         return novo_evento
 
     def adicionar_competicao(self, evento: Evento, nome: str, tipo: str) -> Competicao:
-        print(f"Adicionando competição '{nome}' do tipo '{tipo}' ao evento '{evento.nome}'.")
+        log.info("Adicionando competição '%s' do tipo '%s' ao evento '%s'.", nome, tipo, evento.nome)
         if tipo.lower() == 'combate':
             competicao = CompeticaoCombate(nome, evento)
         elif tipo.lower() == 'seguidor':
@@ -75,20 +158,20 @@ class Organizador(Usuario):
         return competicao
 
     def aprovar_inscricao(self, inscricao: Inscricao):
-        print(f"Avaliando inscrição ID {inscricao.id}.")
+        log.info("Avaliando inscrição ID %s.", inscricao.id)
         # Lógica para aprovar/reprovar
         inscricao.status = StatusInscricao.APROVADA
         pass
 
 class LiderDeEquipe(Usuario):
-    def __init__(self, nome: str, email: str, senha: str):
-        super().__init__(nome, email, senha)
+    def __init__(self, nome: str, email: str, senha: Optional[str], senha_hash: Optional[str] = None):
+        super().__init__(nome, email, senha, senha_hash)
         self.perfil = TipoPerfil.LIDER_EQUIPE
         self.equipe: Optional[Equipe] = None
 
     def cadastrar_equipe(self, nome_equipe: str) -> Equipe:
         if not self.equipe:
-            print(f"Líder {self.nome} cadastrou a equipe '{nome_equipe}'.")
+            log.info("Líder %s cadastrou a equipe '%s'.", self.nome, nome_equipe)
             self.equipe = Equipe(nome_equipe, self)
             return self.equipe
         else:
@@ -96,7 +179,7 @@ class LiderDeEquipe(Usuario):
 
     def adicionar_membro(self, nome_membro: str, funcao: str) -> Membro:
         if self.equipe:
-            print(f"Adicionando membro {nome_membro} à equipe {self.equipe.nome}.")
+            log.info("Adicionando membro %s à equipe %s.", nome_membro, self.equipe.nome)
             membro = Membro(nome_membro, funcao)
             self.equipe.adicionar_membro(membro)
             return membro
@@ -105,7 +188,7 @@ class LiderDeEquipe(Usuario):
     
     def cadastrar_robo(self, nome_robo: str, peso: float) -> Robo:
         if self.equipe:
-            print(f"Cadastrando robô {nome_robo} para a equipe {self.equipe.nome}.")
+            log.info("Cadastrando robô %s para a equipe %s.", nome_robo, self.equipe.nome)
             robo = Robo(nome_robo, peso)
             self.equipe.adicionar_robo(robo)
             return robo
@@ -113,88 +196,211 @@ class LiderDeEquipe(Usuario):
             raise Exception("O líder precisa cadastrar uma equipe primeiro.")
 
     def inscrever_robo(self, robo: Robo, competicao: Competicao) -> Inscricao:
-        if self.equipe and robo in self.equipe.robos:
-            print(f"Inscrevendo robô {robo.nome} na competição {competicao.nome}.")
+        if self.equipe and self.equipe.possui_robo(robo):
+            if competicao.robo_inscrito(robo):
+                raise ValueError("Robô já inscrito nesta competição.")
+            log.info("Inscrevendo robô %s na competição %s.", robo.nome, competicao.nome)
             inscricao = Inscricao(robo, competicao)
             competicao.receber_inscricao(inscricao)
             return inscricao
         else:
             raise Exception("Robô não pertence à equipe deste líder.")
 
+    def inscrever_robos(self, robos: Iterable[Robo], competicao: Competicao) -> List[Inscricao]:
+        """Inscreve vários robôs de uma vez; repetidos e já inscritos são ignorados."""
+        robos = list(robos)
+        if not self.equipe or not all(self.equipe.possui_robo(robo) for robo in robos):
+            raise Exception("Robô não pertence à equipe deste líder.")
+        data_inscricao = datetime.now()
+        vistos: Set[int] = set()
+        novas: List[Inscricao] = []
+        with _carga_em_lote():
+            for robo in robos:
+                if robo.id in vistos or competicao.robo_inscrito(robo):
+                    continue
+                vistos.add(robo.id)
+                novas.append(Inscricao(robo, competicao, data_inscricao))
+            return competicao.receber_inscricoes(novas)
+
 
 class Juiz(Usuario):
     """Representa um usuário com permissões para registrar resultados."""
-    def __init__(self, nome: str, email: str, senha: str):
-        super().__init__(nome, email, senha)
+    def __init__(self, nome: str, email: str, senha: Optional[str], senha_hash: Optional[str] = None):
+        super().__init__(nome, email, senha, senha_hash)
         self.perfil = TipoPerfil.JUIZ
+        self.diario = None  # Diário de ações (ver persistencia.DiarioDeAcoes), gravado antes de aplicar
 
     def registrar_vencedor_luta(self, luta: Luta, vencedor: Inscricao):
-        print(f"Juiz {self.nome} registrou {vencedor.robo.nome} como vencedor da luta ID {luta.id}.")
-        luta.registrar_resultado(vencedor)
-        # Lógica para avançar na chave de batalha
-        pass
+        log.info("Juiz %s registrou %s como vencedor da luta ID %s.", self.nome, vencedor.robo.nome, luta.id)
+        chave = luta.chave
+        # A trava da chave mantém a ordem do diário igual à ordem em que os resultados são aplicados
+        with chave.trava if chave is not None else nullcontext():
+            # Toda a validação vem antes do diário: uma ação recusada pela chave ficaria gravada e
+            # derrubaria a recuperação, e repetir o mesmo vencedor não muda nada
+            if chave is not None:
+                muda = chave.validar_registro(luta, vencedor)
+            else:
+                luta.validar_vencedor(vencedor)
+                muda = luta.vencedor is not vencedor
+            if not muda:
+                return
+            if self.diario is not None:
+                self.diario.registrar_vitoria(luta, vencedor)
+            if chave is not None:
+                chave.registrar_vencedor(luta, vencedor)
+            else:
+                luta.registrar_resultado(vencedor)
 
     def registrar_tomada_de_tempo(self, inscricao: Inscricao, tempo: float) -> TomadaDeTempo:
-        print(f"Juiz {self.nome} registrou o tempo {tempo}s para o robô {inscricao.robo.nome}.")
-        tomada = TomadaDeTempo(tempo)
+        log.info("Juiz %s registrou o tempo %ss para o robô %s.", self.nome, tempo, inscricao.robo.nome)
+        tomada = TomadaDeTempo(tempo, id_juiz=self.id)
+        if self.diario is not None:
+            self.diario.registrar_tomada(inscricao, tomada)
         inscricao.adicionar_tomada_de_tempo(tomada)
         return tomada
 
 
 class Equipe:
     def __init__(self, nome: str, lider: LiderDeEquipe):
-        self.id: int = id(self)
+        self.id: int = novo_id(self)
         self.nome: str = nome
         self.data_criacao: date = date.today()
         self.lider: LiderDeEquipe = lider
         self.membros: List[Membro] = []
         self.robos: List[Robo] = []
+        self._ids_robos: Set[int] = set()
 
     def adicionar_membro(self, membro: Membro):
         self.membros.append(membro)
 
     def adicionar_robo(self, robo: Robo):
         self.robos.append(robo)
+        self._ids_robos.add(robo.id)
+        robo.equipe = self
+
+    def possui_robo(self, robo: Robo) -> bool:
+        return robo.id in self._ids_robos
 
 class Membro:
     def __init__(self, nome: str, funcao: str):
-        self.id: int = id(self)
+        self.id: int = novo_id(self)
         self.nome: str = nome
         self.funcao: str = funcao
         self.data_ingresso: date = date.today()
 
 class Robo:
     def __init__(self, nome: str, peso: float):
-        self.id: int = id(self)
+        self.id: int = novo_id(self)
         self.nome: str = nome
         self.peso: float = peso
         self.disponivel: bool = True
+        self.rating: float = RATING_INICIAL  # Elo, atualizado a cada luta concluída (ver ratings.py)
+        self.equipe: Optional[Equipe] = None
         
-class Evento:
+class Evento(CarregavelSobDemanda):
     def __init__(self, nome: str, data_inicio: date, data_fim: date, organizador: Organizador):
-        self.id: int = id(self)
+        self.id: int = novo_id(self)
         self.nome: str = nome
         self.data_inicio: date = data_inicio
         self.data_fim: date = data_fim
         self.status: StatusEvento = StatusEvento.PLANEJADO
         self.organizador: Organizador = organizador
         self.competicoes: List[Competicao] = []
+        self.versao: int = 0  # Muda sempre que a lista de competições ou o status de uma delas muda
 
     def adicionar_competicao(self, competicao: Competicao):
         self.competicoes.append(competicao)
+        self.versao += 1
 
 
-class Competicao(ABC):
+class Competicao(CarregavelSobDemanda, ABC):
     """Classe base abstrata para os diferentes tipos de competição."""
+    ESPACO_DE_IDS = "Competicao"
+
     def __init__(self, nome: str, evento: Evento):
-        self.id: int = id(self)
+        self.id: int = novo_id(self)
         self.nome: str = nome
         self.evento: Evento = evento
-        self.status: StatusCompeticao = StatusCompeticao.INSCRICOES_ABERTAS
+        self.versao: int = 0  # Incrementada a cada mutação; usada como chave de cache pelo painel
+        self._status: StatusCompeticao = StatusCompeticao.INSCRICOES_ABERTAS
         self.inscricoes: List[Inscricao] = []
+        # Índices para consultas em O(1): inscrições por status e por robô
+        self._inscricoes_por_status: Dict[StatusInscricao, Dict[int, Inscricao]] = {
+            status: {} for status in StatusInscricao
+        }
+        self._inscricao_por_robo: Dict[int, Inscricao] = {}
+        # Protege os índices e o ranking; as inscrições da competição usam a mesma trava
+        self.trava: threading.RLock = threading.RLock()
+        self._assinantes: List[Callable[[object], None]] = []
         
+    @property
+    def status(self) -> StatusCompeticao:
+        return self._status
+
+    @status.setter
+    def status(self, novo_status: StatusCompeticao):
+        self._status = novo_status
+        self.versao += 1
+        if isinstance(self.evento, Evento):
+            self.evento.versao += 1
+
+    def assinar(self, callback: Callable[[object], None]):
+        """Registra um callback que recebe as atualizações (deltas) desta competição."""
+        self._assinantes.append(callback)
+
+    def cancelar_assinatura(self, callback: Callable[[object], None]):
+        self._assinantes.remove(callback)
+
+    def _publicar(self, atualizacao: object):
+        for callback in list(self._assinantes):
+            callback(atualizacao)
+
     def receber_inscricao(self, inscricao: Inscricao):
+        with self.trava:
+            if inscricao.robo.id in self._inscricao_por_robo:
+                raise ValueError("Robô já inscrito nesta competição.")
+            self._indexar_inscricao(inscricao)
+
+    def receber_inscricoes(self, inscricoes: Iterable[Inscricao]) -> List[Inscricao]:
+        """Recebe um lote de inscrições numa única passada, ignorando robôs já inscritos."""
+        aceitas: List[Inscricao] = []
+        ignoradas = 0
+        with self.trava, _carga_em_lote():
+            for inscricao in inscricoes:
+                if inscricao.robo.id in self._inscricao_por_robo:
+                    ignoradas += 1
+                    continue
+                self._indexar_inscricao(inscricao)
+                aceitas.append(inscricao)
+        log.info("Competição %s: %s inscrições recebidas, %s ignoradas.", self.nome, len(aceitas), ignoradas)
+        return aceitas
+
+    def _indexar_inscricao(self, inscricao: Inscricao):
         self.inscricoes.append(inscricao)
+        self._inscricao_por_robo[inscricao.robo.id] = inscricao
+        self._inscricoes_por_status[inscricao.status][inscricao.id] = inscricao
+        inscricao._registrada = True
+        self.versao += 1
+        if _observadores_de_mutacao:
+            _notificar_mutacao(InscricaoRegistrada(inscricao))
+
+    def _reindexar_status(self, inscricao: Inscricao, status_anterior: StatusInscricao):
+        """Move a inscrição para o grupo do seu novo status."""
+        self._inscricoes_por_status[status_anterior].pop(inscricao.id, None)
+        self._inscricoes_por_status[inscricao.status][inscricao.id] = inscricao
+        self.versao += 1
+
+    def inscricoes_por_status(self, status: StatusInscricao) -> List[Inscricao]:
+        return list(self._inscricoes_por_status[status].values())
+
+    def contar_inscricoes(self, status: StatusInscricao) -> int:
+        return len(self._inscricoes_por_status[status])
+
+    def robo_inscrito(self, robo: Robo) -> bool:
+        return robo.id in self._inscricao_por_robo
+
+    def get_inscricao(self, robo: Robo) -> Optional[Inscricao]:
+        return self._inscricao_por_robo.get(robo.id)
     
     @abstractmethod
     def gerar_estrutura(self):
@@ -206,76 +412,396 @@ class CompeticaoCombate(Competicao):
         super().__init__(nome, evento)
         self.chave_batalha: Optional[ChaveDeBatalha] = None
     
-    def gerar_estrutura(self):
-        print(f"Gerando chave de batalha para a competição '{self.nome}'.")
-        robos_aprovados = [insc.robo for insc in self.inscricoes if insc.status == StatusInscricao.APROVADA]
-        self.chave_batalha = ChaveDeBatalha("Eliminatória Simples", robos_aprovados)
-        # Lógica para criar as Lutas
-        pass
+    def gerar_estrutura(self, formato: str = "Eliminatória Simples", total_rodadas: Optional[int] = None):
+        """Gera a chave no formato pedido (ver formatos.py); `total_rodadas` só vale para o suíço."""
+        log.info("Gerando chave de batalha (%s) para a competição '%s'.", formato, self.nome)
+        aprovadas = self.sementes()
+        if formato == "Eliminatória Simples":
+            self.instalar_chave(aprovadas, planejar_eliminatoria(len(aprovadas)))
+            return
+        from formatos import criar_chave  # Importado aqui: formatos depende deste módulo
+        chave = criar_chave(formato, aprovadas, total_rodadas)
+        chave.competicao = self
+        self.chave_batalha = chave
+        self.versao += 1
+
+    def sementes(self) -> List[Inscricao]:
+        """Inscrições aprovadas ordenadas por rating (maior primeiro); empates mantêm a ordem de inscrição.
+
+        O grupo de aprovadas guarda a ordem de aprovação, que não sobrevive a um snapshot; por isso
+        a ordem de inscrição entra explicitamente no critério de desempate."""
+        ordem = {insc.id: posicao for posicao, insc in enumerate(self.inscricoes)}
+        return sorted(self.inscricoes_por_status(StatusInscricao.APROVADA),
+                      key=lambda insc: (-insc.robo.rating, ordem[insc.id]))
+
+    def instalar_chave(self, aprovadas: List[Inscricao], plano: List[int]):
+        """Cria a chave a partir de um plano de folhas (calculado aqui ou por outro processo)."""
+        chave = ChaveDeBatalha("Eliminatória Simples", [insc.robo for insc in aprovadas])
+        chave.competicao = self
+        chave.montar_lutas([aprovadas[i] if i >= 0 else None for i in plano])
+        self.chave_batalha = chave
+        self.versao += 1
 
 class CompeticaoSeguidorDeLinha(Competicao):
+    def __init__(self, nome: str, evento: Evento):
+        super().__init__(nome, evento)
+        # Ranking mantido de forma incremental, ordenado por (melhor_tempo, ordem de inscrição).
+        self._ranking: List[Tuple[float, int, Inscricao]] = []
+        self._ordem_inscricao: Dict[int, int] = {}
+
+    def _indexar_inscricao(self, inscricao: Inscricao):
+        super()._indexar_inscricao(inscricao)
+        self._ordem_inscricao[inscricao.id] = len(self._ordem_inscricao)
+        if inscricao.melhor_tempo is not None:
+            self.atualizar_ranking(inscricao, None)
+
     def gerar_estrutura(self):
-        print(f"Estrutura para '{self.nome}' definida. Competidores prontos para as tomadas de tempo.")
+        log.info("Estrutura para '%s' definida. Competidores prontos para as tomadas de tempo.", self.nome)
         pass
 
-    def gerar_classificacao(self) -> List[Resultado]:
-        """Calcula e gera a tabela de classificação baseada nos melhores tempos."""
-        print(f"Gerando classificação para '{self.nome}'.")
-        resultados: List[Resultado] = []
-        # Lógica para calcular melhor tempo de cada inscrição e ordenar
-        return resultados
-
-class Inscricao:
+    def atualizar_ranking(self, inscricao: Inscricao, tempo_anterior: Optional[float]):
+        """Reposiciona a inscrição no ranking após um novo melhor tempo (O(log n) na busca).
+
+        Chamado com `self.trava` já adquirida pela inscrição.
+        """
+        ordem = self._ordem_inscricao.get(inscricao.id)
+        if ordem is None:
+            return
+        indice_anterior: Optional[int] = None
+        if tempo_anterior is not None:
+            indice_anterior = bisect_left(self._ranking, (tempo_anterior, ordem))
+            del self._ranking[indice_anterior]
+        linha = (inscricao.melhor_tempo, ordem, inscricao)
+        indice_novo = bisect_left(self._ranking, linha)
+        self._ranking.insert(indice_novo, linha)
+        if self._assinantes:
+            self._publicar(AtualizacaoClassificacao(
+                self, inscricao, None if indice_anterior is None else indice_anterior + 1,
+                indice_novo + 1, inscricao.melhor_tempo))
+
+    def gerar_classificacao(self, limite: Optional[int] = None, modo: str = "incremental") -> List[Resultado]:
+        """Gera a tabela de classificação (ou apenas as `limite` primeiras linhas) a partir do ranking.
+
+        Com `modo="vetorizado"` a tabela é recalculada do zero sobre todas as voltas (NumPy, se instalado).
+        """
+        log.info("Gerando classificação para '%s'.", self.nome)
+        if modo == "vetorizado":
+            from classificacao_vetorizada import gerar_classificacao_vetorizada
+            return gerar_classificacao_vetorizada(self, limite)
+        if modo != "incremental":
+            raise ValueError("Modo de classificação inválido.")
+        return list(self.iterar_classificacao(limite))
+
+    def iterar_classificacao(self, limite: Optional[int] = None) -> Iterator[Resultado]:
+        """Gera as linhas da classificação uma a uma, sem montar a tabela inteira.
+
+        As linhas refletem o ranking quando a primeira é pedida: só as referências são copiadas sob a trava.
+        """
+        posicao = 0
+        tempo_anterior: Optional[float] = None
+        with self.trava:
+            linhas = self._ranking[:limite]
+        for indice, (tempo, _, inscricao) in enumerate(linhas):
+            # Tempos iguais dividem a mesma posição (1º, 2º, 2º, 4º...)
+            if tempo != tempo_anterior:
+                posicao = indice + 1
+                tempo_anterior = tempo
+            yield Resultado(posicao, inscricao, tempo)
+
+class Inscricao(CarregavelSobDemanda):
     """Conecta um Robô a uma Competição específica."""
-    def __init__(self, robo: Robo, competicao: Competicao):
-        self.id: int = id(self)
+    def __init__(self, robo: Robo, competicao: Competicao, data_inscricao: Optional[datetime] = None):
+        self.id: int = novo_id(self)
         self.robo: Robo = robo
         self.competicao: Competicao = competicao
-        self.data_inscricao: datetime = datetime.now()
-        self.status: StatusInscricao = StatusInscricao.PENDENTE
-        self.tomadas_de_tempo: List[TomadaDeTempo] = []
+        self.data_inscricao: datetime = data_inscricao or datetime.now()
+        self._registrada: bool = False  # Marcada pela competição ao receber a inscrição
+        self._status: StatusInscricao = StatusInscricao.PENDENTE
+        self._trava = competicao.trava if isinstance(competicao, Competicao) else threading.Lock()
+        self.tomadas_de_tempo: RegistroDeVoltas = RegistroDeVoltas()
+        self.melhor_tempo: Optional[float] = None  # Cache do menor tempo registrado
     
+    @property
+    def status(self) -> StatusInscricao:
+        return self._status
+
+    @status.setter
+    def status(self, novo_status: StatusInscricao):
+        with self._trava:
+            status_anterior = self._status
+            self._status = novo_status
+            if self._registrada and status_anterior is not novo_status:
+                self.competicao._reindexar_status(self, status_anterior)
+
     def adicionar_tomada_de_tempo(self, tomada: TomadaDeTempo):
-        self.tomadas_de_tempo.append(tomada)
+        with self._trava:
+            self.tomadas_de_tempo.append(tomada)
+            if isinstance(self.competicao, Competicao):
+                self.competicao.versao += 1
+            if _observadores_de_mutacao:
+                _notificar_mutacao(VoltaRegistrada(self, len(self.tomadas_de_tempo) - 1))
+            tempo_anterior = self.melhor_tempo
+            if tempo_anterior is None or tomada.tempo_em_segundos < tempo_anterior:
+                self.melhor_tempo = tomada.tempo_em_segundos
+                if isinstance(self.competicao, CompeticaoSeguidorDeLinha):
+                    self.competicao.atualizar_ranking(self, tempo_anterior)
         
     def get_melhor_tempo(self) -> Optional[float]:
-        if not self.tomadas_de_tempo:
-            return None
-        return min(t.tempo_em_segundos for t in self.tomadas_de_tempo)
+        return self.melhor_tempo
+
+
+def ordem_de_sementes(tamanho: int) -> List[int]:
+    """Ordem das sementes nas folhas de uma chave de `tamanho` posições (1 x N, 2 x N-1, ...)."""
+    ordem = [1]
+    while len(ordem) < tamanho:
+        soma = 2 * len(ordem) + 1
+        ordem = [semente for s in ordem for semente in (s, soma - s)]
+    return ordem
+
+
+def planejar_eliminatoria(total: int) -> List[int]:
+    """Índice (por semente, a partir de 0) do competidor em cada folha da chave; -1 marca um bye."""
+    if total < 2:
+        return list(range(total))
+    tamanho = 1 << (total - 1).bit_length()
+    return [semente - 1 if semente <= total else -1 for semente in ordem_de_sementes(tamanho)]
 
 
 class ChaveDeBatalha:
+    ESPACO_DE_IDS = "ChaveDeBatalha"  # vale também para os formatos de formatos.py
+
     def __init__(self, formato: str, robos_participantes: List[Robo]):
-        self.id: int = id(self)
+        self.id: int = novo_id(self)
         self.formato: str = formato
         self.lutas: List[Luta] = []
         self.robos_participantes = robos_participantes
+        # Árvore indexada como heap: a luta na posição i recebe os vencedores de 2i e 2i+1; a final é a posição 1.
+        self._posicoes: List[Optional[Luta]] = []
+        self.campeao: Optional[Inscricao] = None
+        self._trava_propria: threading.RLock = threading.RLock()
+        self.competicao: Optional[CompeticaoCombate] = None  # Recebe as atualizações publicadas pela chave
+
+    @property
+    def trava(self) -> threading.RLock:
+        """Instalada numa competição, a chave usa a trava dela, a mesma sob a qual o painel a lê."""
+        return self.competicao.trava if self.competicao is not None else self._trava_propria
+
+    def gerar_lutas(self, inscricoes: List[Inscricao]):
+        """Monta a eliminatória simples; `inscricoes` já vem ordenada por semente. Sementes altas recebem bye."""
+        self.montar_lutas([inscricoes[i] if i >= 0 else None for i in planejar_eliminatoria(len(inscricoes))])
+
+    def montar_lutas(self, folhas: List[Optional[Inscricao]]):
+        """Monta a árvore a partir das folhas já distribuídas (None = bye), como em `planejar_eliminatoria`."""
+        tamanho = len(folhas)
+        self.lutas = []
+        self._posicoes = []
+        self.campeao = folhas[0] if tamanho == 1 else None
+        if tamanho < 2:
+            return
+        total_rodadas = tamanho.bit_length() - 1
+        self._posicoes = [None] * tamanho
+        for posicao in range(1, tamanho // 2):
+            self._posicoes[posicao] = self._criar_luta(total_rodadas - posicao.bit_length() + 1, posicao, None, None)
+
+        for indice in range(0, tamanho, 2):
+            posicao = (tamanho + indice) // 2
+            competidor1, competidor2 = folhas[indice], folhas[indice + 1]
+            if competidor2 is None:
+                self._ocupar_vaga(posicao, competidor1)  # bye: avança direto
+            else:
+                self._posicoes[posicao] = self._criar_luta(1, posicao, competidor1, competidor2)
+
+        for rodada in range(1, total_rodadas + 1):
+            inicio, fim = tamanho >> rodada, tamanho >> (rodada - 1)
+            self.lutas.extend(luta for luta in self._posicoes[inicio:fim] if luta is not None)
+
+    def _criar_luta(self, rodada: int, posicao: int, competidor1: Optional[Inscricao], competidor2: Optional[Inscricao]) -> Luta:
+        luta = Luta(rodada, competidor1, competidor2)
+        luta.chave = self
+        luta.posicao = posicao
+        if _observadores_de_mutacao:
+            _notificar_mutacao(LutaAlterada(luta))
+        return luta
+
+    def _ocupar_vaga(self, posicao: int, inscricao: Inscricao):
+        """Coloca o competidor vindo da posição `posicao` na luta seguinte (posição pai)."""
+        pai = posicao // 2
+        if pai == 0:
+            self.campeao = inscricao
+            return
+        luta_seguinte = self._posicoes[pai]
+        if luta_seguinte.status == StatusLuta.CONCLUIDA:
+            raise ValueError("A luta seguinte já foi concluída.")
+        if posicao % 2 == 0:
+            luta_seguinte.competidor1 = inscricao
+        else:
+            luta_seguinte.competidor2 = inscricao
+        if _observadores_de_mutacao:
+            _notificar_mutacao(LutaAlterada(luta_seguinte))
+
+    def get_luta(self, posicao: int) -> Optional[Luta]:
+        if 0 < posicao < len(self._posicoes):
+            return self._posicoes[posicao]
+        return None
+
+    def lutas_anteriores(self, luta: Luta) -> List[Luta]:
+        """Lutas cujos resultados definem os competidores de `luta`."""
+        if luta.posicao == 0:
+            return []
+        return [anterior for anterior in (self.get_luta(2 * luta.posicao), self.get_luta(2 * luta.posicao + 1))
+                if anterior is not None]
+
+    def lutas_seguintes(self, luta: Luta) -> List[Luta]:
+        """Lutas que recebem competidores vindos de `luta`."""
+        seguinte = self.get_luta(luta.posicao // 2)
+        return [seguinte] if seguinte is not None else []
+
+    def rotulo_da_rodada(self, luta: Luta) -> str:
+        return f"Rodada {luta.rodada}"
+
+    def registrar_vencedor(self, luta: Luta, vencedor: Inscricao) -> bool:
+        """Registra o resultado e avança o vencedor de forma atômica.
+
+        Repetir o mesmo vencedor não faz nada (devolve False); trocar o vencedor só é permitido
+        enquanto a luta seguinte não foi concluída.
+        """
+        with self.trava:
+            if not self.validar_registro(luta, vencedor):
+                return False
+            luta.registrar_resultado(vencedor)
+            self.avancar_vencedor(luta)
+            self._publicar_vitoria(luta, vencedor, luta.posicao // 2)
+            self._marcar_alteracao()
+            return True
+
+    def validar_registro(self, luta: Luta, vencedor: Inscricao) -> bool:
+        """Todas as checagens de registrar_vencedor, sem mudar nada: lança ValueError se o registro
+        seria recusado e devolve False se ele não mudaria nada (mesmo vencedor). Chamar sob a trava."""
+        luta.validar_vencedor(vencedor)
+        if luta.vencedor is vencedor:
+            return False
+        luta_seguinte = self.get_luta(luta.posicao // 2)
+        if luta_seguinte is not None and luta_seguinte.status == StatusLuta.CONCLUIDA:
+            raise ValueError("A luta seguinte já foi concluída.")
+        return True
+
+    def _publicar_vitoria(self, luta: Luta, vencedor: Inscricao, posicao_seguinte: Optional[int]):
+        if self.competicao is not None and self.competicao._assinantes:
+            self.competicao._publicar(AtualizacaoLuta(self.competicao, luta, vencedor, posicao_seguinte))
+
+    def _marcar_alteracao(self):
+        """Muda a versão da competição (chave do cache do painel). Chamado ainda sob a trava e só
+        depois de avançar e publicar: uma leitura com a versão nova já encontra a chave pronta."""
+        if self.competicao is not None:
+            self.competicao.versao += 1
 
     def avancar_vencedor(self, luta: Luta):
-        pass
+        """Leva o vencedor da luta para a posição pai na chave, em O(1)."""
+        if luta.vencedor is None:
+            raise ValueError("A luta ainda não possui vencedor.")
+        self._ocupar_vaga(luta.posicao, luta.vencedor)
 
 class Luta:
     """Representa uma única batalha entre dois competidores."""
-    def __init__(self, rodada: int, competidor1: Inscricao, competidor2: Inscricao):
-        self.id: int = id(self)
+    def __init__(self, rodada: int, competidor1: Optional[Inscricao], competidor2: Optional[Inscricao]):
+        self.id: int = novo_id(self)
         self.rodada: int = rodada
         self.status: StatusLuta = StatusLuta.AGENDADA
-        self.competidor1: Inscricao = competidor1
-        self.competidor2: Inscricao = competidor2
+        self.competidor1: Optional[Inscricao] = competidor1
+        self.competidor2: Optional[Inscricao] = competidor2
         self.vencedor: Optional[Inscricao] = None
+        self.chave: Optional[ChaveDeBatalha] = None
+        self.posicao: int = 0  # Posição na árvore da chave (0 quando avulsa)
+        self.arena: Optional[str] = None
+        self.inicio: Optional[datetime] = None
+        self.fim: Optional[datetime] = None
+        self.variacao_rating: float = 0.0  # Pontos de Elo que o vencedor ganhou nesta luta
+        self.sequencia_resultado: int = 0  # Ordem global dos resultados, para recalcular ratings em ordem
+
+    def validar_vencedor(self, vencedor: Inscricao):
+        if self.competidor1 is None or self.competidor2 is None:
+            raise ValueError("A luta ainda não possui dois competidores.")
+        if vencedor not in [self.competidor1, self.competidor2]:
+            raise ValueError("Vencedor inválido para esta luta.")
 
     def registrar_resultado(self, vencedor: Inscricao):
         """Define o vencedor da luta e atualiza o status."""
-        if vencedor not in [self.competidor1, self.competidor2]:
-            raise ValueError("Vencedor inválido para esta luta.")
+        self.validar_vencedor(vencedor)
+        if self.vencedor is not vencedor:
+            perdedor = self.competidor2 if vencedor is self.competidor1 else self.competidor1
+            with trava_dos_ratings:  # a trava da chave não basta: o robô pode estar em outras chaves
+                if self.vencedor is not None:
+                    # Correção de resultado: desfaz o Elo da versão anterior antes de aplicar a nova
+                    self.vencedor.robo.rating -= self.variacao_rating
+                    vencedor.robo.rating += self.variacao_rating
+                self.variacao_rating = variacao_elo(vencedor.robo.rating, perdedor.robo.rating)
+                vencedor.robo.rating += self.variacao_rating
+                perdedor.robo.rating -= self.variacao_rating
+                self.sequencia_resultado = proximo_id("ResultadoDeLuta")
         self.vencedor = vencedor
         self.status = StatusLuta.CONCLUIDA
+        if self.chave is None and isinstance(vencedor.competicao, Competicao):
+            vencedor.competicao.versao += 1  # numa chave, a versão muda em ChaveDeBatalha._marcar_alteracao
 
 class TomadaDeTempo:
-    def __init__(self, tempo_em_segundos: float):
-        self.id: int = id(self)
+    """Registro leve de uma volta; as voltas de uma inscrição ficam guardadas em colunas no RegistroDeVoltas."""
+    __slots__ = ("id", "tempo_em_segundos", "instante", "id_juiz")
+
+    def __init__(self, tempo_em_segundos: float, instante: Optional[float] = None, id_juiz: int = 0):
+        self.id: int = proximo_id("TomadaDeTempo")
         self.tempo_em_segundos: float = tempo_em_segundos
-        self.data_registro: datetime = datetime.now()
+        self.instante: float = time.time() if instante is None else instante  # timestamp do registro
+        self.id_juiz: int = id_juiz  # 0 quando não registrada por um Juiz
+
+    @property
+    def data_registro(self) -> datetime:
+        return datetime.fromtimestamp(self.instante)
+
+    @classmethod
+    def _da_coluna(cls, id_tomada: int, tempo_em_segundos: float, instante: float, id_juiz: int = 0) -> TomadaDeTempo:
+        tomada = cls.__new__(cls)
+        tomada.id = id_tomada
+        tomada.tempo_em_segundos = tempo_em_segundos
+        tomada.instante = instante
+        tomada.id_juiz = id_juiz
+        return tomada
+
+class RegistroDeVoltas:
+    """Voltas de uma inscrição em colunas contíguas (array), materializadas como TomadaDeTempo só na leitura."""
+    __slots__ = ("ids", "tempos", "instantes", "juizes")
+
+    def __init__(self):
+        self.ids: array = array('q')
+        self.tempos: array = array('d')
+        self.instantes: array = array('d')
+        self.juizes: array = array('q')
+
+    def append(self, tomada: TomadaDeTempo):
+        self.registrar(tomada.tempo_em_segundos, tomada.instante, tomada.id, tomada.id_juiz)
+
+    def registrar(self, tempo_em_segundos: float, instante: float, id_tomada: int = 0, id_juiz: int = 0):
+        self.ids.append(id_tomada)
+        self.tempos.append(tempo_em_segundos)
+        self.instantes.append(instante)
+        self.juizes.append(id_juiz)
+
+    def melhor_tempo(self) -> Optional[float]:
+        return min(self.tempos) if self.tempos else None
+
+    def indices_por_tempo(self) -> List[int]:
+        """Índices das voltas ordenados do menor para o maior tempo (argsort)."""
+        return sorted(range(len(self.tempos)), key=self.tempos.__getitem__)
+
+    def __len__(self) -> int:
+        return len(self.tempos)
+
+    def __getitem__(self, indice: int) -> TomadaDeTempo:
+        return TomadaDeTempo._da_coluna(self.ids[indice], self.tempos[indice], self.instantes[indice],
+                                        self.juizes[indice])
+
+    def __iter__(self) -> Iterator[TomadaDeTempo]:
+        for id_tomada, tempo, instante, id_juiz in zip(self.ids, self.tempos, self.instantes, self.juizes):
+            yield TomadaDeTempo._da_coluna(id_tomada, tempo, instante, id_juiz)
 
 class Resultado:
     """Representa uma linha na tabela de classificação final."""
@@ -285,28 +811,129 @@ class Resultado:
         self.melhor_tempo: float = melhor_tempo
 
 
-class PainelDeVisualizacao:
+class AtualizacaoClassificacao:
+    """Delta do placar: a inscrição foi da linha `linha_anterior` (None se não tinha tempo) para `linha_nova`."""
+    def __init__(self, competicao: Competicao, inscricao: Inscricao, linha_anterior: Optional[int],
+                 linha_nova: int, melhor_tempo: float):
+        self.competicao: Competicao = competicao
+        self.inscricao: Inscricao = inscricao
+        self.linha_anterior: Optional[int] = linha_anterior
+        self.linha_nova: int = linha_nova
+        self.melhor_tempo: float = melhor_tempo
 
-    def ver_chave_de_batalha(self, competicao: CompeticaoCombate):
-        print(f"\n--- PAINEL PÚBLICO: CHAVE DE BATALHA DE '{competicao.nome}' ---")
-        if competicao.chave_batalha:
-            # Lógica para imprimir a chave de forma visual
-            print("Chave de batalha gerada. Lutas a serem exibidas.")
-        else:
-            print("A chave de batalha ainda não foi gerada.")
+class AtualizacaoLuta:
+    """Delta da chave: a luta foi concluída e o vencedor seguiu para `posicao_seguinte` (0 = campeão).
+
+    Em formatos sem árvore (por pontos, repescagem) `posicao_seguinte` é None.
+    """
+    def __init__(self, competicao: Competicao, luta: Luta, vencedor: Inscricao, posicao_seguinte: Optional[int]):
+        self.competicao: Competicao = competicao
+        self.luta: Luta = luta
+        self.vencedor: Inscricao = vencedor
+        self.posicao_seguinte: Optional[int] = posicao_seguinte
+
+
+class InscricaoRegistrada:
+    """Mutação: a inscrição entrou numa competição."""
+    def __init__(self, inscricao: Inscricao):
+        self.inscricao: Inscricao = inscricao
 
-    def ver_classificacao_seguidor(self, competicao: CompeticaoSeguidorDeLinha):
-        print(f"\n--- PAINEL PÚBLICO: CLASSIFICAÇÃO DE '{competicao.nome}' ---")
-        classificacao = competicao.gerar_classificacao()
+
+class VoltaRegistrada:
+    """Mutação: a inscrição ganhou uma volta, guardada na posição `indice` do seu RegistroDeVoltas."""
+    def __init__(self, inscricao: Inscricao, indice: int):
+        self.inscricao: Inscricao = inscricao
+        self.indice: int = indice
+
+
+class LutaAlterada:
+    """Mutação: a luta foi criada ou recebeu um competidor."""
+    def __init__(self, luta: Luta):
+        self.luta: Luta = luta
+
+
+class PainelDeVisualizacao:
+    """Telas públicas; cada método escreve em `saida` (stdout quando não informado).
+
+    Com um `cache` (ver cache_painel.CacheLRU), textos e classificações já calculados são
+    reaproveitados enquanto a versão da competição/evento não mudar.
+    """
+    def __init__(self, cache=None):
+        self.cache = cache
+
+    def _em_cache(self, chave: tuple, calcular: Callable[[], object]) -> object:
+        if self.cache is None:
+            return calcular()
+        return self.cache.obter_ou_calcular(chave, calcular)
+
+    def obter_classificacao(self, competicao: CompeticaoSeguidorDeLinha, limite: Optional[int] = None) -> List[Resultado]:
+        return self._em_cache(("resultados", competicao.id, competicao.versao, limite),
+                              lambda: competicao.gerar_classificacao(limite))
+
+    def ver_chave_de_batalha(self, competicao: CompeticaoCombate, saida: Optional[TextIO] = None):
+        texto = self._em_cache(("chave", competicao.id, competicao.versao),
+                               lambda: self._texto_chave_de_batalha(competicao))
+        (saida or sys.stdout).write(texto)
+
+    def _texto_chave_de_batalha(self, competicao: CompeticaoCombate) -> str:
+        linhas = [f"\n--- PAINEL PÚBLICO: CHAVE DE BATALHA DE '{competicao.nome}' ---"]
+        with competicao.trava:  # a chave instalada usa a mesma trava: nunca lida no meio de um resultado
+            if competicao.chave_batalha:
+                chave = competicao.chave_batalha
+                for luta in chave.lutas:
+                    nome1 = luta.competidor1.robo.nome if luta.competidor1 else "A definir"
+                    nome2 = luta.competidor2.robo.nome if luta.competidor2 else "A definir"
+                    vencedor = f" -> {luta.vencedor.robo.nome}" if luta.vencedor else ""
+                    linhas.append(f"{chave.rotulo_da_rodada(luta)}: {nome1} x {nome2}{vencedor}")
+            else:
+                linhas.append("A chave de batalha ainda não foi gerada.")
+        return "\n".join(linhas) + "\n"
+
+    def ver_classificacao_seguidor(self, competicao: CompeticaoSeguidorDeLinha, limite: Optional[int] = None,
+                                   saida: Optional[TextIO] = None):
+        texto = self._em_cache(("classificacao", competicao.id, competicao.versao, limite),
+                               lambda: self._texto_classificacao(competicao, limite))
+        (saida or sys.stdout).write(texto)
+
+    def _texto_classificacao(self, competicao: CompeticaoSeguidorDeLinha, limite: Optional[int]) -> str:
+        linhas = [f"\n--- PAINEL PÚBLICO: CLASSIFICAÇÃO DE '{competicao.nome}' ---"]
+        classificacao = self.obter_classificacao(competicao, limite)
         if classificacao:
             for res in classificacao:
-                print(f"{res.posicao}º: {res.inscricao.robo.nome} ({res.melhor_tempo}s)")
+                linhas.append(f"{res.posicao}º: {res.inscricao.robo.nome} ({res.melhor_tempo}s)")
         else:
-            print("Classificação ainda não disponível.")
+            linhas.append("Classificação ainda não disponível.")
+        return "\n".join(linhas) + "\n"
             
-    def ver_resultados_evento(self, evento: Evento):
-        print(f"\n--- PAINEL PÚBLICO: RESULTADOS DO EVENTO '{evento.nome}' ---")
-        for comp in evento.competicoes:
-            print(f"Competição: {comp.nome} - Status: {comp.status.value}")
-        
+    def ver_resultados_evento(self, evento: Evento, saida: Optional[TextIO] = None):
+        texto = self._em_cache(("evento", evento.id, evento.versao), lambda: self._texto_resultados_evento(evento))
+        (saida or sys.stdout).write(texto)
 
+    def _texto_resultados_evento(self, evento: Evento) -> str:
+        linhas = [f"\n--- PAINEL PÚBLICO: RESULTADOS DO EVENTO '{evento.nome}' ---"]
+        for comp in evento.competicoes:
+            linhas.append(f"Competição: {comp.nome} - Status: {comp.status.value}")
+        return "\n".join(linhas) + "\n"
+
+    @staticmethod
+    def formatar_atualizacao(atualizacao: object) -> str:
+        if isinstance(atualizacao, AtualizacaoClassificacao):
+            origem = f"{atualizacao.linha_anterior}º" if atualizacao.linha_anterior else "novo"
+            return (f"{atualizacao.inscricao.robo.nome}: {origem} -> {atualizacao.linha_nova}º "
+                    f"(novo melhor {atualizacao.melhor_tempo}s)")
+        if isinstance(atualizacao, AtualizacaoLuta):
+            if atualizacao.posicao_seguinte is None:
+                return f"Luta ID {atualizacao.luta.id} concluída: vitória de {atualizacao.vencedor.robo.nome}"
+            destino = "campeão" if atualizacao.posicao_seguinte == 0 else f"posição {atualizacao.posicao_seguinte}"
+            return f"Luta ID {atualizacao.luta.id} concluída: {atualizacao.vencedor.robo.nome} avança para {destino}"
+        return str(atualizacao)
+
+    def acompanhar(self, competicao: Competicao, saida: Optional[TextIO] = None) -> Callable[[object], None]:
+        """Escreve em `saida` apenas as mudanças da competição; devolve o callback para cancelar a assinatura."""
+        saida = saida or sys.stdout
+
+        def escrever(atualizacao: object):
+            print(self.formatar_atualizacao(atualizacao), file=saida)
+
+        competicao.assinar(escrever)
+        return escrever
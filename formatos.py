@@ -0,0 +1,512 @@
+from __future__ import annotations
+from bisect import bisect_left
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from esqueleto import ChaveDeBatalha, Inscricao, Luta
+from identificadores import reatribuir_id
+from log_eventos import log
+
+ELIMINATORIA_SIMPLES = "Eliminatória Simples"
+ELIMINATORIA_DUPLA = "Eliminatória Dupla"
+TODOS_CONTRA_TODOS = "Todos contra Todos"
+SUICO = "Suíço"
+
+# Todos os formatos são determinísticos: as mesmas sementes e os mesmos resultados geram as
+# mesmas lutas. É isso que permite restaurar uma chave a partir do snapshot (restaurar_chave).
+
+
+class Pontuacao:
+    """Linha da tabela de um formato por pontos."""
+    def __init__(self, posicao: int, inscricao: Inscricao, pontos: int, lutas: int):
+        self.posicao: int = posicao
+        self.inscricao: Inscricao = inscricao
+        self.pontos: int = pontos
+        self.lutas: int = lutas
+
+
+class _ChaveDePontos(ChaveDeBatalha):
+    """Base dos formatos por pontos: cada vitória (ou folga) vale 1 ponto.
+
+    A tabela é mantida de forma incremental: cada resultado move a inscrição entre grupos de
+    pontuação em O(1), sem recalcular as lutas já disputadas.
+    """
+    FORMATO = ""
+
+    def __init__(self, robos_participantes):
+        super().__init__(self.FORMATO, robos_participantes)
+        self.participantes: List[Inscricao] = []
+        self._ordem: Dict[int, int] = {}                    # ID da inscrição -> semente
+        self._pontos: Dict[int, int] = {}
+        self._disputadas: Dict[int, int] = {}
+        self._grupos: Dict[int, Dict[int, Inscricao]] = {}  # pontos -> inscrições com essa pontuação
+        self._pendentes: int = 0                            # lutas da fase atual ainda sem vencedor
+
+    def _preparar(self, inscricoes: Iterable[Inscricao]):
+        self.participantes = list(inscricoes)
+        for ordem, inscricao in enumerate(self.participantes):
+            self._ordem[inscricao.id] = ordem
+            self._pontos[inscricao.id] = 0
+            self._disputadas[inscricao.id] = 0
+        if self.participantes:
+            self._grupos = {0: {inscricao.id: inscricao for inscricao in self.participantes}}
+
+    def _somar(self, inscricao: Inscricao, pontos: int):
+        atual = self._pontos[inscricao.id]
+        grupo = self._grupos[atual]
+        del grupo[inscricao.id]
+        if not grupo:
+            del self._grupos[atual]
+        self._pontos[inscricao.id] = atual + pontos
+        self._grupos.setdefault(atual + pontos, {})[inscricao.id] = inscricao
+
+    def pontos(self, inscricao: Inscricao) -> int:
+        return self._pontos[inscricao.id]
+
+    def _ordenados(self) -> List[Inscricao]:
+        """Inscrições por pontos (decrescente) e, no empate, pela semente."""
+        ordenados = []
+        for pontos in sorted(self._grupos, reverse=True):
+            ordenados.extend(sorted(self._grupos[pontos].values(), key=lambda insc: self._ordem[insc.id]))
+        return ordenados
+
+    def classificacao(self) -> List[Pontuacao]:
+        """Tabela atual; empatados em pontos dividem a posição."""
+        linhas: List[Pontuacao] = []
+        posicao, pontos_anteriores = 0, None
+        for linha, inscricao in enumerate(self._ordenados()):
+            pontos = self._pontos[inscricao.id]
+            if pontos != pontos_anteriores:
+                posicao, pontos_anteriores = linha + 1, pontos
+            linhas.append(Pontuacao(posicao, inscricao, pontos, self._disputadas[inscricao.id]))
+        return linhas
+
+    def _lider(self) -> Optional[Inscricao]:
+        if not self._grupos:
+            return None
+        return min(self._grupos[max(self._grupos)].values(), key=lambda insc: self._ordem[insc.id])
+
+    def _validar_correcao(self, luta: Luta):
+        pass
+
+    def validar_registro(self, luta: Luta, vencedor: Inscricao) -> bool:
+        luta.validar_vencedor(vencedor)
+        if luta.vencedor is vencedor:
+            return False
+        if luta.vencedor is not None:
+            self._validar_correcao(luta)
+        return True
+
+    def _fase_concluida(self):
+        self.campeao = self._lider()
+
+    def registrar_vencedor(self, luta: Luta, vencedor: Inscricao) -> bool:
+        """Registra o resultado e atualiza a tabela; trocar o vencedor desfaz o ponto anterior."""
+        with self.trava:
+            if not self.validar_registro(luta, vencedor):
+                return False
+            if luta.vencedor is not None:
+                self._somar(luta.vencedor, -1)
+            else:
+                self._pendentes -= 1
+                self._disputadas[luta.competidor1.id] += 1
+                self._disputadas[luta.competidor2.id] += 1
+            luta.registrar_resultado(vencedor)
+            self._somar(vencedor, 1)
+            self._publicar_vitoria(luta, vencedor, None)
+            if self._pendentes == 0:
+                self._fase_concluida()
+            self._marcar_alteracao()
+            return True
+
+
+class ChaveTodosContraTodos(_ChaveDePontos):
+    """Todos enfrentam todos uma vez; as rodadas saem do método do círculo."""
+    FORMATO = TODOS_CONTRA_TODOS
+
+    def gerar_lutas(self, inscricoes: List[Inscricao]):
+        self._preparar(inscricoes)
+        # Com número ímpar, None ocupa a vaga de folga da rodada
+        rodizio: List[Optional[Inscricao]] = list(self.participantes) + ([None] if len(self.participantes) % 2 else [])
+        tamanho = len(rodizio)
+        for rodada in range(1, tamanho):
+            for indice in range(tamanho // 2):
+                competidor1, competidor2 = rodizio[indice], rodizio[tamanho - 1 - indice]
+                if competidor1 is not None and competidor2 is not None:
+                    self.lutas.append(self._criar_luta(rodada, 0, competidor1, competidor2))
+            rodizio.insert(1, rodizio.pop())  # O primeiro fica fixo; os demais giram
+        self._pendentes = len(self.lutas)
+        if self._pendentes == 0:
+            self._fase_concluida()
+
+
+class ChaveSuica(_ChaveDePontos):
+    """Sistema suíço: a cada rodada, quem tem a mesma pontuação se enfrenta, sem repetir adversários.
+
+    O emparelhamento percorre os grupos de pontuação do maior para o menor; em cada grupo a
+    metade de cima enfrenta a metade de baixo (1º x n/2+1, ...), trocando pelo próximo da metade
+    de baixo quando o par já se enfrentou. Quem sobra desce para o grupo seguinte. O custo é
+    O(n log n) pela ordenação, mais as trocas. Se essa passada gulosa terminar numa revanche,
+    uma busca com retrocesso (dentro do grupo e descendo flutuantes para os grupos seguintes)
+    procura um emparelhamento sem revanche; a revanche só fica se a busca não achar nenhum em
+    LIMITE_DA_BUSCA tentativas.
+
+    Dentro de um grupo vale a ordem das sementes, que chegam ordenadas por rating: como no
+    sistema holandês, os mais fortes do grupo enfrentam os mais fracos. Usar o rating da
+    geração da chave, e não o atual, mantém o emparelhamento reproduzível na restauração.
+    """
+    FORMATO = SUICO
+    LIMITE_DA_BUSCA = 10_000
+
+    def __init__(self, robos_participantes, total_rodadas: Optional[int] = None):
+        super().__init__(robos_participantes)
+        # Padrão: rodadas suficientes para separar um único invicto (teto de log2 n)
+        self.total_rodadas: int = total_rodadas or max(1, (len(robos_participantes) - 1).bit_length())
+        self.rodada_atual: int = 0
+        self._adversarios: Dict[int, Set[int]] = {}
+        self._folgas: Set[int] = set()
+
+    def gerar_lutas(self, inscricoes: List[Inscricao]):
+        self._preparar(inscricoes)
+        self._adversarios = {inscricao.id: set() for inscricao in self.participantes}
+        if self.participantes:
+            self.gerar_proxima_rodada()
+
+    def gerar_proxima_rodada(self):
+        with self.trava:
+            if self._pendentes:
+                raise ValueError("A rodada atual ainda tem lutas sem resultado.")
+            if self.rodada_atual >= self.total_rodadas:
+                raise ValueError("Todas as rodadas já foram geradas.")
+            self.rodada_atual += 1
+            ordenados = self._ordenados()
+            if len(ordenados) % 2:
+                # Folga para o último colocado que ainda não folgou
+                folga = next((insc for insc in reversed(ordenados) if insc.id not in self._folgas), ordenados[-1])
+                ordenados.remove(folga)
+                self._folgas.add(folga.id)
+                self._somar(folga, 1)
+            pares = self._emparelhar(ordenados)
+            for competidor1, competidor2 in pares:
+                self.lutas.append(self._criar_luta(self.rodada_atual, 0, competidor1, competidor2))
+                self._adversarios[competidor1.id].add(competidor2.id)
+                self._adversarios[competidor2.id].add(competidor1.id)
+            self._pendentes = len(pares)
+            log.info("Rodada %s do suíço gerada com %s lutas.", self.rodada_atual, len(pares))
+            if not pares:
+                self._fase_concluida()
+            self._marcar_alteracao()
+
+    def _emparelhar(self, ordenados: List[Inscricao]) -> List[Tuple[Inscricao, Inscricao]]:
+        pares, revanche = self._emparelhar_guloso(ordenados)
+        if revanche:
+            sem_revanche = self._emparelhar_com_retrocesso(ordenados)
+            if sem_revanche is not None:
+                return sem_revanche
+            log.info("Rodada %s do suíço: nenhum emparelhamento sem revanche encontrado.", self.rodada_atual)
+        return pares
+
+    def _emparelhar_guloso(self, ordenados: List[Inscricao]) -> Tuple[List[Tuple[Inscricao, Inscricao]], bool]:
+        pares: List[Tuple[Inscricao, Inscricao]] = []
+        revanche = False
+        flutuantes: List[Inscricao] = []
+        for _, grupo in groupby(ordenados, key=lambda insc: self._pontos[insc.id]):
+            grupo = flutuantes + list(grupo)
+            flutuantes = []
+            if len(grupo) % 2:
+                flutuantes.append(grupo.pop())
+            metade = len(grupo) // 2
+            inferior = grupo[metade:]
+            for jogador in grupo[:metade]:
+                indice = self._adversario_inedito(jogador, inferior)
+                if indice is None:
+                    flutuantes.append(jogador)
+                else:
+                    pares.append((jogador, inferior.pop(indice)))
+            flutuantes.extend(inferior)
+        # O que sobrou no último grupo: revanche só quando não há alternativa
+        while flutuantes:
+            jogador = flutuantes.pop(0)
+            indice = self._adversario_inedito(jogador, flutuantes)
+            revanche = revanche or indice is None
+            pares.append((jogador, flutuantes.pop(indice or 0)))
+        return pares, revanche
+
+    def _candidatos(self, ordenados: List[Inscricao], livres: List[bool], indice: int) -> List[int]:
+        """Adversários inéditos ainda livres para ordenados[indice], na ordem de preferência: no
+        mesmo grupo, do espelho (metade de baixo) em diante e depois para cima; então os grupos
+        seguintes, do maior para o menor (o jogador desce como flutuante)."""
+        jogador = ordenados[indice]
+        pontos = self._pontos[jogador.id]
+        ja_enfrentados = self._adversarios[jogador.id]
+        mesmo_grupo: List[int] = []
+        abaixo: List[int] = []
+        for outro in range(indice + 1, len(ordenados)):
+            if livres[outro]:
+                (mesmo_grupo if self._pontos[ordenados[outro].id] == pontos else abaixo).append(outro)
+        # O espelho é contado sobre o grupo inteiro, inclusive quem já enfrentou o jogador
+        espelho = mesmo_grupo[(len(mesmo_grupo) + 1) // 2 - 1] if mesmo_grupo else indice
+        grupo = [outro for outro in mesmo_grupo if ordenados[outro].id not in ja_enfrentados]
+        corte = bisect_left(grupo, espelho)
+        return grupo[corte:] + grupo[:corte][::-1] + [outro for outro in abaixo
+                                                      if ordenados[outro].id not in ja_enfrentados]
+
+    def _emparelhar_com_retrocesso(self, ordenados: List[Inscricao]) -> Optional[List[Tuple[Inscricao, Inscricao]]]:
+        """Busca em profundidade por um emparelhamento sem revanche; None se não achar no limite."""
+        livres = [True] * len(ordenados)
+        # Cada nível: (jogador, candidatos ainda não tentados, adversário escolhido)
+        pilha: List[Tuple[int, List[int], int]] = []
+        proximo = 0
+        tentativas = 0
+        while True:
+            while proximo < len(ordenados) and not livres[proximo]:
+                proximo += 1
+            if proximo == len(ordenados):
+                return [(ordenados[jogador], ordenados[adversario]) for jogador, _, adversario in pilha]
+            candidatos = self._candidatos(ordenados, livres, proximo)
+            candidatos.reverse()  # consumidos com pop(), do preferido para o último
+            pilha.append((proximo, candidatos, -1))
+            while pilha:
+                jogador, candidatos, adversario = pilha[-1]
+                if adversario >= 0:
+                    livres[jogador] = livres[adversario] = True
+                if not candidatos:
+                    pilha.pop()
+                    continue
+                tentativas += 1
+                if tentativas > self.LIMITE_DA_BUSCA:
+                    return None
+                adversario = candidatos.pop()
+                livres[jogador] = livres[adversario] = False
+                pilha[-1] = (jogador, candidatos, adversario)
+                proximo = jogador + 1
+                break
+            else:
+                return None
+
+    def _adversario_inedito(self, jogador: Inscricao, candidatos: List[Inscricao]) -> Optional[int]:
+        ja_enfrentados = self._adversarios[jogador.id]
+        for indice, candidato in enumerate(candidatos):
+            if candidato.id not in ja_enfrentados:
+                return indice
+        return None
+
+    def _validar_correcao(self, luta: Luta):
+        if luta.rodada != self.rodada_atual:
+            raise ValueError("A rodada seguinte já foi gerada.")
+
+    def _fase_concluida(self):
+        if self.rodada_atual < self.total_rodadas:
+            self.gerar_proxima_rodada()
+        else:
+            super()._fase_concluida()
+
+
+class ChaveDuplaEliminacao(ChaveDeBatalha):
+    """Eliminatória dupla: a chave principal é a árvore da eliminatória simples; quem perde nela
+    vai para a repescagem e só é eliminado na segunda derrota.
+
+    A rodada r da chave principal alimenta a rodada 1 (r = 1) ou 2(r-1) da repescagem. Cada
+    rodada da repescagem abre quando todos os esperados chegaram e emparelha por semente (melhor
+    x pior; com número ímpar, a melhor semente folga). Os campeões das duas chaves fazem a
+    grande final; se o vindo da repescagem vencer, há uma final de desempate.
+
+    Posições: chave principal como na simples; repescagem k em `tamanho * k + j`; finais em 0.
+    """
+    FORMATO = ELIMINATORIA_DUPLA
+
+    def __init__(self, robos_participantes):
+        super().__init__(self.FORMATO, robos_participantes)
+        self._ordem: Dict[int, int] = {}
+        self._tamanho: int = 0
+        self._total_rodadas: int = 0
+        self._entradas: List[int] = [0]                 # competidores esperados por rodada da repescagem
+        self._chegadas: List[List[Inscricao]] = [[]]
+        self._vencedor_principal: Optional[Inscricao] = None
+        self._vencedor_repescagem: Optional[Inscricao] = None
+        self.final: Optional[Luta] = None
+        self.final_desempate: Optional[Luta] = None
+        self._origem: Dict[int, Luta] = {}              # ID da inscrição -> última luta disputada
+        # Indexados pela própria luta: o ID pode ser reatribuído na restauração
+        self._anteriores: Dict[Luta, List[Luta]] = {}
+        self._seguintes: Dict[Luta, List[Luta]] = {}
+
+    def gerar_lutas(self, inscricoes: List[Inscricao]):
+        self._ordem = {inscricao.id: ordem for ordem, inscricao in enumerate(inscricoes)}
+        super().gerar_lutas(inscricoes)
+        self._tamanho = len(self._posicoes)
+        if self._tamanho < 2:
+            return
+        self._total_rodadas = self._tamanho.bit_length() - 1
+        por_rodada = [0] * (self._total_rodadas + 1)
+        for luta in self.lutas:
+            por_rodada[luta.rodada] += 1
+        entradas = [0, por_rodada[1]]
+        for rodada in range(2, self._total_rodadas + 1):
+            entradas.append((entradas[-1] + 1) // 2 + por_rodada[rodada])
+            if rodada < self._total_rodadas:
+                entradas.append((entradas[-1] + 1) // 2)
+        while entradas[-1] > 2:
+            entradas.append((entradas[-1] + 1) // 2)
+        self._entradas = entradas
+        self._chegadas = [[] for _ in entradas]
+
+    def _ocupar_vaga(self, posicao: int, inscricao: Inscricao):
+        if posicao // 2 == 0:
+            self._vencedor_principal = inscricao
+            self._abrir_final()
+        else:
+            super()._ocupar_vaga(posicao, inscricao)
+
+    def _na_chave_principal(self, luta: Luta) -> bool:
+        return 0 < luta.posicao < self._tamanho
+
+    # --- Repescagem ---
+
+    def _chegar(self, rodada: int, inscricao: Inscricao):
+        chegadas = self._chegadas[rodada]
+        chegadas.append(inscricao)
+        if len(chegadas) < self._entradas[rodada]:
+            return
+        chegadas.sort(key=lambda insc: self._ordem[insc.id])
+        if len(chegadas) % 2:
+            self._avancar_na_repescagem(rodada, chegadas.pop(0))
+        for indice in range(len(chegadas) // 2):
+            self._criar_luta_derivada(rodada, self._tamanho * rodada + indice, chegadas[indice], chegadas[-1 - indice])
+
+    def _avancar_na_repescagem(self, rodada: int, inscricao: Inscricao):
+        if rodada == len(self._entradas) - 1:
+            self._vencedor_repescagem = inscricao
+            self._abrir_final()
+        else:
+            self._chegar(rodada + 1, inscricao)
+
+    def _criar_luta_derivada(self, rodada: int, posicao: int, competidor1: Inscricao, competidor2: Inscricao) -> Luta:
+        luta = self._criar_luta(rodada, posicao, competidor1, competidor2)
+        anteriores = [self._origem[insc.id] for insc in (competidor1, competidor2) if insc.id in self._origem]
+        self._anteriores[luta] = anteriores
+        for anterior in anteriores:
+            self._seguintes.setdefault(anterior, []).append(luta)
+        self.lutas.append(luta)
+        return luta
+
+    def _abrir_final(self):
+        if self.final is None and self._vencedor_principal is not None and self._vencedor_repescagem is not None:
+            self.final = self._criar_luta_derivada(self._total_rodadas + 1, 0, self._vencedor_principal,
+                                                   self._vencedor_repescagem)
+
+    # --- Resultados ---
+
+    def validar_registro(self, luta: Luta, vencedor: Inscricao) -> bool:
+        luta.validar_vencedor(vencedor)
+        if luta.vencedor is vencedor:
+            return False
+        if luta.vencedor is not None:
+            raise ValueError("O resultado desta luta já foi registrado.")
+        return True
+
+    def registrar_vencedor(self, luta: Luta, vencedor: Inscricao) -> bool:
+        """Registra o resultado e encaminha vencedor e perdedor; o resultado não pode ser trocado depois."""
+        with self.trava:
+            if not self.validar_registro(luta, vencedor):
+                return False
+            luta.registrar_resultado(vencedor)
+            perdedor = luta.competidor2 if vencedor is luta.competidor1 else luta.competidor1
+            self._origem[vencedor.id] = self._origem[perdedor.id] = luta
+            posicao_seguinte: Optional[int] = None
+            if luta is self.final:
+                if vencedor is self._vencedor_principal:
+                    self.campeao, posicao_seguinte = vencedor, 0
+                else:
+                    # Os dois têm uma derrota agora: final de desempate
+                    self.final_desempate = self._criar_luta_derivada(self._total_rodadas + 2, 0, vencedor, perdedor)
+            elif luta is self.final_desempate:
+                self.campeao, posicao_seguinte = vencedor, 0
+            elif self._na_chave_principal(luta):
+                posicao_seguinte = luta.posicao // 2 or None
+                self._ocupar_vaga(luta.posicao, vencedor)
+                self._chegar(1 if luta.rodada == 1 else 2 * (luta.rodada - 1), perdedor)
+            else:
+                self._avancar_na_repescagem(luta.posicao // self._tamanho, vencedor)
+            self._publicar_vitoria(luta, vencedor, posicao_seguinte)
+            self._marcar_alteracao()
+            return True
+
+    def lutas_anteriores(self, luta: Luta) -> List[Luta]:
+        if self._na_chave_principal(luta):
+            return super().lutas_anteriores(luta)
+        return list(self._anteriores.get(luta, []))
+
+    def lutas_seguintes(self, luta: Luta) -> List[Luta]:
+        seguintes = super().lutas_seguintes(luta) if self._na_chave_principal(luta) else []
+        return seguintes + self._seguintes.get(luta, [])
+
+    def rotulo_da_rodada(self, luta: Luta) -> str:
+        if luta is self.final:
+            return "Grande final"
+        if luta is self.final_desempate:
+            return "Final de desempate"
+        if not self._na_chave_principal(luta):
+            return f"Repescagem {luta.rodada}"
+        return super().rotulo_da_rodada(luta)
+
+
+FORMATOS = {
+    ELIMINATORIA_DUPLA: ChaveDuplaEliminacao,
+    TODOS_CONTRA_TODOS: ChaveTodosContraTodos,
+    SUICO: ChaveSuica,
+}
+
+
+def criar_chave(formato: str, inscricoes: List[Inscricao], total_rodadas: Optional[int] = None) -> ChaveDeBatalha:
+    """Cria e monta a chave do formato pedido; `inscricoes` já vem ordenada por semente."""
+    robos = [inscricao.robo for inscricao in inscricoes]
+    if formato == ELIMINATORIA_SIMPLES:
+        chave = ChaveDeBatalha(formato, robos)
+    elif formato == SUICO:
+        chave = ChaveSuica(robos, total_rodadas)
+    elif formato in FORMATOS:
+        chave = FORMATOS[formato](robos)
+    else:
+        raise ValueError("Formato de chave inválido.")
+    chave.gerar_lutas(inscricoes)
+    return chave
+
+
+def restaurar_chave(formato: str, sementes: List[Inscricao], registros: List[tuple],
+                    inscricoes: Dict[int, Inscricao], total_rodadas: Optional[int] = None) -> ChaveDeBatalha:
+    """Reconstrói uma chave gravada reaplicando os resultados sobre uma chave nova.
+
+    `registros` são tuplas (id, posicao, rodada, status, id1, id2, id_vencedor, variacao_rating,
+    sequencia_resultado), com 0 para "nenhum". Cada luta gerada que coincide com um registro
+    (posição, rodada e competidores) recebe de volta o ID, o status e o Elo gravados; os vencedores
+    gravados são reaplicados até que nenhuma luta nova apareça. Os ratings gravados já incluem
+    essas lutas, então são repostos ao final.
+    """
+    ratings = [(inscricao.robo, inscricao.robo.rating) for inscricao in sementes]
+    chave = criar_chave(formato, sementes, total_rodadas)
+    salvos = {(posicao, rodada, frozenset(i for i in (id1, id2) if i)): (id_luta, status, id_vencedor, variacao, sequencia)
+              for id_luta, posicao, rodada, status, id1, id2, id_vencedor, variacao, sequencia in registros}
+    restauradas: Set[int] = set()
+    houve_mudanca = True
+    while houve_mudanca:
+        houve_mudanca = False
+        for luta in list(chave.lutas):
+            if id(luta) in restauradas:
+                continue
+            competidores = frozenset(insc.id for insc in (luta.competidor1, luta.competidor2) if insc is not None)
+            salvo = salvos.get((luta.posicao, luta.rodada, competidores))
+            if salvo is None:
+                continue
+            id_luta, status, id_vencedor, variacao, sequencia = salvo
+            restauradas.add(id(luta))
+            reatribuir_id(luta, id_luta)
+            if id_vencedor:
+                chave.registrar_vencedor(luta, inscricoes[id_vencedor])
+                houve_mudanca = True
+            else:
+                luta.status = status
+            luta.variacao_rating, luta.sequencia_resultado = variacao, sequencia
+    for robo, rating in ratings:
+        robo.rating = rating
+    return chave
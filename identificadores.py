@@ -0,0 +1,166 @@
+from __future__ import annotations
+import itertools
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, Optional, Tuple
+
+
+class AlocadorDeIds(ABC):
+    """Interface dos alocadores de IDs usados pelas entidades do sistema."""
+    @abstractmethod
+    def proximo(self, tipo: str) -> int:
+        pass
+
+    def reservar(self, tipo: str, id_existente: int):
+        """Garante que um ID já usado (ex.: restaurado de um snapshot) não seja emitido de novo."""
+        pass
+
+
+class AlocadorSequencial(AlocadorDeIds):
+    """Um contador monotônico por tipo de entidade (1, 2, 3...)."""
+    def __init__(self):
+        self._contadores: Dict[str, Iterator[int]] = {}
+
+    def proximo(self, tipo: str) -> int:
+        contador = self._contadores.get(tipo)
+        if contador is None:
+            # setdefault é atômico no CPython: duas threads nunca ficam com contadores diferentes
+            contador = self._contadores.setdefault(tipo, itertools.count(1))
+        return next(contador)
+
+    def reservar(self, tipo: str, id_existente: int):
+        self._contadores[tipo] = itertools.count(max(self.proximo(tipo), id_existente + 1))
+
+
+class AlocadorSnowflake(AlocadorDeIds):
+    """IDs de 64 bits no estilo Snowflake: 41 bits de milissegundos, 10 de nó e 12 de sequência.
+
+    O milissegundo vem do relógio de parede; quando os 4096 IDs de um milissegundo se esgotam, o
+    alocador espera o relógio virar em vez de adiantá-lo, então um alocador novo (após um
+    reinício), que parte da hora atual, nunca repete IDs. `reservar` só sobe a marca do maior
+    (milissegundo, sequência) já usado, sem esperar: se ela ficar à frente do relógio, os IDs
+    seguintes continuam a partir dela.
+    """
+    EPOCA_MS = 1704067200000  # 2024-01-01 UTC
+    BITS_NO = 10
+    BITS_SEQUENCIA = 12
+    MAXIMO_SEQUENCIA = (1 << BITS_SEQUENCIA) - 1
+
+    def __init__(self, no: int = 0):
+        if not 0 <= no < (1 << self.BITS_NO):
+            raise ValueError("Número de nó inválido para o alocador.")
+        self.no: int = no
+        self._trava = threading.Lock()
+        self._milissegundos: int = -1
+        self._sequencia: int = self.MAXIMO_SEQUENCIA
+
+    @classmethod
+    def _agora_ms(cls) -> int:
+        return int(time.time() * 1000) - cls.EPOCA_MS
+
+    def proximo(self, tipo: str) -> int:
+        with self._trava:
+            agora = self._agora_ms()
+            if agora > self._milissegundos:
+                self._milissegundos, self._sequencia = agora, 0
+            elif self._sequencia < self.MAXIMO_SEQUENCIA:
+                self._sequencia += 1
+            else:
+                # Milissegundo esgotado: espera o relógio passar dele, a não ser que ele já esteja
+                # à frente do relógio por causa de um ID reservado
+                while agora == self._milissegundos:
+                    time.sleep(0.0001)
+                    agora = self._agora_ms()
+                self._milissegundos, self._sequencia = max(agora, self._milissegundos + 1), 0
+            return ((self._milissegundos << (self.BITS_NO + self.BITS_SEQUENCIA)) | (self.no << self.BITS_SEQUENCIA)
+                    | self._sequencia)
+
+    def reservar(self, tipo: str, id_existente: int):
+        marca = (id_existente >> (self.BITS_NO + self.BITS_SEQUENCIA), id_existente & self.MAXIMO_SEQUENCIA)
+        with self._trava:
+            if marca > (self._milissegundos, self._sequencia):
+                self._milissegundos, self._sequencia = marca
+
+
+class RegistroDeEntidades:
+    """Mapeia (tipo, id) para o objeto via referências fracas, sem manter objetos mortos vivos.
+
+    Entradas de objetos já coletados são descartadas em lote quando o dicionário dobra de
+    tamanho, o que deixa o registro em O(1) amortizado sem callbacks por objeto.
+    """
+    def __init__(self):
+        self._objetos: Dict[Tuple[str, int], weakref.ref] = {}
+        self._limite_limpeza: int = 1024
+
+    def registrar(self, tipo: str, id_entidade: int, objeto: object):
+        self._objetos[(tipo, id_entidade)] = weakref.ref(objeto)
+        if len(self._objetos) > self._limite_limpeza:
+            self._limpar()
+
+    def _limpar(self):
+        self._objetos = {chave: ref for chave, ref in self._objetos.items() if ref() is not None}
+        self._limite_limpeza = max(1024, 2 * len(self._objetos))
+
+    def remover(self, tipo: str, id_entidade: int):
+        self._objetos.pop((tipo, id_entidade), None)
+
+    def obter(self, tipo: str, id_entidade: int) -> Optional[object]:
+        ref = self._objetos.get((tipo, id_entidade))
+        return ref() if ref is not None else None
+
+    def chaves(self) -> Iterator[Tuple[str, int]]:
+        return (chave for chave, ref in list(self._objetos.items()) if ref() is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for ref in list(self._objetos.values()) if ref() is not None)
+
+
+_alocador: AlocadorDeIds = AlocadorSequencial()
+registro = RegistroDeEntidades()
+
+
+def configurar_alocador(alocador: AlocadorDeIds):
+    """Troca o alocador global. Deve ser chamado antes de criar as entidades."""
+    global _alocador
+    _alocador = alocador
+
+
+def get_alocador() -> AlocadorDeIds:
+    return _alocador
+
+
+def proximo_id(tipo: str) -> int:
+    """Gera um ID sem registrar o objeto (para registros leves, como as voltas)."""
+    return _alocador.proximo(tipo)
+
+
+def espaco_de_ids(classe: type) -> str:
+    """Espaço de IDs da classe: o da entidade base quando ela declara ESPACO_DE_IDS (ex.: as
+    competições de combate e de seguidor de linha dividem o espaço "Competicao"), senão o nome da
+    própria classe."""
+    return getattr(classe, "ESPACO_DE_IDS", classe.__name__)
+
+
+def novo_id(objeto: object) -> int:
+    """Gera o ID de uma entidade recém-criada e a registra para busca por ID."""
+    tipo = espaco_de_ids(type(objeto))
+    id_entidade = _alocador.proximo(tipo)
+    registro.registrar(tipo, id_entidade, objeto)
+    return id_entidade
+
+
+def reatribuir_id(objeto: object, id_entidade: int):
+    """Restaura o ID de uma entidade (usado ao carregar dados salvos)."""
+    tipo = espaco_de_ids(type(objeto))
+    registro.remover(tipo, getattr(objeto, "id", None))
+    objeto.id = id_entidade
+    _alocador.reservar(tipo, id_entidade)
+    registro.registrar(tipo, id_entidade, objeto)
+
+
+def obter_por_id(tipo: type, id_entidade: int) -> Optional[object]:
+    """Busca em O(1) uma entidade viva pelo seu tipo e ID; None se o ID é de outra subclasse."""
+    objeto = registro.obter(espaco_de_ids(tipo), id_entidade)
+    return objeto if isinstance(objeto, tipo) else None
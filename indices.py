@@ -0,0 +1,174 @@
+from __future__ import annotations
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from esqueleto import (
+    Equipe, Evento, Inscricao, InscricaoRegistrada, Juiz, Luta, LutaAlterada, Robo, TomadaDeTempo, VoltaRegistrada,
+    cancelar_observacao, observar_mutacoes,
+)
+
+TAMANHO_BLOCO = 1024  # Itens copiados por vez (sob a trava) ao percorrer um índice ordenado
+
+
+class _IndiceOrdenado:
+    """Pares (chave, valor) ordenados pela chave, em listas paralelas.
+
+    Inscrições e voltas chegam quase sempre em ordem de data, então a inserção costuma ser um
+    append; fora de ordem, é uma bisseção mais um insert.
+    """
+    __slots__ = ("_chaves", "_valores")
+
+    def __init__(self):
+        self._chaves: List[float] = []
+        self._valores: List[object] = []
+
+    def inserir(self, chave: float, valor: object):
+        if not self._chaves or chave >= self._chaves[-1]:
+            self._chaves.append(chave)
+            self._valores.append(valor)
+        else:
+            indice = bisect_right(self._chaves, chave)
+            self._chaves.insert(indice, chave)
+            self._valores.insert(indice, valor)
+
+    def percorrer(self, inicio: float, fim: float, trava: threading.Lock) -> Iterator[object]:
+        """Valores com chave em [inicio, fim), copiados em blocos para não segurar a trava durante o consumo."""
+        with trava:
+            posicao = bisect_left(self._chaves, inicio)
+        while True:
+            with trava:
+                limite = min(bisect_left(self._chaves, fim, posicao), posicao + TAMANHO_BLOCO)
+                bloco = self._valores[posicao:limite]
+            if not bloco:
+                return
+            posicao += len(bloco)
+            yield from bloco
+
+    def __len__(self) -> int:
+        return len(self._chaves)
+
+
+def _limites_do_dia(dia: date) -> Tuple[datetime, datetime]:
+    inicio = datetime.combine(dia, time())
+    return inicio, inicio + timedelta(days=1)
+
+
+class IndiceDoTorneio:
+    """Índices secundários sobre inscrições, voltas e lutas de todos os eventos.
+
+    Depois de `ativar()`, cada inscrição, volta e luta alterada entra nos índices no momento em
+    que é registrada (ver esqueleto.observar_mutacoes); `carregar` indexa o que já existia.
+    As consultas são geradores: nada do grafo é copiado além das referências já indexadas, e
+    as voltas só viram TomadaDeTempo quando são consumidas.
+    """
+    def __init__(self):
+        self._trava = threading.Lock()
+        # Dicionários usados como conjuntos ordenados; a chave é o próprio objeto porque
+        # IDs de lutas podem ser reatribuídos na restauração de um snapshot.
+        self._inscricoes_por_robo: Dict[int, Dict[Inscricao, None]] = {}
+        self._inscricoes_por_equipe: Dict[int, Dict[Inscricao, None]] = {}
+        self._lutas_por_robo: Dict[int, Dict[Luta, None]] = {}
+        self._robos_da_luta: Dict[Luta, Tuple[int, ...]] = {}  # o que já está indexado de cada luta
+        self._inscricoes_por_data = _IndiceOrdenado()
+        self._voltas_por_data = _IndiceOrdenado()
+        self._voltas_por_juiz: Dict[int, _IndiceOrdenado] = {}
+        self._ativo: bool = False
+
+    # --- Manutenção ---
+
+    def ativar(self):
+        if not self._ativo:
+            observar_mutacoes(self._receber)
+            self._ativo = True
+
+    def desativar(self):
+        if self._ativo:
+            cancelar_observacao(self._receber)
+            self._ativo = False
+
+    def carregar(self, eventos: Iterable[Evento]):
+        """Indexa inscrições, voltas e lutas que já existiam nos eventos."""
+        for evento in eventos:
+            for competicao in evento.competicoes:
+                for inscricao in list(competicao.inscricoes):
+                    self._indexar_inscricao(inscricao)
+                    for indice in range(len(inscricao.tomadas_de_tempo)):
+                        self._indexar_volta(inscricao, indice)
+                chave = getattr(competicao, "chave_batalha", None)
+                if chave is not None:
+                    for luta in list(chave.lutas):
+                        self._indexar_luta(luta)
+
+    def _receber(self, mutacao: object):
+        if isinstance(mutacao, VoltaRegistrada):
+            self._indexar_volta(mutacao.inscricao, mutacao.indice)
+        elif isinstance(mutacao, LutaAlterada):
+            self._indexar_luta(mutacao.luta)
+        elif isinstance(mutacao, InscricaoRegistrada):
+            self._indexar_inscricao(mutacao.inscricao)
+
+    def _indexar_inscricao(self, inscricao: Inscricao):
+        with self._trava:
+            self._inscricoes_por_robo.setdefault(inscricao.robo.id, {})[inscricao] = None
+            equipe = inscricao.robo.equipe
+            if equipe is not None:
+                self._inscricoes_por_equipe.setdefault(equipe.id, {})[inscricao] = None
+            self._inscricoes_por_data.inserir(inscricao.data_inscricao.timestamp(), inscricao)
+
+    def _indexar_volta(self, inscricao: Inscricao, indice: int):
+        voltas = inscricao.tomadas_de_tempo
+        instante, id_juiz = voltas.instantes[indice], voltas.juizes[indice]
+        with self._trava:
+            self._voltas_por_data.inserir(instante, (inscricao, indice))
+            if id_juiz:
+                self._voltas_por_juiz.setdefault(id_juiz, _IndiceOrdenado()).inserir(instante, (inscricao, indice))
+
+    def _indexar_luta(self, luta: Luta):
+        robos = tuple(inscricao.robo.id for inscricao in (luta.competidor1, luta.competidor2) if inscricao is not None)
+        with self._trava:
+            # Uma correção de vencedor troca o competidor da luta seguinte: o robô que saiu deixa de
+            # constar nela
+            for robo_id in self._robos_da_luta.get(luta, ()):
+                if robo_id not in robos:
+                    lutas = self._lutas_por_robo.get(robo_id)
+                    if lutas is not None:
+                        lutas.pop(luta, None)
+            self._robos_da_luta[luta] = robos
+            for robo_id in robos:
+                self._lutas_por_robo.setdefault(robo_id, {})[luta] = None
+
+    # --- Consultas ---
+
+    def _copiar(self, indice: Dict[int, Dict[object, None]], chave: int) -> List[object]:
+        with self._trava:
+            return list(indice.get(chave, ()))
+
+    def lutas_do_robo(self, robo: Robo) -> Iterator[Luta]:
+        yield from self._copiar(self._lutas_por_robo, robo.id)
+
+    def inscricoes_do_robo(self, robo: Robo) -> Iterator[Inscricao]:
+        yield from self._copiar(self._inscricoes_por_robo, robo.id)
+
+    def inscricoes_da_equipe(self, equipe: Equipe) -> Iterator[Inscricao]:
+        yield from self._copiar(self._inscricoes_por_equipe, equipe.id)
+
+    def inscricoes_entre(self, inicio: datetime, fim: datetime) -> Iterator[Inscricao]:
+        """Inscrições com `data_inscricao` em [inicio, fim), em ordem de data."""
+        return self._inscricoes_por_data.percorrer(inicio.timestamp(), fim.timestamp(), self._trava)
+
+    def voltas_entre(self, inicio: datetime, fim: datetime,
+                     juiz: Optional[Juiz] = None) -> Iterator[Tuple[Inscricao, TomadaDeTempo]]:
+        """Voltas com `data_registro` em [inicio, fim), opcionalmente só as de um juiz, em ordem de registro."""
+        if juiz is None:
+            indice = self._voltas_por_data
+        else:
+            indice = self._voltas_por_juiz.get(juiz.id)
+            if indice is None:
+                return
+        for inscricao, posicao in indice.percorrer(inicio.timestamp(), fim.timestamp(), self._trava):
+            yield inscricao, inscricao.tomadas_de_tempo[posicao]
+
+    def voltas_do_dia(self, dia: date, juiz: Optional[Juiz] = None) -> Iterator[Tuple[Inscricao, TomadaDeTempo]]:
+        return self.voltas_entre(*_limites_do_dia(dia), juiz)
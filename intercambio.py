@@ -0,0 +1,273 @@
+from __future__ import annotations
+import csv
+import json
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple, Union
+
+from esqueleto import (
+    Competicao, CompeticaoCombate, CompeticaoSeguidorDeLinha, Equipe, Evento, Inscricao, LiderDeEquipe, Robo,
+    StatusInscricao,
+)
+from log_eventos import log
+
+# Importação e exportação em fluxo, em CSV ou JSONL (um objeto JSON por linha). As linhas são
+# lidas por um gerador e tratadas em lotes de TAMANHO_LOTE: a memória usada além dos objetos
+# criados é a de um lote, qualquer que seja o tamanho do arquivo. Uma linha inválida vira um
+# ErroDeLinha no relatório e a importação segue.
+#
+# Cada linha importada tem um `tipo`:
+#   equipe     equipe, lider, email, senha
+#   membro     equipe, nome, funcao
+#   robo       equipe, robo, peso
+#   inscricao  equipe, robo, competicao, [data (ISO 8601)], [status]
+CSV = "csv"
+JSONL = "jsonl"
+
+TAMANHO_LOTE = 1000
+MAX_ERROS_GUARDADOS = 1000  # Além disso os erros só são contados
+
+CAMPOS_IMPORTACAO = ("tipo", "equipe", "lider", "email", "senha", "nome", "funcao", "robo", "peso",
+                     "competicao", "data", "status")
+CAMPOS_CLASSIFICACAO = ("competicao", "posicao", "robo", "equipe", "melhor_tempo")
+CAMPOS_LUTAS = ("competicao", "luta", "rodada", "fase", "competidor1", "competidor2", "vencedor", "status")
+
+_STATUS_INSCRICAO = {status.value: status for status in StatusInscricao}
+
+Arquivo = Union[str, TextIO]
+
+
+class ErroDeLinha:
+    """Linha do arquivo que não pôde ser importada."""
+    def __init__(self, linha: int, mensagem: str):
+        self.linha: int = linha
+        self.mensagem: str = mensagem
+
+    def __repr__(self) -> str:
+        return f"ErroDeLinha({self.linha}, {self.mensagem!r})"
+
+
+class RelatorioDeImportacao:
+    """Resumo de uma importação: linhas lidas, objetos criados por tipo e as linhas com erro."""
+    def __init__(self):
+        self.linhas: int = 0
+        self.importadas: Dict[str, int] = {"equipe": 0, "membro": 0, "robo": 0, "inscricao": 0}
+        self.total_erros: int = 0
+        self.erros: List[ErroDeLinha] = []  # Só os MAX_ERROS_GUARDADOS primeiros
+        self.equipes: List[Equipe] = []
+
+    def _erro(self, linha: int, mensagem: str):
+        self.total_erros += 1
+        if len(self.erros) < MAX_ERROS_GUARDADOS:
+            self.erros.append(ErroDeLinha(linha, mensagem))
+
+
+def _formato_de(arquivo: Arquivo, formato: Optional[str]) -> str:
+    if formato is None:
+        nome = arquivo if isinstance(arquivo, str) else getattr(arquivo, "name", "")
+        formato = JSONL if str(nome).lower().endswith((".jsonl", ".ndjson")) else CSV
+    if formato not in (CSV, JSONL):
+        raise ValueError("Formato de arquivo inválido.")
+    return formato
+
+
+@contextmanager
+def _abrir(arquivo: Arquivo, modo: str):
+    if isinstance(arquivo, str):
+        with open(arquivo, modo, encoding="utf-8", newline="") as aberto:
+            yield aberto
+    else:
+        yield arquivo
+
+
+def ler_linhas(origem: TextIO, formato: str = CSV) -> Iterator[Tuple[int, object]]:
+    """Gera (número da linha, registro) sem carregar o arquivo.
+
+    O registro é um dicionário, ou a mensagem de erro (str) quando a linha não pôde ser lida.
+    """
+    if formato == CSV:
+        leitor = csv.DictReader(origem)
+        for registro in leitor:
+            yield leitor.line_num, registro
+        return
+    for numero, texto in enumerate(origem, 1):
+        if not texto.strip():
+            continue
+        try:
+            registro = json.loads(texto)
+        except ValueError:
+            yield numero, "JSON inválido."
+            continue
+        yield numero, registro if isinstance(registro, dict) else "A linha deve ser um objeto JSON."
+
+
+def _campo(registro: dict, nome: str, obrigatorio: bool = True) -> str:
+    valor = registro.get(nome)
+    valor = "" if valor is None else str(valor).strip()
+    if obrigatorio and not valor:
+        raise ValueError(f"Campo '{nome}' obrigatório.")
+    return valor
+
+
+def _numero(registro: dict, nome: str) -> float:
+    valor = _campo(registro, nome)
+    try:
+        return float(valor)
+    except ValueError:
+        raise ValueError(f"Campo '{nome}' deve ser numérico: '{valor}'.") from None
+
+
+class _Importador:
+    def __init__(self, evento: Evento, equipes: Iterable[Equipe], relatorio: RelatorioDeImportacao):
+        self.relatorio = relatorio
+        self.equipes: Dict[str, Equipe] = {equipe.nome: equipe for equipe in equipes}
+        self.competicoes: Dict[str, Competicao] = {comp.nome: comp for comp in evento.competicoes}
+        self.robos: Dict[Tuple[int, str], Robo] = {
+            (equipe.id, robo.nome): robo for equipe in self.equipes.values() for robo in equipe.robos
+        }
+        # Inscrições do lote atual, entregues a cada competição de uma vez no fim do lote
+        self.pendentes: Dict[Competicao, List[Inscricao]] = {}
+        self.robos_pendentes: Set[Tuple[Competicao, int]] = set()  # pela competição, não pelo ID: tipos diferentes podem repetir IDs
+
+    def _equipe(self, registro: dict) -> Equipe:
+        equipe = self.equipes.get(_campo(registro, "equipe"))
+        if equipe is None:
+            raise ValueError(f"Equipe '{registro['equipe']}' não encontrada.")
+        return equipe
+
+    def linha(self, registro: dict):
+        tipo = _campo(registro, "tipo").lower()
+        if tipo == "equipe":
+            nome = _campo(registro, "equipe")
+            if nome in self.equipes:
+                raise ValueError(f"Equipe '{nome}' já cadastrada.")
+            lider = LiderDeEquipe(_campo(registro, "lider"), _campo(registro, "email"), _campo(registro, "senha"))
+            equipe = self.equipes[nome] = lider.cadastrar_equipe(nome)
+            self.relatorio.equipes.append(equipe)
+        elif tipo == "membro":
+            self._equipe(registro).lider.adicionar_membro(_campo(registro, "nome"), _campo(registro, "funcao"))
+        elif tipo == "robo":
+            equipe = self._equipe(registro)
+            nome = _campo(registro, "robo")
+            if (equipe.id, nome) in self.robos:
+                raise ValueError(f"Robô '{nome}' já cadastrado na equipe.")
+            self.robos[(equipe.id, nome)] = equipe.lider.cadastrar_robo(nome, _numero(registro, "peso"))
+        elif tipo == "inscricao":
+            self._inscricao(registro)
+        else:
+            raise ValueError(f"Tipo de linha inválido: '{tipo}'.")
+        self.relatorio.importadas[tipo] += 1
+
+    def _inscricao(self, registro: dict):
+        equipe = self._equipe(registro)
+        robo = self.robos.get((equipe.id, _campo(registro, "robo")))
+        if robo is None:
+            raise ValueError(f"Robô '{registro['robo']}' não encontrado na equipe.")
+        competicao = self.competicoes.get(_campo(registro, "competicao"))
+        if competicao is None:
+            raise ValueError(f"Competição '{registro['competicao']}' não encontrada.")
+        if competicao.robo_inscrito(robo) or (competicao, robo.id) in self.robos_pendentes:
+            raise ValueError("Robô já inscrito nesta competição.")
+        data = _campo(registro, "data", obrigatorio=False)
+        try:
+            data_inscricao = datetime.fromisoformat(data) if data else None
+        except ValueError:
+            raise ValueError(f"Data de inscrição inválida: '{data}'.") from None
+        status = _campo(registro, "status", obrigatorio=False)
+        if status and status not in _STATUS_INSCRICAO:
+            raise ValueError(f"Status de inscrição inválido: '{status}'.")
+        inscricao = Inscricao(robo, competicao, data_inscricao)
+        if status:
+            inscricao.status = _STATUS_INSCRICAO[status]
+        self.pendentes.setdefault(competicao, []).append(inscricao)
+        self.robos_pendentes.add((competicao, robo.id))
+
+    def fechar_lote(self):
+        for competicao, inscricoes in self.pendentes.items():
+            competicao.receber_inscricoes(inscricoes)
+        self.pendentes.clear()
+        self.robos_pendentes.clear()
+
+
+def importar(evento: Evento, origem: Arquivo, formato: Optional[str] = None,
+             equipes: Iterable[Equipe] = (), tamanho_lote: int = TAMANHO_LOTE) -> RelatorioDeImportacao:
+    """Importa equipes, membros, robôs e inscrições de `origem` (caminho ou arquivo aberto) para o evento.
+
+    Equipes já existentes podem ser passadas em `equipes` para que as linhas as referenciem pelo nome.
+    As competições são procuradas pelo nome entre as do evento.
+    """
+    formato = _formato_de(origem, formato)
+    relatorio = RelatorioDeImportacao()
+    importador = _Importador(evento, equipes, relatorio)
+    with _abrir(origem, "r") as arquivo:
+        linhas = ler_linhas(arquivo, formato)
+        while True:
+            lote = list(islice(linhas, tamanho_lote))
+            if not lote:
+                break
+            for numero, registro in lote:
+                relatorio.linhas += 1
+                if isinstance(registro, str):
+                    relatorio._erro(numero, registro)
+                    continue
+                try:
+                    importador.linha(registro)
+                except Exception as erro:
+                    relatorio._erro(numero, str(erro))
+            importador.fechar_lote()
+    log.info("Importação para '%s': %s linhas, %s com erro.", evento.nome, relatorio.linhas, relatorio.total_erros)
+    return relatorio
+
+
+# --- Exportação ---
+
+def linhas_de_classificacao(evento: Evento) -> Iterator[dict]:
+    """Linhas da classificação de cada competição de seguidor de linha do evento."""
+    for competicao in evento.competicoes:
+        if isinstance(competicao, CompeticaoSeguidorDeLinha):
+            for resultado in competicao.iterar_classificacao():
+                robo = resultado.inscricao.robo
+                yield {"competicao": competicao.nome, "posicao": resultado.posicao, "robo": robo.nome,
+                       "equipe": robo.equipe.nome if robo.equipe else "", "melhor_tempo": resultado.melhor_tempo}
+
+
+def linhas_de_lutas(evento: Evento) -> Iterator[dict]:
+    """Uma linha por luta das chaves de combate do evento, com o vencedor quando já houver."""
+    nome = lambda inscricao: inscricao.robo.nome if inscricao is not None else ""
+    for competicao in evento.competicoes:
+        chave = getattr(competicao, "chave_batalha", None) if isinstance(competicao, CompeticaoCombate) else None
+        if chave is None:
+            continue
+        for luta in chave.lutas:
+            yield {"competicao": competicao.nome, "luta": luta.id, "rodada": luta.rodada,
+                   "fase": chave.rotulo_da_rodada(luta), "competidor1": nome(luta.competidor1),
+                   "competidor2": nome(luta.competidor2), "vencedor": nome(luta.vencedor),
+                   "status": luta.status.value}
+
+
+def _escrever(linhas: Iterable[dict], campos: Tuple[str, ...], destino: Arquivo, formato: Optional[str]) -> int:
+    formato = _formato_de(destino, formato)
+    total = 0
+    with _abrir(destino, "w") as arquivo:
+        if formato == CSV:
+            escritor = csv.DictWriter(arquivo, fieldnames=campos, lineterminator="\n")
+            escritor.writeheader()
+            for linha in linhas:
+                escritor.writerow(linha)
+                total += 1
+        else:
+            for linha in linhas:
+                arquivo.write(json.dumps(linha, ensure_ascii=False) + "\n")
+                total += 1
+    return total
+
+
+def exportar_classificacoes(evento: Evento, destino: Arquivo, formato: Optional[str] = None) -> int:
+    """Escreve a classificação das competições de seguidor de linha; devolve o número de linhas."""
+    return _escrever(linhas_de_classificacao(evento), CAMPOS_CLASSIFICACAO, destino, formato)
+
+
+def exportar_lutas(evento: Evento, destino: Arquivo, formato: Optional[str] = None) -> int:
+    """Escreve as lutas (e vencedores) das chaves de combate; devolve o número de linhas."""
+    return _escrever(linhas_de_lutas(evento), CAMPOS_LUTAS, destino, formato)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional, TextIO
+
+# Logger único do sistema. Sem configuração ele só tem um NullHandler: as mensagens
+# usam formatação preguiçosa (%s) e o teste de nível é feito antes de montar o texto,
+# então o log desligado custa só a checagem do nível.
+log = logging.getLogger("soft")
+log.addHandler(logging.NullHandler())
+log.propagate = False
+
+_ouvinte: Optional[QueueListener] = None
+
+
+def configurar_log(nivel: int = logging.INFO, saida: Optional[TextIO] = None, assincrono: bool = False):
+    """Liga o log no nível dado, escrevendo em `saida` (stdout por padrão).
+
+    Com `assincrono=True` as mensagens passam por uma fila e são escritas por uma
+    thread separada, tirando o I/O do caminho dos juízes.
+    """
+    encerrar_log()
+    destino = logging.StreamHandler(saida or sys.stdout)
+    destino.setFormatter(logging.Formatter("%(message)s"))
+    if assincrono:
+        global _ouvinte
+        fila: queue.SimpleQueue = queue.SimpleQueue()
+        _ouvinte = QueueListener(fila, destino)
+        _ouvinte.start()
+        destino = QueueHandler(fila)
+    log.addHandler(destino)
+    log.setLevel(nivel)
+
+
+def desativar_log():
+    """Desliga o log sem remover os destinos configurados."""
+    log.setLevel(logging.CRITICAL + 1)
+
+
+def encerrar_log():
+    """Descarrega a fila assíncrona (se houver) e remove os destinos configurados."""
+    global _ouvinte
+    if _ouvinte is not None:
+        _ouvinte.stop()
+        _ouvinte = None
+    for destino in list(log.handlers):
+        if not isinstance(destino, logging.NullHandler):
+            log.removeHandler(destino)
+            destino.close()
+    log.setLevel(logging.NOTSET)
@@ -0,0 +1,248 @@
+from __future__ import annotations
+import functools
+import os
+import threading
+import time
+import weakref
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from esqueleto import (
+    Competicao, CompeticaoCombate, CompeticaoSeguidorDeLinha, Inscricao, Juiz, Luta, PainelDeVisualizacao,
+)
+
+# Métricas dos caminhos quentes: contagem e latência de cada operação de juízes, competições e
+# painel, e o tamanho de cada competição tocada por elas. Desligadas, os métodos são os
+# originais (nenhum custo); `ativar_metricas` troca-os por versões cronometradas e
+# `desativar_metricas` devolve os originais.
+PREFIXO = "soft"
+
+# Limites superiores (segundos) dos baldes do histograma: 1µs, 2µs, 4µs, ... ~16,8s, e +inf
+LIMITES = tuple(1e-6 * 2 ** expoente for expoente in range(25)) + (float("inf"),)
+
+_OPERACOES: Tuple[Tuple[type, str], ...] = (
+    (Juiz, "registrar_tomada_de_tempo"),
+    (Juiz, "registrar_vencedor_luta"),
+    (Competicao, "receber_inscricao"),
+    (Competicao, "receber_inscricoes"),
+    (CompeticaoCombate, "gerar_estrutura"),
+    (CompeticaoSeguidorDeLinha, "atualizar_ranking"),
+    (CompeticaoSeguidorDeLinha, "gerar_classificacao"),
+    (PainelDeVisualizacao, "obter_classificacao"),
+    (PainelDeVisualizacao, "ver_chave_de_batalha"),
+    (PainelDeVisualizacao, "ver_classificacao_seguidor"),
+    (PainelDeVisualizacao, "ver_resultados_evento"),
+)
+
+
+class Histograma:
+    """Latências em baldes de tamanho exponencial; os percentis são interpolados dentro do balde."""
+    __slots__ = ("contagens", "soma", "maximo")
+
+    def __init__(self):
+        self.contagens = array('q', bytes(8 * len(LIMITES)))
+        self.soma: float = 0.0
+        self.maximo: float = 0.0
+
+    def registrar(self, segundos: float):
+        self.contagens[bisect_left(LIMITES, segundos)] += 1
+        self.soma += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+
+    @property
+    def total(self) -> int:
+        return sum(self.contagens)
+
+    def percentil(self, fracao: float) -> Optional[float]:
+        total = self.total
+        if total == 0:
+            return None
+        alvo = fracao * total
+        acumulado = 0
+        for balde, contagem in enumerate(self.contagens):
+            if contagem and acumulado + contagem >= alvo:
+                inferior = LIMITES[balde - 1] if balde else 0.0
+                superior = min(LIMITES[balde], self.maximo)
+                return inferior + (superior - inferior) * (alvo - acumulado) / contagem
+            acumulado += contagem
+        return self.maximo
+
+
+class _Registro:
+    def __init__(self):
+        self.trava = threading.Lock()
+        self.histogramas: Dict[str, Histograma] = {}
+        self.competicoes: "weakref.WeakSet[Competicao]" = weakref.WeakSet()
+        self.originais: Dict[Tuple[type, str], Callable] = {}
+
+    def registrar(self, operacao: str, segundos: float, competicao: Optional[Competicao]):
+        with self.trava:
+            histograma = self.histogramas.get(operacao)
+            if histograma is None:
+                histograma = self.histogramas[operacao] = Histograma()
+            histograma.registrar(segundos)
+            if competicao is not None:
+                self.competicoes.add(competicao)
+
+
+_registro = _Registro()
+
+
+def _competicao_de(argumentos: tuple) -> Optional[Competicao]:
+    """Competição afetada pela chamada: o próprio objeto, ou a da inscrição/luta recebida."""
+    for argumento in argumentos:
+        if isinstance(argumento, Competicao):
+            return argumento
+        if isinstance(argumento, Inscricao) and isinstance(argumento.competicao, Competicao):
+            return argumento.competicao
+        if isinstance(argumento, Luta) and argumento.chave is not None:
+            return argumento.chave.competicao
+    return None
+
+
+def _cronometrar(operacao: str, metodo: Callable) -> Callable:
+    @functools.wraps(metodo)
+    def cronometrado(*argumentos, **nomeados):
+        inicio = time.perf_counter()
+        try:
+            return metodo(*argumentos, **nomeados)
+        finally:
+            _registro.registrar(operacao, time.perf_counter() - inicio, _competicao_de(argumentos))
+    return cronometrado
+
+
+def ativar_metricas():
+    """Passa a cronometrar as operações instrumentadas (ver _OPERACOES)."""
+    with _registro.trava:
+        for classe, nome in _OPERACOES:
+            if (classe, nome) not in _registro.originais:
+                metodo = classe.__dict__[nome]
+                _registro.originais[(classe, nome)] = metodo
+                setattr(classe, nome, _cronometrar(f"{classe.__name__}.{nome}", metodo))
+
+
+def desativar_metricas():
+    """Devolve os métodos originais; as métricas já coletadas são mantidas."""
+    with _registro.trava:
+        for (classe, nome), metodo in _registro.originais.items():
+            setattr(classe, nome, metodo)
+        _registro.originais.clear()
+
+
+def metricas_ativas() -> bool:
+    return bool(_registro.originais)
+
+
+def zerar_metricas():
+    with _registro.trava:
+        _registro.histogramas.clear()
+        _registro.competicoes = weakref.WeakSet()
+
+
+@contextmanager
+def medir(operacao: str, competicao: Optional[Competicao] = None):
+    """Cronometra um trecho qualquer sob o nome `operacao` (só quando as métricas estão ativas)."""
+    if not _registro.originais:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _registro.registrar(operacao, time.perf_counter() - inicio, competicao)
+
+
+def _tamanhos(competicao: Competicao) -> Dict[str, int]:
+    with competicao.trava:
+        inscricoes = list(competicao.inscricoes)
+    tamanhos = {"inscricoes": len(inscricoes), "voltas": sum(len(insc.tomadas_de_tempo) for insc in inscricoes)}
+    chave = getattr(competicao, "chave_batalha", None)
+    if chave is not None:
+        tamanhos["lutas"] = len(chave.lutas)
+    return tamanhos
+
+
+def _chave(competicao: Competicao) -> Tuple[str, int]:
+    """(tipo, ID): competições de tipos diferentes podem compartilhar o mesmo ID."""
+    return type(competicao).__name__, competicao.id
+
+
+def instantaneo() -> Dict[str, Dict]:
+    """Cópia das métricas: por operação (chamadas, tempo total, p50/p90/p99, máximo) e por competição,
+    esta indexada por (tipo, ID)."""
+    with _registro.trava:
+        histogramas = [(operacao, histograma.total, histograma.soma, histograma.maximo,
+                        [histograma.percentil(fracao) for fracao in (0.5, 0.9, 0.99)])
+                       for operacao, histograma in _registro.histogramas.items()]
+        competicoes = list(_registro.competicoes)
+    operacoes = {
+        operacao: {"chamadas": total, "segundos": soma, "p50": p50, "p90": p90, "p99": p99, "maximo": maximo}
+        for operacao, total, soma, maximo, (p50, p90, p99) in histogramas
+    }
+    por_competicao = {_chave(competicao): dict(nome=competicao.nome, **_tamanhos(competicao))
+                      for competicao in sorted(competicoes, key=_chave)}
+    return {"operacoes": operacoes, "competicoes": por_competicao}
+
+
+def _rotulo(valor: object) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def texto_prometheus() -> str:
+    """Métricas no formato de exposição em texto do Prometheus."""
+    with _registro.trava:
+        histogramas = [(operacao, array('q', h.contagens), h.soma) for operacao, h in _registro.histogramas.items()]
+        competicoes = sorted(_registro.competicoes, key=_chave)
+    nome = f"{PREFIXO}_operacao_segundos"
+    linhas: List[str] = [f"# HELP {nome} Latência das operações instrumentadas.", f"# TYPE {nome} histogram"]
+    for operacao, contagens, soma in sorted(histogramas):
+        rotulo = f'operacao="{_rotulo(operacao)}"'
+        acumulado = 0
+        for limite, contagem in zip(LIMITES, contagens):
+            acumulado += contagem
+            le = "+Inf" if limite == float("inf") else repr(limite)
+            linhas.append(f'{nome}_bucket{{{rotulo},le="{le}"}} {acumulado}')
+        linhas.append(f"{nome}_sum{{{rotulo}}} {soma!r}")
+        linhas.append(f"{nome}_count{{{rotulo}}} {acumulado}")
+    tamanhos = [(competicao, _tamanhos(competicao)) for competicao in competicoes]
+    for medida in ("inscricoes", "voltas", "lutas"):
+        nome = f"{PREFIXO}_competicao_{medida}"
+        linhas.append(f"# TYPE {nome} gauge")
+        for competicao, valores in tamanhos:
+            if medida in valores:
+                tipo, id_competicao = _chave(competicao)
+                linhas.append(f'{nome}{{competicao="{_rotulo(competicao.nome)}",tipo="{tipo}",id="{id_competicao}"}} '
+                              f'{valores[medida]}')
+    return "\n".join(linhas) + "\n"
+
+
+def gravar_prometheus(caminho: str):
+    """Grava o texto num arquivo (para o textfile collector do node_exporter), trocando-o de forma atômica."""
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "w", encoding="utf-8") as arquivo:
+        arquivo.write(texto_prometheus())
+    os.replace(temporario, caminho)
+
+
+class _RespostaPrometheus(BaseHTTPRequestHandler):
+    def do_GET(self):
+        corpo = texto_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, formato, *argumentos):
+        pass
+
+
+def servir_prometheus(porta: int = 0, endereco: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve as métricas por HTTP numa thread em segundo plano; encerre com `servidor.shutdown()`."""
+    servidor = ThreadingHTTPServer((endereco, porta), _RespostaPrometheus)
+    threading.Thread(target=servidor.serve_forever, name="metricas-prometheus", daemon=True).start()
+    return servidor
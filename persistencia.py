@@ -0,0 +1,455 @@
+from __future__ import annotations
+import os
+import struct
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from esqueleto import (
+    ChaveDeBatalha, Competicao, CompeticaoCombate, CompeticaoSeguidorDeLinha, Equipe, Evento, Inscricao,
+    LiderDeEquipe, Luta, Membro, Organizador, Robo, StatusCompeticao, StatusEvento, StatusInscricao, StatusLuta,
+    TomadaDeTempo, Usuario,
+)
+from formatos import FORMATOS, restaurar_chave
+from identificadores import get_alocador, reatribuir_id
+
+# Formato do snapshot: cabeçalho MAGICO + versão, seguido de registros empacotados com struct
+# (little-endian). Referências entre objetos (ciclos como Inscricao.competicao ou
+# Equipe.lider <-> LiderDeEquipe.equipe) são gravadas como IDs e religadas na leitura;
+# o ID 0 representa "nenhum". A versão 2 acrescenta o total de rodadas ao fim de cada chave;
+# a 3, o rating dos robôs e, em cada luta, a variação de rating e a ordem do resultado; a 4, a
+# coluna de juízes das voltas; a 5 grava o hash da senha dos usuários no lugar da senha.
+MAGICO = b"SOFTSNAP"
+VERSAO = 5
+
+_STATUS_EVENTO = list(StatusEvento)
+_STATUS_COMPETICAO = list(StatusCompeticao)
+_STATUS_INSCRICAO = list(StatusInscricao)
+_STATUS_LUTA = list(StatusLuta)
+
+TIPO_COMBATE = 0
+TIPO_SEGUIDOR = 1
+
+
+class ErroDeSnapshot(Exception):
+    """Arquivo de snapshot ou diário inválido."""
+
+
+class _Escritor:
+    def __init__(self):
+        self.dados = bytearray()
+
+    def pack(self, formato: str, *valores):
+        self.dados += struct.pack("<" + formato, *valores)
+
+    def texto(self, valor: str):
+        codificado = valor.encode("utf-8")
+        self.pack("I", len(codificado))
+        self.dados += codificado
+
+    def bloco(self, dados: bytes):
+        self.pack("I", len(dados))
+        self.dados += dados
+
+
+class _Leitor:
+    def __init__(self, dados: bytes):
+        self.dados = memoryview(dados)
+        self.posicao = 0
+        self.versao = VERSAO
+
+    def unpack(self, formato: str) -> tuple:
+        formato = "<" + formato
+        valores = struct.unpack_from(formato, self.dados, self.posicao)
+        self.posicao += struct.calcsize(formato)
+        return valores
+
+    def um(self, formato: str):
+        return self.unpack(formato)[0]
+
+    def texto(self) -> str:
+        return str(self.bloco(), "utf-8")
+
+    def bloco(self) -> memoryview:
+        tamanho = self.um("I")
+        inicio = self.posicao
+        self.posicao += tamanho
+        if self.posicao > len(self.dados):
+            raise ErroDeSnapshot("Snapshot truncado.")
+        return self.dados[inicio:self.posicao]
+
+
+def _id_ou_zero(objeto) -> int:
+    return objeto.id if objeto is not None else 0
+
+
+# --- Escrita ---------------------------------------------------------------------------
+
+def _gravar_usuario(escritor: _Escritor, usuario: Usuario):
+    escritor.pack("q", usuario.id)
+    escritor.texto(usuario.nome)
+    escritor.texto(usuario.email)
+    escritor.texto(usuario.senha_hash or "")
+    escritor.pack("i", usuario.data_cadastro.toordinal())
+
+
+def _gravar_equipe(escritor: _Escritor, equipe: Equipe):
+    escritor.pack("q", equipe.id)
+    escritor.texto(equipe.nome)
+    escritor.pack("i", equipe.data_criacao.toordinal())
+    _gravar_usuario(escritor, equipe.lider)
+    escritor.pack("I", len(equipe.membros))
+    for membro in equipe.membros:
+        escritor.pack("q", membro.id)
+        escritor.texto(membro.nome)
+        escritor.texto(membro.funcao)
+        escritor.pack("i", membro.data_ingresso.toordinal())
+    escritor.pack("I", len(equipe.robos))
+    for robo in equipe.robos:
+        escritor.pack("q", robo.id)
+
+
+def _gravar_robo(escritor: _Escritor, robo: Robo):
+    escritor.pack("q", robo.id)
+    escritor.texto(robo.nome)
+    escritor.pack("d?d", robo.peso, robo.disponivel, robo.rating)
+
+
+def _gravar_inscricao(escritor: _Escritor, inscricao: Inscricao):
+    voltas = inscricao.tomadas_de_tempo
+    escritor.pack("qqdB", inscricao.id, inscricao.robo.id, inscricao.data_inscricao.timestamp(),
+                  _STATUS_INSCRICAO.index(inscricao.status))
+    escritor.bloco(voltas.ids.tobytes())
+    escritor.bloco(voltas.tempos.tobytes())
+    escritor.bloco(voltas.instantes.tobytes())
+    escritor.bloco(voltas.juizes.tobytes())
+
+
+def _gravar_chave(escritor: _Escritor, chave: Optional[ChaveDeBatalha]):
+    escritor.pack("?", chave is not None)
+    if chave is None:
+        return
+    escritor.pack("q", chave.id)
+    escritor.texto(chave.formato)
+    escritor.pack("IqI", len(chave._posicoes), _id_ou_zero(chave.campeao), len(chave.robos_participantes))
+    for robo in chave.robos_participantes:
+        escritor.pack("q", robo.id)
+    escritor.pack("I", len(chave.lutas))
+    for luta in chave.lutas:
+        escritor.pack("qIIBqqqdq", luta.id, luta.posicao, luta.rodada, _STATUS_LUTA.index(luta.status),
+                      _id_ou_zero(luta.competidor1), _id_ou_zero(luta.competidor2), _id_ou_zero(luta.vencedor),
+                      luta.variacao_rating, luta.sequencia_resultado)
+    escritor.pack("I", getattr(chave, "total_rodadas", 0))
+
+
+def _gravar_competicao(escritor: _Escritor, competicao: Competicao):
+    tipo = TIPO_COMBATE if isinstance(competicao, CompeticaoCombate) else TIPO_SEGUIDOR
+    escritor.pack("qB", competicao.id, tipo)
+    escritor.texto(competicao.nome)
+    escritor.pack("BI", _STATUS_COMPETICAO.index(competicao.status), len(competicao.inscricoes))
+    for inscricao in competicao.inscricoes:
+        _gravar_inscricao(escritor, inscricao)
+    if tipo == TIPO_COMBATE:
+        _gravar_chave(escritor, competicao.chave_batalha)
+
+
+def serializar_evento(evento: Evento, equipes: Iterable[Equipe] = ()) -> bytes:
+    """Empacota o evento, suas competições e as equipes informadas num único bloco binário."""
+    equipes = list(equipes)
+    robos: Dict[int, Robo] = {}
+    for equipe in equipes:
+        for robo in equipe.robos:
+            robos[robo.id] = robo
+    for competicao in evento.competicoes:
+        for inscricao in competicao.inscricoes:
+            robos.setdefault(inscricao.robo.id, inscricao.robo)
+
+    escritor = _Escritor()
+    escritor.dados += MAGICO
+    escritor.pack("H", VERSAO)
+    _gravar_usuario(escritor, evento.organizador)
+    escritor.pack("q", evento.id)
+    escritor.texto(evento.nome)
+    escritor.pack("iiB", evento.data_inicio.toordinal(), evento.data_fim.toordinal(),
+                  _STATUS_EVENTO.index(evento.status))
+    escritor.pack("I", len(robos))
+    for robo in robos.values():
+        _gravar_robo(escritor, robo)
+    escritor.pack("I", len(equipes))
+    for equipe in equipes:
+        _gravar_equipe(escritor, equipe)
+    escritor.pack("I", len(evento.competicoes))
+    for competicao in evento.competicoes:
+        _gravar_competicao(escritor, competicao)
+    return bytes(escritor.dados)
+
+
+def salvar_snapshot(evento: Evento, caminho: str, equipes: Iterable[Equipe] = ()):
+    """Grava o snapshot de forma atômica (arquivo temporário + rename)."""
+    dados = serializar_evento(evento, equipes)
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(dados)
+        arquivo.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(temporario, caminho)
+
+
+# --- Leitura ---------------------------------------------------------------------------
+
+def _ler_usuario(leitor: _Leitor, classe: type) -> Usuario:
+    id_usuario = leitor.um("q")
+    nome, email, senha = leitor.texto(), leitor.texto(), leitor.texto()
+    if leitor.versao >= 5:
+        usuario = classe(nome, email, None, senha or None)
+    else:
+        usuario = classe(nome, email, senha)  # snapshots antigos guardavam a senha em texto; o hash vai para a fila
+    usuario.data_cadastro = date.fromordinal(leitor.um("i"))
+    reatribuir_id(usuario, id_usuario)
+    return usuario
+
+
+def _ler_equipe(leitor: _Leitor, robos: Dict[int, Robo]) -> Equipe:
+    id_equipe = leitor.um("q")
+    nome = leitor.texto()
+    data_criacao = date.fromordinal(leitor.um("i"))
+    lider = _ler_usuario(leitor, LiderDeEquipe)
+    equipe = Equipe(nome, lider)
+    equipe.data_criacao = data_criacao
+    lider.equipe = equipe
+    reatribuir_id(equipe, id_equipe)
+    for _ in range(leitor.um("I")):
+        id_membro = leitor.um("q")
+        membro = Membro(leitor.texto(), leitor.texto())
+        membro.data_ingresso = date.fromordinal(leitor.um("i"))
+        reatribuir_id(membro, id_membro)
+        equipe.adicionar_membro(membro)
+    for _ in range(leitor.um("I")):
+        equipe.adicionar_robo(robos[leitor.um("q")])
+    return equipe
+
+
+def _ler_robo(leitor: _Leitor) -> Robo:
+    id_robo = leitor.um("q")
+    nome = leitor.texto()
+    peso, disponivel = leitor.unpack("d?")
+    robo = Robo(nome, peso)
+    robo.disponivel = disponivel
+    if leitor.versao >= 3:
+        robo.rating = leitor.um("d")
+    reatribuir_id(robo, id_robo)
+    return robo
+
+
+def _ler_inscricao(leitor: _Leitor, competicao: Competicao, robos: Dict[int, Robo]) -> Inscricao:
+    id_inscricao, id_robo, data_inscricao, status = leitor.unpack("qqdB")
+    inscricao = Inscricao(robos[id_robo], competicao, datetime.fromtimestamp(data_inscricao))
+    reatribuir_id(inscricao, id_inscricao)
+    inscricao.status = _STATUS_INSCRICAO[status]
+    voltas = inscricao.tomadas_de_tempo
+    voltas.ids.frombytes(leitor.bloco())
+    voltas.tempos.frombytes(leitor.bloco())
+    voltas.instantes.frombytes(leitor.bloco())
+    if leitor.versao >= 4:
+        voltas.juizes.frombytes(leitor.bloco())
+    else:
+        voltas.juizes.extend(0 for _ in range(len(voltas.tempos)))
+    if voltas.ids:
+        get_alocador().reservar("TomadaDeTempo", max(voltas.ids))
+    inscricao.melhor_tempo = voltas.melhor_tempo()
+    return inscricao
+
+
+def _ler_chave(leitor: _Leitor, robos: Dict[int, Robo], inscricoes: Dict[int, Inscricao]) -> Optional[ChaveDeBatalha]:
+    if not leitor.um("?"):
+        return None
+    id_chave = leitor.um("q")
+    formato = leitor.texto()
+    tamanho, id_campeao, total_robos = leitor.unpack("IqI")
+    participantes = [robos[leitor.um("q")] for _ in range(total_robos)]
+    if leitor.versao >= 3:
+        registros = [leitor.unpack("qIIBqqqdq") for _ in range(leitor.um("I"))]
+    else:
+        registros = [leitor.unpack("qIIBqqq") + (0.0, 0) for _ in range(leitor.um("I"))]
+    for registro in registros:
+        get_alocador().reservar("ResultadoDeLuta", registro[8])
+    total_rodadas = leitor.um("I") if leitor.versao >= 2 else 0
+    if formato in FORMATOS:
+        # Formatos dinâmicos são reconstruídos reaplicando os resultados (ver formatos.restaurar_chave)
+        por_robo = {inscricao.robo.id: inscricao for inscricao in inscricoes.values()}
+        registros = [registro[:3] + (_STATUS_LUTA[registro[3]],) + registro[4:] for registro in registros]
+        chave = restaurar_chave(formato, [por_robo[robo.id] for robo in participantes], registros, inscricoes,
+                                total_rodadas or None)
+        reatribuir_id(chave, id_chave)
+        return chave
+    chave = ChaveDeBatalha(formato, participantes)
+    reatribuir_id(chave, id_chave)
+    chave._posicoes = [None] * tamanho
+    chave.campeao = inscricoes.get(id_campeao)
+    for id_luta, posicao, rodada, status, id1, id2, id_vencedor, variacao, sequencia in registros:
+        luta = chave._criar_luta(rodada, posicao, inscricoes.get(id1), inscricoes.get(id2))
+        luta.variacao_rating, luta.sequencia_resultado = variacao, sequencia
+        reatribuir_id(luta, id_luta)
+        luta.status = _STATUS_LUTA[status]
+        luta.vencedor = inscricoes.get(id_vencedor)
+        chave._posicoes[posicao] = luta
+        chave.lutas.append(luta)
+    return chave
+
+
+def _ler_competicao(leitor: _Leitor, evento: Evento, robos: Dict[int, Robo]) -> Competicao:
+    id_competicao, tipo = leitor.unpack("qB")
+    nome = leitor.texto()
+    classe = CompeticaoCombate if tipo == TIPO_COMBATE else CompeticaoSeguidorDeLinha
+    competicao = classe(nome, evento)
+    reatribuir_id(competicao, id_competicao)
+    status, total = leitor.unpack("BI")
+    competicao.status = _STATUS_COMPETICAO[status]
+    inscricoes = [_ler_inscricao(leitor, competicao, robos) for _ in range(total)]
+    for inscricao in inscricoes:
+        competicao.receber_inscricao(inscricao)
+    if tipo == TIPO_COMBATE:
+        competicao.chave_batalha = _ler_chave(leitor, robos, {insc.id: insc for insc in inscricoes})
+        if competicao.chave_batalha is not None:
+            competicao.chave_batalha.competicao = competicao
+    return competicao
+
+
+def desserializar_evento(dados: bytes) -> Tuple[Evento, List[Equipe]]:
+    if dados[:len(MAGICO)] != MAGICO:
+        raise ErroDeSnapshot("Arquivo não é um snapshot do sistema.")
+    leitor = _Leitor(dados)
+    leitor.posicao = len(MAGICO)
+    leitor.versao = leitor.um("H")
+    if not 1 <= leitor.versao <= VERSAO:
+        raise ErroDeSnapshot("Versão de snapshot não suportada.")
+    organizador = _ler_usuario(leitor, Organizador)
+    id_evento = leitor.um("q")
+    nome = leitor.texto()
+    inicio, fim, status = leitor.unpack("iiB")
+    evento = Evento(nome, date.fromordinal(inicio), date.fromordinal(fim), organizador)
+    evento.status = _STATUS_EVENTO[status]
+    reatribuir_id(evento, id_evento)
+    robos: Dict[int, Robo] = {}
+    for _ in range(leitor.um("I")):
+        robo = _ler_robo(leitor)
+        robos[robo.id] = robo
+    equipes = [_ler_equipe(leitor, robos) for _ in range(leitor.um("I"))]
+    for _ in range(leitor.um("I")):
+        evento.adicionar_competicao(_ler_competicao(leitor, evento, robos))
+    return evento, equipes
+
+
+def carregar_snapshot(caminho: str) -> Tuple[Evento, List[Equipe]]:
+    """Reconstrói o evento e as equipes gravados por `salvar_snapshot`."""
+    with open(caminho, "rb") as arquivo:
+        return desserializar_evento(arquivo.read())
+
+
+# --- Diário de ações dos juízes --------------------------------------------------------
+
+ACAO_TOMADA = 1
+ACAO_VITORIA = 2
+ACAO_TOMADA_COM_JUIZ = 3
+_FORMATO_ACAO = {
+    ACAO_TOMADA: struct.Struct("<qqdd"),            # inscrição, tomada, tempo, instante (diários antigos)
+    ACAO_VITORIA: struct.Struct("<qq"),             # luta, inscrição vencedora
+    ACAO_TOMADA_COM_JUIZ: struct.Struct("<qqddq"),  # inscrição, tomada, tempo, instante, juiz
+}
+
+
+def codificar_tomada(inscricao: Inscricao, tomada: TomadaDeTempo) -> bytes:
+    return bytes([ACAO_TOMADA_COM_JUIZ]) + _FORMATO_ACAO[ACAO_TOMADA_COM_JUIZ].pack(
+        inscricao.id, tomada.id, tomada.tempo_em_segundos, tomada.instante, tomada.id_juiz)
+
+
+def codificar_vitoria(luta: Luta, vencedor: Inscricao) -> bytes:
+    return bytes([ACAO_VITORIA]) + _FORMATO_ACAO[ACAO_VITORIA].pack(luta.id, vencedor.id)
+
+
+def ler_acoes(dados: bytes) -> Iterator[tuple]:
+    """Decodifica as ações em sequência; um registro final incompleto (escrita interrompida) é ignorado."""
+    posicao = 0
+    while posicao < len(dados):
+        formato = _FORMATO_ACAO.get(dados[posicao])
+        if formato is None:
+            raise ErroDeSnapshot("Registro de diário desconhecido.")
+        if posicao + 1 + formato.size > len(dados):
+            return
+        yield (dados[posicao],) + formato.unpack_from(dados, posicao + 1)
+        posicao += 1 + formato.size
+
+
+def _luta_pendente(inscricao: Inscricao) -> Luta:
+    chave = inscricao.competicao.chave_batalha
+    for luta in reversed(chave.lutas):
+        if luta.status != StatusLuta.CONCLUIDA and inscricao in (luta.competidor1, luta.competidor2) \
+                and luta.competidor1 is not None and luta.competidor2 is not None:
+            return luta
+    raise ErroDeSnapshot("Diário cita uma luta que não existe.")
+
+
+def aplicar_acoes(evento: Evento, acoes: Iterable[tuple]) -> int:
+    """Reaplica ações do diário sobre o evento; devolve quantas foram aplicadas."""
+    inscricoes: Dict[int, Inscricao] = {}
+    lutas: Dict[int, Luta] = {}
+    for competicao in evento.competicoes:
+        for inscricao in competicao.inscricoes:
+            inscricoes[inscricao.id] = inscricao
+        chave = getattr(competicao, "chave_batalha", None)
+        if chave is not None:
+            for luta in chave.lutas:
+                lutas[luta.id] = luta
+    aplicadas = maior_tomada = 0
+    for acao in acoes:
+        if acao[0] in (ACAO_TOMADA, ACAO_TOMADA_COM_JUIZ):
+            id_inscricao, id_tomada, tempo, instante = acao[1:5]
+            id_juiz = acao[5] if acao[0] == ACAO_TOMADA_COM_JUIZ else 0
+            inscricoes[id_inscricao].adicionar_tomada_de_tempo(TomadaDeTempo._da_coluna(id_tomada, tempo, instante, id_juiz))
+            maior_tomada = max(maior_tomada, id_tomada)
+        else:
+            _, id_luta, id_vencedor = acao
+            luta = lutas.get(id_luta)
+            if luta is None:
+                # Luta criada depois do snapshot (formatos dinâmicos): é a pendente do vencedor
+                luta = lutas[id_luta] = _luta_pendente(inscricoes[id_vencedor])
+                reatribuir_id(luta, id_luta)
+            if luta.chave is not None:
+                luta.chave.registrar_vencedor(luta, inscricoes[id_vencedor])
+            else:
+                luta.registrar_resultado(inscricoes[id_vencedor])
+        aplicadas += 1
+    if maior_tomada:
+        get_alocador().reservar("TomadaDeTempo", maior_tomada)
+    return aplicadas
+
+
+class DiarioDeAcoes:
+    """Diário append-only das ações dos juízes entre dois snapshots."""
+    def __init__(self, caminho: str):
+        self.caminho: str = caminho
+        self._arquivo = open(caminho, "ab")
+
+    def registrar_tomada(self, inscricao: Inscricao, tomada: TomadaDeTempo):
+        self._gravar(codificar_tomada(inscricao, tomada))
+
+    def registrar_vitoria(self, luta: Luta, vencedor: Inscricao):
+        self._gravar(codificar_vitoria(luta, vencedor))
+
+    def _gravar(self, registro: bytes):
+        self._arquivo.write(registro)
+        self._arquivo.flush()
+
+    def truncar(self):
+        """Descarta as ações já cobertas por um snapshot novo."""
+        self._arquivo.truncate(0)
+        self._arquivo.seek(0)
+
+    def fechar(self):
+        self._arquivo.close()
+
+
+def reaplicar_diario(evento: Evento, caminho: str) -> int:
+    if not os.path.exists(caminho):
+        return 0
+    with open(caminho, "rb") as arquivo:
+        return aplicar_acoes(evento, ler_acoes(arquivo.read()))
@@ -0,0 +1,107 @@
+from __future__ import annotations
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy é opcional; sem ele o recálculo em lote roda em Python puro
+    np = None
+
+# Rating Elo por robô. A atualização de uma luta só depende dos ratings dos dois robôs naquele
+# momento, então lutas sem robôs em comum podem ser calculadas juntas: o recálculo em lote
+# divide o histórico em "ondas" assim e processa cada onda como uma operação vetorial.
+RATING_INICIAL = 1500.0
+FATOR_K = 32.0
+
+# O rating é do robô, não da competição: o mesmo robô luta em várias chaves, cada uma com a sua
+# trava. Toda leitura-e-escrita de ratings passa por esta trava única (segurada só durante a
+# conta), junto com a numeração do resultado, para a ordem de `sequencia_resultado` ser a
+# ordem em que os ratings foram de fato atualizados.
+trava_dos_ratings = threading.Lock()
+
+
+def probabilidade_de_vitoria(rating: float, rating_adversario: float) -> float:
+    return 1.0 / (1.0 + 10.0 ** ((rating_adversario - rating) / 400.0))
+
+
+def variacao_elo(rating_vencedor: float, rating_perdedor: float, fator_k: float = FATOR_K) -> float:
+    """Pontos que o vencedor ganha (e o perdedor perde) numa luta."""
+    return fator_k * (1.0 - probabilidade_de_vitoria(rating_vencedor, rating_perdedor))
+
+
+def _ondas(vencedores: array, perdedores: array) -> array:
+    """Onda de cada luta: uma depois da última onda em que qualquer um dos dois robôs lutou."""
+    ultima: Dict[int, int] = {}
+    ondas = array('q', bytes(8 * len(vencedores)))
+    for indice, (vencedor, perdedor) in enumerate(zip(vencedores, perdedores)):
+        onda = max(ultima.get(vencedor, -1), ultima.get(perdedor, -1)) + 1
+        ultima[vencedor] = ultima[perdedor] = onda
+        ondas[indice] = onda
+    return ondas
+
+
+def recalcular_ratings(historico: Iterable[Tuple[int, int]], iniciais: Optional[Dict[int, float]] = None,
+                       fator_k: float = FATOR_K) -> Dict[int, float]:
+    """Recalcula os ratings a partir do histórico (vencedor, perdedor) em ordem cronológica.
+
+    O resultado é o mesmo de aplicar as lutas uma a uma; robôs sem rating em `iniciais`
+    começam em RATING_INICIAL.
+    """
+    iniciais = iniciais or {}
+    indices: Dict[int, int] = {}
+    vencedores, perdedores = array('q'), array('q')
+    for id_vencedor, id_perdedor in historico:
+        vencedores.append(indices.setdefault(id_vencedor, len(indices)))
+        perdedores.append(indices.setdefault(id_perdedor, len(indices)))
+    ids = list(indices)
+    ratings = array('d', (iniciais.get(id_robo, RATING_INICIAL) for id_robo in ids))
+    if not vencedores:
+        return dict(zip(ids, ratings))
+
+    if np is None:
+        for vencedor, perdedor in zip(vencedores, perdedores):
+            variacao = variacao_elo(ratings[vencedor], ratings[perdedor], fator_k)
+            ratings[vencedor] += variacao
+            ratings[perdedor] -= variacao
+        return dict(zip(ids, ratings))
+
+    ondas = np.frombuffer(_ondas(vencedores, perdedores), dtype=np.int64)
+    ordem = np.argsort(ondas, kind="stable")
+    limites = np.searchsorted(ondas[ordem], np.arange(int(ondas.max()) + 2))
+    vencedores_np = np.frombuffer(vencedores, dtype=np.int64)[ordem]
+    perdedores_np = np.frombuffer(perdedores, dtype=np.int64)[ordem]
+    valores = np.array(ratings, dtype=np.float64)
+    for inicio, fim in zip(limites[:-1], limites[1:]):
+        # Dentro da onda nenhum robô se repete, então a atribuição indexada não colide
+        vencedor, perdedor = vencedores_np[inicio:fim], perdedores_np[inicio:fim]
+        variacao = fator_k / (1.0 + 10.0 ** ((valores[vencedor] - valores[perdedor]) / 400.0))
+        valores[vencedor] += variacao
+        valores[perdedor] -= variacao
+    return dict(zip(ids, valores.tolist()))
+
+
+def historico_de_lutas(eventos: Iterable) -> List[Tuple[int, int]]:
+    """Lutas concluídas dos eventos como (ID do robô vencedor, ID do robô perdedor), na ordem dos resultados."""
+    lutas = []
+    for evento in eventos:
+        for competicao in evento.competicoes:
+            chave = getattr(competicao, "chave_batalha", None)
+            if chave is not None:
+                lutas.extend(luta for luta in chave.lutas if luta.vencedor is not None)
+    lutas.sort(key=lambda luta: luta.sequencia_resultado)
+    historico = []
+    for luta in lutas:
+        perdedor = luta.competidor2 if luta.vencedor is luta.competidor1 else luta.competidor1
+        historico.append((luta.vencedor.robo.id, perdedor.robo.id))
+    return historico
+
+
+def recalcular_temporada(eventos: Iterable, robos: Iterable, fator_k: float = FATOR_K) -> Dict[int, float]:
+    """Zera e recalcula o rating dos `robos` a partir de todas as lutas dos eventos."""
+    robos = list(robos)
+    ratings = recalcular_ratings(historico_de_lutas(eventos), fator_k=fator_k)
+    with trava_dos_ratings:
+        for robo in robos:
+            robo.rating = ratings.get(robo.id, RATING_INICIAL)
+    return ratings
@@ -0,0 +1,163 @@
+from __future__ import annotations
+import asyncio
+import io
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from esqueleto import (
+    Competicao, CompeticaoCombate, CompeticaoSeguidorDeLinha, Evento, Inscricao, Juiz, LiderDeEquipe, Luta,
+    Organizador, PainelDeVisualizacao, Robo, TomadaDeTempo,
+)
+from identificadores import obter_por_id
+
+
+class ServicoDoTorneio:
+    """Fachada asyncio para o modelo de domínio.
+
+    Escritas são enfileiradas por competição em filas limitadas (backpressure) e aplicadas em
+    micro-lotes numa thread auxiliar, para que o fsync do diário dos juízes não trave o laço de
+    eventos. Leituras do painel também rodam fora do laço, porque tomam a trava da competição,
+    que o juiz segura enquanto espera o fsync; pedidos iguais que chegam na mesma volta do laço
+    compartilham uma única renderização.
+    """
+    def __init__(self, painel: Optional[PainelDeVisualizacao] = None, tamanho_fila: int = 1024,
+                 tamanho_lote: int = 256):
+        self.painel: PainelDeVisualizacao = painel or PainelDeVisualizacao()
+        self.tamanho_fila: int = tamanho_fila
+        self.tamanho_lote: int = tamanho_lote
+        # Por objeto, não por ID: um combate e um seguidor de linha podem ter o mesmo ID
+        self._filas: Dict[Competicao, asyncio.Queue] = {}
+        self._trabalhadores: Dict[Competicao, asyncio.Task] = {}
+        self._leituras_em_andamento: Dict[Tuple, asyncio.Future] = {}
+
+    # --- Escritas ---
+
+    async def _enfileirar(self, competicao: Competicao, operacao: Callable[[], Any]) -> Any:
+        fila = self._filas.get(competicao)
+        if fila is None:
+            fila = self._filas[competicao] = asyncio.Queue(self.tamanho_fila)
+            self._trabalhadores[competicao] = asyncio.create_task(self._processar_fila(fila))
+        futuro = asyncio.get_running_loop().create_future()
+        await fila.put((operacao, futuro))
+        return await futuro
+
+    async def _processar_fila(self, fila: asyncio.Queue):
+        while True:
+            lote = [await fila.get()]
+            while len(lote) < self.tamanho_lote and not fila.empty():
+                lote.append(fila.get_nowait())
+            resultados = await asyncio.to_thread(self._aplicar_lote, [operacao for operacao, _ in lote])
+            for (_, futuro), (sucesso, valor) in zip(lote, resultados):
+                if futuro.done():
+                    continue
+                if sucesso:
+                    futuro.set_result(valor)
+                else:
+                    futuro.set_exception(valor)
+            for _ in lote:
+                fila.task_done()
+
+    @staticmethod
+    def _aplicar_lote(operacoes: List[Callable[[], Any]]) -> List[Tuple[bool, Any]]:
+        resultados = []
+        for operacao in operacoes:
+            try:
+                resultados.append((True, operacao()))
+            except Exception as erro:
+                resultados.append((False, erro))
+        return resultados
+
+    async def inscrever_robo(self, lider: LiderDeEquipe, robo: Robo, competicao: Competicao) -> Inscricao:
+        return await self._enfileirar(competicao, lambda: lider.inscrever_robo(robo, competicao))
+
+    async def aprovar_inscricao(self, organizador: Organizador, inscricao: Inscricao):
+        return await self._enfileirar(inscricao.competicao, lambda: organizador.aprovar_inscricao(inscricao))
+
+    async def registrar_tomada_de_tempo(self, juiz: Juiz, inscricao: Inscricao, tempo: float) -> TomadaDeTempo:
+        return await self._enfileirar(inscricao.competicao, lambda: juiz.registrar_tomada_de_tempo(inscricao, tempo))
+
+    async def registrar_vencedor_luta(self, juiz: Juiz, luta: Luta, vencedor: Inscricao):
+        return await self._enfileirar(vencedor.competicao, lambda: juiz.registrar_vencedor_luta(luta, vencedor))
+
+    async def aguardar_escritas(self):
+        """Espera todas as escritas já enfileiradas serem aplicadas."""
+        await asyncio.gather(*(fila.join() for fila in self._filas.values()))
+
+    async def encerrar(self):
+        await self.aguardar_escritas()
+        for trabalhador in self._trabalhadores.values():
+            trabalhador.cancel()
+        await asyncio.gather(*self._trabalhadores.values(), return_exceptions=True)
+        self._filas.clear()
+        self._trabalhadores.clear()
+
+    # --- Leituras ---
+
+    async def _ler(self, chave: Tuple, renderizar: Callable[[io.StringIO], None]) -> str:
+        futuro = self._leituras_em_andamento.get(chave)
+        if futuro is None:
+            futuro = self._leituras_em_andamento[chave] = asyncio.ensure_future(self._renderizar(chave, renderizar))
+        return await asyncio.shield(futuro)
+
+    async def _renderizar(self, chave: Tuple, renderizar: Callable[[io.StringIO], None]) -> str:
+        # Começa na volta seguinte do laço; quem pedir depois daqui ganha uma renderização nova
+        del self._leituras_em_andamento[chave]
+        return await asyncio.to_thread(self._texto, renderizar)
+
+    @staticmethod
+    def _texto(renderizar: Callable[[io.StringIO], None]) -> str:
+        saida = io.StringIO()
+        renderizar(saida)
+        return saida.getvalue()
+
+    async def ver_classificacao_seguidor(self, competicao: CompeticaoSeguidorDeLinha, limite: Optional[int] = None) -> str:
+        return await self._ler(("classificacao", competicao, limite),
+                               lambda saida: self.painel.ver_classificacao_seguidor(competicao, limite, saida))
+
+    async def ver_chave_de_batalha(self, competicao: CompeticaoCombate) -> str:
+        return await self._ler(("chave", competicao),
+                               lambda saida: self.painel.ver_chave_de_batalha(competicao, saida))
+
+    async def ver_resultados_evento(self, evento: Evento) -> str:
+        return await self._ler(("evento", evento),
+                               lambda saida: self.painel.ver_resultados_evento(evento, saida))
+
+
+# --- Servidor TCP local (uma requisição JSON por linha, somente leitura) ---
+
+def _consulta(servico: ServicoDoTorneio, pedido: Dict[str, Any]) -> Awaitable[str]:
+    operacao = pedido.get("op")
+    if operacao == "classificacao":
+        competicao = obter_por_id(CompeticaoSeguidorDeLinha, pedido["competicao"])
+        if competicao is not None:
+            return servico.ver_classificacao_seguidor(competicao, pedido.get("limite"))
+    elif operacao == "chave":
+        competicao = obter_por_id(CompeticaoCombate, pedido["competicao"])
+        if competicao is not None:
+            return servico.ver_chave_de_batalha(competicao)
+    elif operacao == "evento":
+        evento = obter_por_id(Evento, pedido["evento"])
+        if evento is not None:
+            return servico.ver_resultados_evento(evento)
+    else:
+        raise ValueError("Operação desconhecida.")
+    raise KeyError("Registro não encontrado.")
+
+
+async def _atender_cliente(servico: ServicoDoTorneio, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+    try:
+        while linha := await leitor.readline():
+            try:
+                resposta = {"ok": True, "texto": await _consulta(servico, json.loads(linha))}
+            except (ValueError, KeyError) as erro:
+                resposta = {"ok": False, "erro": str(erro)}
+            escritor.write(json.dumps(resposta, ensure_ascii=False).encode("utf-8") + b"\n")
+            await escritor.drain()
+    finally:
+        escritor.close()
+
+
+async def iniciar_servidor(servico: ServicoDoTorneio, host: str = "127.0.0.1", porta: int = 8765) -> asyncio.AbstractServer:
+    """Abre o servidor do painel público; cada linha recebida é um JSON como
+    {"op": "classificacao", "competicao": 3, "limite": 10}."""
+    return await asyncio.start_server(lambda leitor, escritor: _atender_cliente(servico, leitor, escritor), host, porta)
@@ -0,0 +1,249 @@
+import random
+import time as relogio
+import pytest
+from datetime import date, datetime, time, timedelta
+from agenda_arenas import AgendaDeArenas, IndiceDeIntervalos
+from esqueleto import Organizador, Inscricao, Luta, Robo, StatusInscricao
+
+
+@pytest.fixture
+def evento():
+    organizador = Organizador("Org", "org@arenas.com", "123")
+    return organizador.criar_evento("Torneio de Arenas", date(2025, 10, 1), date(2025, 10, 2))
+
+
+def _luta(competicao, robo1, robo2):
+    return Luta(1, Inscricao(robo1, competicao), Inscricao(robo2, competicao))
+
+
+def test_indice_de_intervalos_detecta_conflitos_e_lacunas():
+    # Arrange
+    indice = IndiceDeIntervalos()
+    base = datetime(2025, 10, 1, 9)
+    indice.inserir(base, base + timedelta(minutes=10), 1)
+    indice.inserir(base + timedelta(minutes=30), base + timedelta(minutes=40), 2)
+
+    # Act / Assert
+    assert indice.conflito(base + timedelta(minutes=5), base + timedelta(minutes=15)) == 1
+    assert indice.conflito(base + timedelta(minutes=10), base + timedelta(minutes=30)) is None
+    assert indice.proximo_livre(base, timedelta(minutes=20)) == base + timedelta(minutes=10)
+    assert indice.proximo_livre(base, timedelta(minutes=25)) == base + timedelta(minutes=40)
+
+
+def test_indice_salta_blocos_e_preserva_pausas(evento):
+    # Arrange
+    base = datetime(2025, 10, 1, 9)
+    noite = (datetime(2025, 10, 1, 18), datetime(2025, 10, 2, 9))
+    indice = IndiceDeIntervalos([noite])
+    for minuto in range(0, 540, 10):
+        indice.inserir(base + timedelta(minutes=minuto), base + timedelta(minutes=minuto + 10), minuto)
+    estendida = (base + timedelta(minutes=540), base + timedelta(minutes=560))
+
+    # Act
+    livre_no_dia = indice.proximo_livre(base, timedelta(minutes=10))
+    indice.inserir(*estendida, 999)
+    indice.remover(estendida[0], 999)
+    indice.remover(base + timedelta(minutes=100), 100)
+
+    # Assert
+    assert livre_no_dia == noite[1]
+    assert indice.proximo_livre(base, timedelta(minutes=10)) == base + timedelta(minutes=100)
+    assert indice.proximo_livre(base, timedelta(minutes=20)) == noite[1]
+    assert indice.proximo_livre(noite[0], timedelta(minutes=1)) == noite[1]
+
+
+def test_robo_compartilhado_entre_competicoes_nao_luta_em_horarios_sobrepostos(evento):
+    # Arrange
+    combate_leve = evento.organizador.adicionar_competicao(evento, "Combate Leve", "combate")
+    combate_pesado = evento.organizador.adicionar_competicao(evento, "Combate Pesado", "combate")
+    compartilhado = Robo("Versátil", 1.0)
+    luta_leve = _luta(combate_leve, compartilhado, Robo("A", 1.0))
+    luta_pesada = _luta(combate_pesado, compartilhado, Robo("B", 1.0))
+    agenda = AgendaDeArenas(evento, ["Arena 1", "Arena 2"])
+
+    # Act
+    agenda.agendar(luta_leve)
+    agenda.agendar(luta_pesada)
+
+    # Assert
+    assert luta_pesada.inicio >= luta_leve.fim
+    assert agenda.conflito_de_robo(compartilhado.id, luta_leve.inicio, luta_leve.fim) == luta_leve.id
+
+
+def test_agendar_distribui_lutas_independentes_entre_arenas(evento):
+    # Arrange
+    combate = evento.organizador.adicionar_competicao(evento, "Combate", "combate")
+    lutas = [_luta(combate, Robo(f"R{n}a", 1.0), Robo(f"R{n}b", 1.0)) for n in range(3)]
+    agenda = AgendaDeArenas(evento, ["Arena 1", "Arena 2"])
+
+    # Act
+    horarios = [agenda.agendar(luta) for luta in lutas]
+
+    # Assert
+    inicio = datetime(2025, 10, 1, 9)
+    assert horarios == [("Arena 1", inicio), ("Arena 2", inicio), ("Arena 1", inicio + timedelta(minutes=10))]
+
+
+def test_agendar_rejeita_robo_indisponivel(evento):
+    # Arrange
+    combate = evento.organizador.adicionar_competicao(evento, "Combate", "combate")
+    quebrado = Robo("Quebrado", 1.0)
+    quebrado.disponivel = False
+    luta = _luta(combate, quebrado, Robo("Inteiro", 1.0))
+
+    # Act / Assert
+    with pytest.raises(ValueError, match="indisponível"):
+        AgendaDeArenas(evento, ["Arena 1"]).agendar(luta)
+
+
+def test_agendar_respeita_horario_e_datas_do_evento(evento):
+    # Arrange
+    combate = evento.organizador.adicionar_competicao(evento, "Combate", "combate")
+    agenda = AgendaDeArenas(evento, ["Arena 1"], duracao_luta=timedelta(hours=4),
+                            abertura=time(9), encerramento=time(18))
+    lutas = [_luta(combate, Robo(f"R{n}a", 1.0), Robo(f"R{n}b", 1.0)) for n in range(5)]
+
+    # Act
+    for luta in lutas[:4]:
+        agenda.agendar(luta)
+
+    # Assert
+    assert [luta.inicio for luta in lutas[:4]] == [datetime(2025, 10, 1, 9), datetime(2025, 10, 1, 13),
+                                                   datetime(2025, 10, 2, 9), datetime(2025, 10, 2, 13)]
+    with pytest.raises(ValueError, match="Sem horários"):
+        agenda.agendar(lutas[4])
+
+
+def test_luta_da_rodada_seguinte_comeca_depois_das_anteriores(evento):
+    # Arrange
+    combate = evento.organizador.adicionar_competicao(evento, "Combate", "combate")
+    for numero in range(4):
+        inscricao = Inscricao(Robo(f"Robo {numero}", 1.0), combate)
+        combate.receber_inscricao(inscricao)
+        inscricao.status = StatusInscricao.APROVADA
+    combate.gerar_estrutura()
+    chave = combate.chave_batalha
+    agenda = AgendaDeArenas(evento, ["Arena 1", "Arena 2"])
+    agenda.agendar_chave(chave.lutas)
+    chave.registrar_vencedor(chave.get_luta(2), chave.get_luta(2).competidor1)
+    chave.registrar_vencedor(chave.get_luta(3), chave.get_luta(3).competidor1)
+
+    # Act
+    agenda.agendar(chave.get_luta(1))
+
+    # Assert
+    assert chave.get_luta(1).inicio >= max(chave.get_luta(2).fim, chave.get_luta(3).fim)
+
+
+def test_registrar_atraso_reagenda_apenas_lutas_afetadas(evento):
+    # Arrange
+    combate = evento.organizador.adicionar_competicao(evento, "Combate", "combate")
+    robo = Robo("Atrasado", 1.0)
+    primeira = _luta(combate, robo, Robo("A", 1.0))
+    dependente = _luta(combate, robo, Robo("B", 1.0))
+    independente = _luta(combate, Robo("C", 1.0), Robo("D", 1.0))
+    agenda = AgendaDeArenas(evento, ["Arena 1", "Arena 2"])
+    for luta in (primeira, dependente, independente):
+        agenda.agendar(luta)
+    horario_independente = (independente.arena, independente.inicio)
+
+    # Act
+    reagendadas = agenda.registrar_atraso(primeira, primeira.fim + timedelta(minutes=15))
+
+    # Assert
+    assert reagendadas == [dependente]
+    assert dependente.inicio >= primeira.fim
+    assert (independente.arena, independente.inicio) == horario_independente
+    assert agenda.conflito_de_arena(dependente.arena, dependente.inicio, dependente.fim) == dependente.id
+
+
+def test_agenda_milhares_de_lutas_sem_conflitos(evento):
+    # Arrange
+    evento.data_fim = date(2025, 10, 10)
+    combate = evento.organizador.adicionar_competicao(evento, "Combate", "combate")
+    robos = [Robo(f"R{n}", 1.0) for n in range(200)]
+    lutas = [_luta(combate, robos[n % 200], robos[(n * 7 + 1) % 200]) for n in range(2000) if n % 200 != (n * 7 + 1) % 200]
+    agenda = AgendaDeArenas(evento, [f"Arena {n}" for n in range(8)], duracao_luta=timedelta(minutes=5))
+
+    # Act
+    for luta in lutas:
+        agenda.agendar(luta)
+
+    # Assert
+    por_robo = {}
+    for luta in lutas:
+        for inscricao in (luta.competidor1, luta.competidor2):
+            por_robo.setdefault(inscricao.robo.id, []).append((luta.inicio, luta.fim))
+    for intervalos in por_robo.values():
+        intervalos.sort()
+        assert all(anterior[1] <= seguinte[0] for anterior, seguinte in zip(intervalos, intervalos[1:]))
+
+
+def _tempo_de_agendar_chave(evento, competidores):
+    combate = evento.organizador.adicionar_competicao(evento, f"Combate {competidores}", "combate")
+    for numero in range(competidores):
+        inscricao = Inscricao(Robo(f"R{numero}", 1.0), combate)
+        combate.receber_inscricao(inscricao)
+        inscricao.status = StatusInscricao.APROVADA
+    combate.gerar_estrutura()
+    melhor = float("inf")
+    for _ in range(3):
+        agenda = AgendaDeArenas(evento, [f"Arena {n}" for n in range(4)])
+        inicio = relogio.perf_counter()
+        agendadas = agenda.agendar_chave(combate.chave_batalha.lutas)
+        melhor = min(melhor, relogio.perf_counter() - inicio)
+        for luta in combate.chave_batalha.lutas:
+            agenda.cancelar(luta)
+    return agendadas, melhor
+
+
+def test_agendar_chave_cresce_quase_linearmente(evento):
+    # Arrange
+    evento.data_fim = date(2025, 12, 31)
+
+    # Act
+    pequenas, tempo_pequeno = _tempo_de_agendar_chave(evento, 1024)
+    grandes, tempo_grande = _tempo_de_agendar_chave(evento, 8192)
+
+    # Assert
+    assert (pequenas, grandes) == (512, 4096)
+    # 8x mais lutas: O(n log n) fica perto de 8-10x; o percurso quadrático antigo passava de 60x
+    assert tempo_grande < 25 * tempo_pequeno
+
+
+def _sem_sobreposicao(lutas, recurso):
+    por_recurso = {}
+    for luta in lutas:
+        for chave in recurso(luta):
+            por_recurso.setdefault(chave, []).append((luta.inicio, luta.fim, luta.id))
+    for intervalos in por_recurso.values():
+        intervalos.sort()
+        if any(anterior[1] > seguinte[0] for anterior, seguinte in zip(intervalos, intervalos[1:])):
+            return False
+    return True
+
+
+def test_atrasos_aleatorios_nunca_sobrepoem_arena_ou_robo(evento):
+    # Arrange
+    combate = evento.organizador.adicionar_competicao(evento, "Combate", "combate")
+    cenarios = []
+    for semente in range(300):
+        gerador = random.Random(semente)
+        robos = [Robo(f"R{n}", 1.0) for n in range(12)]
+        lutas = [_luta(combate, *gerador.sample(robos, 2)) for _ in range(40)]
+        agenda = AgendaDeArenas(evento, ["A0", "A1", "A2"])
+        for luta in lutas:
+            agenda.agendar(luta)
+        cenarios.append((semente, gerador, lutas, agenda))
+
+    # Act
+    for _, gerador, lutas, agenda in cenarios:
+        for _ in range(5):
+            luta = gerador.choice(lutas)
+            agenda.registrar_atraso(luta, luta.fim + timedelta(minutes=gerador.randint(1, 30)))
+
+    # Assert
+    falhas = [semente for semente, _, lutas, _ in cenarios
+              if not _sem_sobreposicao(lutas, lambda luta: [luta.arena])
+              or not _sem_sobreposicao(lutas, lambda luta: [luta.competidor1.robo.id, luta.competidor2.robo.id])]
+    assert falhas == []
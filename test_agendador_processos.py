@@ -0,0 +1,75 @@
+import random
+import pytest
+from datetime import date
+from agendador_processos import AgendadorDeTorneio
+from esqueleto import Organizador, Inscricao, Robo, StatusInscricao, TomadaDeTempo
+from formatos import ChaveDuplaEliminacao, ChaveSuica, ELIMINATORIA_DUPLA, ELIMINATORIA_SIMPLES, SUICO
+
+
+@pytest.fixture
+def evento_grande():
+    organizador = Organizador("Org", "org@agenda.com", "123")
+    evento = organizador.criar_evento("Torneio Paralelo", date(2025, 9, 1), date(2025, 9, 3))
+    gerador = random.Random(5)
+    for numero in range(3):
+        combate = organizador.adicionar_competicao(evento, f"Combate {numero}", "combate")
+        seguidor = organizador.adicionar_competicao(evento, f"Seguidor {numero}", "seguidor")
+        for n in range(37 + numero):
+            inscricao = Inscricao(Robo(f"C{numero}-{n}", 1.0), combate)
+            combate.receber_inscricao(inscricao)
+            inscricao.status = StatusInscricao.APROVADA if n % 4 else StatusInscricao.REPROVADA
+        seguidor.receber_inscricoes(Inscricao(Robo(f"S{numero}-{n}", 0.5), seguidor) for n in range(40))
+        for inscricao in seguidor.inscricoes[:-3]:
+            for _ in range(gerador.randint(1, 5)):
+                inscricao.adicionar_tomada_de_tempo(TomadaDeTempo(round(gerador.uniform(8, 15), 1)))
+    return evento
+
+
+def _linhas(resultados):
+    return [(res.posicao, res.inscricao.id, res.melhor_tempo) for res in resultados]
+
+
+def _resumo_chave(competicao):
+    return [(luta.posicao, luta.rodada, luta.competidor1 and luta.competidor1.id, luta.competidor2 and luta.competidor2.id)
+            for luta in competicao.chave_batalha.lutas]
+
+
+def test_regenerar_coincide_com_gerar_cada_competicao(evento_grande):
+    # Arrange
+    combates = evento_grande.competicoes[0::2]
+    seguidores = evento_grande.competicoes[1::2]
+    for combate in combates:
+        combate.gerar_estrutura()
+    chaves_diretas = [_resumo_chave(combate) for combate in combates]
+
+    # Act
+    classificacoes = AgendadorDeTorneio().regenerar(evento_grande)
+
+    # Assert
+    assert [_resumo_chave(combate) for combate in combates] == chaves_diretas
+    assert len(classificacoes) == 3
+    for seguidor in seguidores:
+        assert _linhas(classificacoes[seguidor.id]) == _linhas(seguidor.gerar_classificacao(modo="vetorizado"))
+
+
+def test_regenerar_instala_chave_em_combate_sem_chave(evento_grande):
+    # Act
+    AgendadorDeTorneio().regenerar(evento_grande)
+
+    # Assert
+    assert all(competicao.chave_batalha.formato == ELIMINATORIA_SIMPLES for competicao in evento_grande.competicoes[0::2])
+
+
+def test_regenerar_mantem_o_formato_de_cada_chave(evento_grande):
+    # Arrange
+    suico, dupla, simples = evento_grande.competicoes[0::2]
+    suico.gerar_estrutura(SUICO, total_rodadas=3)
+    dupla.gerar_estrutura(ELIMINATORIA_DUPLA)
+
+    # Act
+    AgendadorDeTorneio().regenerar(evento_grande)
+
+    # Assert
+    assert isinstance(suico.chave_batalha, ChaveSuica) and suico.chave_batalha.total_rodadas == 3
+    assert isinstance(dupla.chave_batalha, ChaveDuplaEliminacao)
+    assert simples.chave_batalha.formato == ELIMINATORIA_SIMPLES
@@ -0,0 +1,195 @@
+import io
+import threading
+import pytest
+from datetime import date
+import arquivo_temporada
+from arquivo_temporada import abrir_temporada, arquivar_temporada, configurar_capacidade, descartar_nao_modificados, itens_carregados
+from esqueleto import Organizador, LiderDeEquipe, Juiz, PainelDeVisualizacao, StatusCompeticao
+from formatos import SUICO
+from identificadores import AlocadorSequencial, configurar_alocador, get_alocador
+
+
+@pytest.fixture
+def capacidade():
+    yield configurar_capacidade
+    descartar_nao_modificados()
+    configurar_capacidade(arquivo_temporada.CAPACIDADE_PADRAO)
+
+
+def _temporada(quantidade_eventos=2, robos=6, voltas=4):
+    organizador = Organizador("Org", "org@arquivo.com", "123")
+    lider = LiderDeEquipe("Líder", "lider@arquivo.com", "456")
+    lider.cadastrar_equipe("Equipe Arquivo")
+    for numero in range(robos):
+        lider.cadastrar_robo(f"Robo {numero}", 1.0)
+    juiz = Juiz("Juiz", "juiz@arquivo.com", "789")
+    eventos = []
+    for numero_evento in range(quantidade_eventos):
+        evento = organizador.criar_evento(f"Etapa {numero_evento}", date(2025, 3, 1), date(2025, 3, 2))
+        combate = organizador.adicionar_competicao(evento, "Combate", "combate")
+        seguidor = organizador.adicionar_competicao(evento, "Seguidor", "seguidor")
+        for inscricao in lider.inscrever_robos(lider.equipe.robos, combate):
+            organizador.aprovar_inscricao(inscricao)
+        combate.gerar_estrutura(SUICO if numero_evento % 2 else "Eliminatória Simples")
+        luta = combate.chave_batalha.lutas[0]
+        juiz.registrar_vencedor_luta(luta, luta.competidor2)
+        for indice, inscricao in enumerate(lider.inscrever_robos(lider.equipe.robos, seguidor)):
+            for volta in range(voltas):
+                juiz.registrar_tomada_de_tempo(inscricao, 30.0 - indice - volta / 10)
+        combate.status = StatusCompeticao.EM_ANDAMENTO
+        eventos.append(evento)
+    return eventos, lider.equipe
+
+
+def _telas(evento):
+    painel, saida = PainelDeVisualizacao(), io.StringIO()
+    painel.ver_resultados_evento(evento, saida)
+    combate, seguidor = evento.competicoes
+    painel.ver_chave_de_batalha(combate, saida)
+    painel.ver_classificacao_seguidor(seguidor, saida=saida)
+    return saida.getvalue()
+
+
+def test_abrir_carrega_so_o_cabecalho_dos_eventos(tmp_path, capacidade):
+    # Arrange
+    eventos, equipe = _temporada()
+    caminho = str(tmp_path / "temporada.db")
+    arquivar_temporada(caminho, eventos, [equipe])
+
+    # Act
+    arquivo = abrir_temporada(caminho)
+    texto = io.StringIO()
+    PainelDeVisualizacao().ver_resultados_evento(arquivo.eventos[0], texto)
+
+    # Assert
+    assert [evento.nome for evento in arquivo.eventos] == ["Etapa 0", "Etapa 1"]
+    assert "Combate - Status: Em Andamento" in texto.getvalue()
+    assert "competicoes" not in arquivo.eventos[1].__dict__
+    combate, seguidor = arquivo.eventos[0].competicoes
+    assert "inscricoes" not in combate.__dict__ and "chave_batalha" not in combate.__dict__
+    assert itens_carregados() == 2
+    assert [robo.nome for robo in arquivo.equipes[0].robos] == [robo.nome for robo in equipe.robos]
+    arquivo.fechar()
+
+
+def test_telas_do_arquivo_iguais_as_originais(tmp_path, capacidade):
+    # Arrange
+    eventos, equipe = _temporada()
+    caminho = str(tmp_path / "temporada.db")
+    arquivar_temporada(caminho, eventos, [equipe])
+    arquivo = abrir_temporada(caminho)
+
+    # Act
+    telas = [_telas(evento) for evento in arquivo.eventos]
+
+    # Assert
+    assert telas == [_telas(evento) for evento in eventos]
+    seguidor = arquivo.eventos[0].competicoes[1]
+    assert all("tomadas_de_tempo" not in insc.__dict__ for insc in seguidor.inscricoes)  # ranking sem voltas
+    original = eventos[0].competicoes[1].inscricoes[2].tomadas_de_tempo
+    voltas = seguidor.inscricoes[2].tomadas_de_tempo
+    assert [(v.id, v.tempo_em_segundos, v.instante, v.id_juiz) for v in voltas] == \
+           [(v.id, v.tempo_em_segundos, v.instante, v.id_juiz) for v in original]
+    arquivo.fechar()
+
+
+def test_descarta_o_mais_antigo_e_recarrega_no_acesso(tmp_path, capacidade):
+    # Arrange
+    eventos, equipe = _temporada(quantidade_eventos=1, robos=8, voltas=5)
+    caminho = str(tmp_path / "temporada.db")
+    arquivar_temporada(caminho, eventos, [equipe])
+    arquivo = abrir_temporada(caminho)
+    seguidor = arquivo.eventos[0].competicoes[1]
+    inscricoes = list(seguidor.inscricoes)
+    capacidade(20)
+
+    # Act
+    melhores = [min(volta.tempo_em_segundos for volta in insc.tomadas_de_tempo) for insc in inscricoes]
+
+    # Assert
+    assert itens_carregados() <= 20
+    assert "tomadas_de_tempo" not in inscricoes[0].__dict__
+    assert len(inscricoes[0].tomadas_de_tempo) == 5
+    assert melhores == [insc.melhor_tempo for insc in eventos[0].competicoes[1].inscricoes]
+    arquivo.fechar()
+
+
+def test_unidade_modificada_nao_e_descartada(tmp_path, capacidade):
+    # Arrange
+    eventos, equipe = _temporada(quantidade_eventos=1)
+    caminho = str(tmp_path / "temporada.db")
+    arquivar_temporada(caminho, eventos, [equipe])
+    arquivo = abrir_temporada(caminho)
+    combate, seguidor = arquivo.eventos[0].competicoes
+    assert len(combate.chave_batalha.lutas) == 5
+    inscricao = seguidor.inscricoes[0]
+
+    # Act
+    Juiz("Juiz", "juiz2@arquivo.com", "1").registrar_tomada_de_tempo(inscricao, 1.0)
+    descartar_nao_modificados()
+
+    # Assert
+    assert len(inscricao.tomadas_de_tempo) == 5
+    assert seguidor.gerar_classificacao(1)[0].inscricao is inscricao
+    assert "inscricoes" not in combate.__dict__ and "chave_batalha" not in combate.__dict__
+    assert "competicoes" in arquivo.eventos[0].__dict__
+    arquivo.fechar()
+
+
+def test_abrir_reserva_ids_ainda_nao_carregados(tmp_path, capacidade):
+    # Arrange
+    eventos, equipe = _temporada(quantidade_eventos=1)
+    caminho = str(tmp_path / "temporada.db")
+    arquivar_temporada(caminho, eventos, [equipe])
+    arquivadas = [volta.id for insc in eventos[0].competicoes[1].inscricoes for volta in insc.tomadas_de_tempo]
+    anterior = get_alocador()
+    configurar_alocador(AlocadorSequencial())
+
+    # Act
+    try:
+        arquivo = abrir_temporada(caminho)
+        inscricao = arquivo.eventos[0].competicoes[1].inscricoes[0]
+        nova = Juiz("Juiz", "juiz3@arquivo.com", "1").registrar_tomada_de_tempo(inscricao, 1.0)
+    finally:
+        configurar_alocador(anterior)
+
+    # Assert
+    assert nova.id > max(arquivadas)
+    arquivo.fechar()
+
+
+def test_carga_e_trava_da_competicao_na_mesma_ordem(tmp_path, capacidade, monkeypatch):
+    # Arrange
+    eventos, equipe = _temporada(quantidade_eventos=1)
+    caminho = str(tmp_path / "temporada.db")
+    arquivar_temporada(caminho, eventos, [equipe])
+    arquivo = abrir_temporada(caminho)
+    combate, seguidor = arquivo.eventos[0].competicoes
+    carga_comecou, leitor_com_a_trava = threading.Event(), threading.Event()
+    consultar = type(arquivo)._consultar
+
+    def consultar_devagar(self, sql, *parametros):
+        # A carga espera (com limite) o leitor pegar a trava do seguidor antes de entregar as inscrições
+        carga_comecou.set()
+        leitor_com_a_trava.wait(0.5)
+        return consultar(self, sql, *parametros)
+    monkeypatch.setattr(type(arquivo), "_consultar", consultar_devagar)
+
+    def ler_segurando_a_trava():
+        with seguidor.trava:
+            leitor_com_a_trava.set()
+            len(combate.inscricoes)
+
+    # Act
+    carga = threading.Thread(target=lambda: len(seguidor.inscricoes), daemon=True)
+    carga.start()
+    carga_comecou.wait(5)
+    leitor = threading.Thread(target=ler_segurando_a_trava, daemon=True)
+    leitor.start()
+    carga.join(5)
+    leitor.join(5)
+
+    # Assert
+    assert not carga.is_alive() and not leitor.is_alive()
+    assert len(seguidor.inscricoes) == len(combate.inscricoes) == 6
+    arquivo.fechar()
@@ -0,0 +1,89 @@
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from arquivo_voltas import ArquivoDeVoltas, registros, selar_competicao
+from esqueleto import Organizador, LiderDeEquipe, Juiz, StatusCompeticao, TomadaDeTempo
+
+
+@pytest.fixture
+def seguidor():
+    organizador = Organizador("Org", "org@voltas.com", "123")
+    evento = organizador.criar_evento("Etapa", date(2025, 4, 1), date(2025, 4, 2))
+    seguidor = organizador.adicionar_competicao(evento, "Seguidor", "seguidor")
+    lider = LiderDeEquipe("Líder", "lider@voltas.com", "456")
+    lider.cadastrar_equipe("Equipe Voltas")
+    for numero in range(4):
+        lider.cadastrar_robo(f"Robo {numero}", 1.0)
+    juiz = Juiz("Juiz", "juiz@voltas.com", "789")
+    inicio = datetime(2025, 4, 1, 10).timestamp()
+    for indice, inscricao in enumerate(lider.inscrever_robos(lider.equipe.robos[:3], seguidor)):
+        for volta, tempo in enumerate((25.0, 20.0 - indice, 22.0)):
+            inscricao.adicionar_tomada_de_tempo(TomadaDeTempo(tempo, inicio + 60 * (3 * volta + indice), juiz.id))
+    seguidor.status = StatusCompeticao.FINALIZADA
+    return seguidor
+
+
+def _melhor_em_outro_processo(caminho, id_inscricao):
+    with ArquivoDeVoltas(caminho) as arquivo:
+        return arquivo.melhor_volta(id_inscricao).tempo_em_segundos
+
+
+def test_selar_exige_competicao_finalizada(seguidor, tmp_path):
+    # Arrange
+    seguidor.status = StatusCompeticao.EM_ANDAMENTO
+
+    # Act / Assert
+    with pytest.raises(ValueError, match="finalizadas"):
+        selar_competicao(seguidor, str(tmp_path / "voltas.bin"))
+
+
+def test_consultas_por_inscricao_robo_e_janela(seguidor, tmp_path):
+    # Arrange
+    inscricao = seguidor.inscricoes[1]
+
+    # Act
+    arquivo = selar_competicao(seguidor, str(tmp_path / "voltas.bin"), liberar=False)
+
+    # Assert
+    assert arquivo.total_voltas == 9 and arquivo.total_inscricoes == 3
+    assert arquivo.melhor_volta(inscricao.id).tempo_em_segundos == 19.0
+    fatia = arquivo.voltas_da_inscricao(inscricao.id)
+    assert isinstance(fatia, memoryview) and fatia.readonly
+    assert [tempo for _, tempo, *_ in registros(fatia)] == [19.0, 22.0, 25.0]
+    assert [registro[0] for registro in registros(arquivo.historico_do_robo(inscricao.robo.id))] == [inscricao.id] * 3
+    assert len(arquivo.historico_do_robo(-1)) == 0
+    janela = list(arquivo.voltas_entre(datetime(2025, 4, 1, 10, 2), datetime(2025, 4, 1, 10, 5)))
+    assert [(id_inscricao, volta.tempo_em_segundos) for id_inscricao, volta in janela] == [
+        (seguidor.inscricoes[2].id, 25.0), (seguidor.inscricoes[0].id, 20.0), (seguidor.inscricoes[1].id, 19.0)]
+    assert arquivo.melhor_volta(-1) is None
+    del fatia
+    arquivo.fechar()
+
+
+def test_selar_libera_voltas_e_recarrega_do_arquivo(seguidor, tmp_path):
+    # Arrange
+    inscricao = seguidor.inscricoes[0]
+    originais = [(v.id, v.tempo_em_segundos, v.instante, v.id_juiz) for v in inscricao.tomadas_de_tempo]
+
+    # Act
+    arquivo = selar_competicao(seguidor, str(tmp_path / "voltas.bin"))
+    liberada = "tomadas_de_tempo" not in inscricao.__dict__
+
+    # Assert
+    assert liberada
+    assert [r.inscricao for r in seguidor.gerar_classificacao()] == [seguidor.inscricoes[i] for i in (2, 1, 0)]
+    assert [(v.id, v.tempo_em_segundos, v.instante, v.id_juiz) for v in inscricao.tomadas_de_tempo] == originais
+
+
+def test_outros_processos_leem_o_mesmo_arquivo(seguidor, tmp_path):
+    # Arrange
+    caminho = str(tmp_path / "voltas.bin")
+    selar_competicao(seguidor, caminho, liberar=False).fechar()
+    ids = [inscricao.id for inscricao in seguidor.inscricoes]
+
+    # Act
+    with ProcessPoolExecutor(2) as executor:
+        melhores = list(executor.map(_melhor_em_outro_processo, [caminho] * 3, ids))
+
+    # Assert
+    assert melhores == [20.0, 19.0, 18.0]
@@ -0,0 +1,172 @@
+import asyncio
+import threading
+import pytest
+import autenticacao
+import esqueleto
+from autenticacao import (
+    ALGORITMO, CUSTO_MINIMO, Autenticador, CacheDeSessoes, DiretorioDeUsuarios, ErroDeAutenticacao, configurar_custo,
+    gerar_hash_de_senha, precisa_novo_hash, verificar_hash,
+)
+from esqueleto import Organizador, LiderDeEquipe, Juiz
+
+
+@pytest.fixture
+def custo_baixo():
+    """Logins de verdade, mas com o custo mínimo: estes testes medem o fluxo, não o hash."""
+    anterior = configurar_custo(CUSTO_MINIMO)
+    yield
+    configurar_custo(anterior)
+
+
+@pytest.fixture
+def autenticador(custo_baixo):
+    juiz = Juiz("Carlos", "carlos@auth.com", "senha-do-juiz")
+    lider = LiderDeEquipe("Maria", "maria@auth.com", "senha-da-lider")
+    autenticador = Autenticador(DiretorioDeUsuarios([juiz, lider]))
+    yield autenticador, juiz, lider
+    autenticador.encerrar()
+
+
+def test_hash_tem_sal_e_custo_ajustavel():
+    # Arrange
+    senha = "correta"
+
+    # Act
+    primeiro, segundo = gerar_hash_de_senha(senha, custo=5), gerar_hash_de_senha(senha, custo=5)
+
+    # Assert
+    assert primeiro != segundo and primeiro.startswith(f"{ALGORITMO}$5$")
+    assert verificar_hash(senha, primeiro) and verificar_hash(senha, segundo)
+    assert not verificar_hash("errada", primeiro)
+    anterior = configurar_custo(6)
+    try:
+        assert precisa_novo_hash(primeiro) and not precisa_novo_hash(gerar_hash_de_senha(senha))
+    finally:
+        configurar_custo(anterior)
+    with pytest.raises(ValueError):
+        configurar_custo(1)
+
+
+def test_usuario_guarda_so_o_hash(custo_baixo):
+    # Arrange
+    organizador = Organizador("Org", "org@auth.com", "segredo")
+    guardado = list(vars(organizador).values())
+
+    # Act
+    senha_hash = organizador.senha_hash
+
+    # Assert
+    assert "segredo" not in guardado
+    assert "segredo" not in senha_hash and "segredo" not in vars(organizador).values()
+    assert organizador.verificar_senha("segredo") and not organizador.verificar_senha("outra")
+    assert not Organizador("Sem senha", "vazio@auth.com", None).verificar_senha("")
+
+
+def test_login_abre_sessao_validada_sem_novo_hash(autenticador, monkeypatch):
+    # Arrange
+    autenticador, juiz, _ = autenticador
+    token = autenticador.autenticar("CARLOS@auth.com ", "senha-do-juiz")
+    chamadas = []
+    monkeypatch.setattr(esqueleto, "verificar_hash", lambda *argumentos: chamadas.append(argumentos))
+
+    # Act
+    usuarios = [autenticador.validar(token) for _ in range(100)]
+
+    # Assert
+    assert usuarios == [juiz] * 100 and chamadas == []
+    autenticador.sair(token)
+    with pytest.raises(ErroDeAutenticacao):
+        autenticador.validar(token)
+    with pytest.raises(ValueError, match="já cadastrado"):
+        autenticador.diretorio.cadastrar(Juiz("Outro", "carlos@auth.com", "x"))
+
+
+def test_credenciais_invalidas_sao_recusadas(autenticador):
+    # Arrange
+    autenticador, _, lider = autenticador
+
+    # Act / Assert
+    with pytest.raises(ErroDeAutenticacao):
+        autenticador.autenticar("maria@auth.com", "senha-do-juiz")
+    with pytest.raises(ErroDeAutenticacao):
+        autenticador.autenticar("ninguem@auth.com", "senha-da-lider")
+    token = autenticador.autenticar("maria@auth.com", "senha-da-lider")
+    autenticador.trocar_senha(token, "senha-da-lider", "nova")
+    with pytest.raises(ErroDeAutenticacao):
+        autenticador.validar(token)
+    assert autenticador.validar(autenticador.autenticar("maria@auth.com", "nova")) is lider
+
+
+def test_sessoes_expiram_pelo_ttl():
+    # Arrange
+    agora = [0.0]
+    cache = CacheDeSessoes(ttl=60, relogio=lambda: agora[0])
+    usuario = Juiz("Juiz", "juiz@ttl.com", "x")
+    antiga = cache.criar(usuario)
+    agora[0] = 30.0
+    recente = cache.criar(usuario)
+
+    # Act
+    agora[0] = 61.0
+    restantes = len(cache)
+
+    # Assert
+    assert restantes == 1
+    assert cache.validar(antiga.token) is None and cache.validar(recente.token) is usuario
+    agora[0] = 91.0
+    assert cache.validar(recente.token) is None
+
+
+def test_entrar_faz_o_hash_fora_do_laco_de_eventos(autenticador, monkeypatch):
+    # Arrange
+    autenticador, juiz, lider = autenticador
+    threads = []
+    original = autenticacao.verificar_hash
+
+    def verificar(senha, hash_senha):
+        threads.append(threading.current_thread())
+        return original(senha, hash_senha)
+
+    monkeypatch.setattr(esqueleto, "verificar_hash", verificar)
+
+    async def logins():
+        return await asyncio.gather(*(autenticador.entrar(email, senha) for email, senha in (
+            ("carlos@auth.com", "senha-do-juiz"), ("maria@auth.com", "senha-da-lider")) * 5))
+
+    # Act
+    tokens = asyncio.run(logins())
+
+    # Assert
+    assert len(set(tokens)) == 10
+    assert [autenticador.validar(token) for token in tokens[:2]] == [juiz, lider]
+    assert len(threads) == 10 and threading.main_thread() not in threads
+
+
+def test_hash_sai_da_construcao_para_os_trabalhadores(custo_baixo, monkeypatch):
+    # Arrange
+    liberar, calculados = threading.Event(), []
+    original = autenticacao.gerar_hash_de_senha
+
+    def gerar_depois_de_liberado(senha, custo=None):
+        liberar.wait(5)
+        calculados.append((senha, threading.current_thread()))
+        return original(senha, custo)
+
+    monkeypatch.setattr(autenticacao, "gerar_hash_de_senha", gerar_depois_de_liberado)
+    restaurado = Juiz("Juiz", "juiz@auth.com", None, gerar_hash_de_senha("do-snapshot"))
+
+    # Act
+    try:
+        lideres = [LiderDeEquipe(f"Líder {numero}", f"lider{numero}@auth.com", f"senha{numero}") for numero in range(20)]
+        guardado = [valor for lider in lideres for valor in vars(lider).values()]
+    finally:
+        liberar.set()
+    conferidos = lideres[3].verificar_senha("senha3") and restaurado.verificar_senha("do-snapshot")
+    hashes = [lider.senha_hash for lider in lideres]
+
+    # Assert
+    assert not any(isinstance(valor, str) and valor.startswith("senha") for valor in guardado)
+    assert conferidos and all(verificar_hash(f"senha{numero}", hashes[numero]) for numero in range(20))
+    assert sorted(senha for senha, _ in calculados) == sorted(f"senha{numero}" for numero in range(20))
+    assert threading.main_thread() not in {thread for _, thread in calculados}
+
@@ -0,0 +1,44 @@
+import json
+from benchmarks.geradores import gerar_cenario
+from benchmarks.torneio import comparar, executar_suite, main
+
+OPERACOES = ["inscrever_robo", "aprovar_inscricao", "gerar_estrutura", "registrar_tomada_de_tempo",
+             "gerar_classificacao", "registrar_vencedor_luta", "painel"]
+
+
+def test_gerador_com_semente_e_reproduzivel():
+    # Act
+    primeiro, segundo = gerar_cenario(50, semente=7), gerar_cenario(50, semente=7)
+
+    # Assert
+    resumo = lambda c: [(robo.peso, robo.rating, comp.nome) for _, robo, comp in c.destinos]
+    assert resumo(primeiro) == resumo(segundo)
+    assert len(primeiro.lideres) == 5
+
+
+def test_suite_mede_todas_as_operacoes(tmp_path):
+    # Arrange
+    caminho = tmp_path / "bench.json"
+
+    # Act
+    codigo = main(["--tamanhos", "10", "40", "--saida", str(caminho)])
+
+    # Assert
+    resultado = json.loads(caminho.read_text(encoding="utf-8"))
+    assert codigo == 0
+    assert [linha["operacao"] for linha in resultado["resultados"]] == OPERACOES * 2
+    assert all(linha["pico_memoria"] is not None and linha["segundos"] > 0 for linha in resultado["resultados"])
+    assert resultado["resultados"][-1]["operacoes"] == 3
+
+
+def test_comparar_aponta_regressoes():
+    # Arrange
+    anterior = executar_suite([10], memoria=False)
+    atual = json.loads(json.dumps(anterior))
+    atual["resultados"][0]["operacoes_por_segundo"] /= 2
+
+    # Act
+    regressoes = comparar(anterior, atual)
+
+    # Assert
+    assert [(r["operacao"], r["metrica"]) for r in regressoes] == [("inscrever_robo", "operacoes_por_segundo")]
@@ -0,0 +1,114 @@
+import io
+import threading
+import pytest
+from datetime import date
+from cache_painel import CacheLRU
+from esqueleto import ChaveDeBatalha, Organizador, LiderDeEquipe, Juiz, PainelDeVisualizacao, StatusCompeticao
+
+
+@pytest.fixture
+def cenario():
+    organizador = Organizador("Org", "org@cache.com", "123")
+    evento = organizador.criar_evento("Torneio Cache", date(2025, 8, 1), date(2025, 8, 2))
+    lider = LiderDeEquipe("Líder", "lider@cache.com", "456")
+    lider.cadastrar_equipe("Equipe Cache")
+    robos = [lider.cadastrar_robo(f"Robo {n}", 0.5) for n in range(2)]
+    seguidor = organizador.adicionar_competicao(evento, "Seguidor", "seguidor")
+    inscricoes = lider.inscrever_robos(robos, seguidor)
+    Juiz("Juiz", "juiz@cache.com", "x").registrar_tomada_de_tempo(inscricoes[0], 12.0)
+    return evento, seguidor, inscricoes
+
+
+def test_visualizacoes_repetidas_reaproveitam_o_cache(cenario):
+    # Arrange
+    _, seguidor, _ = cenario
+    cache = CacheLRU()
+    painel = PainelDeVisualizacao(cache)
+    chamadas = []
+    gerar_original = seguidor.gerar_classificacao
+    seguidor.gerar_classificacao = lambda limite=None: chamadas.append(limite) or gerar_original(limite)
+
+    # Act
+    textos = []
+    for _ in range(5):
+        saida = io.StringIO()
+        painel.ver_classificacao_seguidor(seguidor, saida=saida)
+        textos.append(saida.getvalue())
+
+    # Assert
+    assert len(chamadas) == 1
+    assert len(set(textos)) == 1
+    assert cache.acertos == 4
+
+
+def test_mutacao_incrementa_versao_e_invalida_o_texto(cenario):
+    # Arrange
+    evento, seguidor, inscricoes = cenario
+    painel = PainelDeVisualizacao(CacheLRU())
+    antes, depois, evento_antes, evento_depois = (io.StringIO() for _ in range(4))
+    painel.ver_classificacao_seguidor(seguidor, saida=antes)
+    painel.ver_resultados_evento(evento, saida=evento_antes)
+    versao = seguidor.versao
+
+    # Act
+    Juiz("Juiz", "juiz@cache.com", "x").registrar_tomada_de_tempo(inscricoes[1], 11.0)
+    seguidor.status = StatusCompeticao.EM_ANDAMENTO
+    painel.ver_classificacao_seguidor(seguidor, saida=depois)
+    painel.ver_resultados_evento(evento, saida=evento_depois)
+
+    # Assert
+    assert seguidor.versao > versao
+    assert "1º: Robo 1 (11.0s)" in depois.getvalue()
+    assert "Inscrições Abertas" in evento_antes.getvalue()
+    assert "Em Andamento" in evento_depois.getvalue()
+
+
+def test_cache_lru_descarta_o_item_menos_usado():
+    # Arrange
+    cache = CacheLRU(capacidade=2)
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+
+    # Act
+    cache.obter("a")
+    cache.guardar("c", 3)
+
+    # Assert
+    assert cache.obter("b") is None
+    assert cache.obter("a") == 1 and cache.obter("c") == 3
+
+
+def test_leitura_no_meio_de_um_resultado_nao_fica_no_cache(cenario, monkeypatch):
+    # Arrange
+    evento, _, _ = cenario
+    organizador = evento.organizador
+    combate = organizador.adicionar_competicao(evento, "Combate", "combate")
+    lider = LiderDeEquipe("Líder 2", "lider2@cache.com", "1")
+    lider.cadastrar_equipe("Equipe Combate")
+    for inscricao in lider.inscrever_robos([lider.cadastrar_robo(f"R{n}", 1.0) for n in range(4)], combate):
+        organizador.aprovar_inscricao(inscricao)
+    combate.gerar_estrutura()
+    painel = PainelDeVisualizacao(CacheLRU())
+    leitores = []
+    avancar_original = ChaveDeBatalha.avancar_vencedor
+
+    def avancar_com_leitura_concorrente(chave, luta):
+        # Outra thread lê o painel entre o registro do resultado e o avanço do vencedor
+        leitor = threading.Thread(target=painel.ver_chave_de_batalha, args=(combate, io.StringIO()))
+        leitor.start()
+        leitor.join(0.2)
+        leitores.append(leitor)
+        avancar_original(chave, luta)
+
+    monkeypatch.setattr(ChaveDeBatalha, "avancar_vencedor", avancar_com_leitura_concorrente)
+    luta = combate.chave_batalha.lutas[0]
+
+    # Act
+    Juiz("Juiz 2", "juiz2@cache.com", "1").registrar_vencedor_luta(luta, luta.competidor1)
+    for leitor in leitores:
+        leitor.join()
+    saida = io.StringIO()
+    painel.ver_chave_de_batalha(combate, saida)
+
+    # Assert
+    assert f"{luta.competidor1.robo.nome} x A definir" in saida.getvalue()
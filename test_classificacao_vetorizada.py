@@ -0,0 +1,45 @@
+import random
+import pytest
+import classificacao_vetorizada
+from esqueleto import CompeticaoSeguidorDeLinha, Inscricao, Robo, TomadaDeTempo
+
+
+@pytest.fixture
+def competicao_com_voltas():
+    competicao = CompeticaoSeguidorDeLinha("Seguidor Grande", None)
+    gerador = random.Random(11)
+    inscricoes = [Inscricao(Robo(f"Robo {n}", 0.5), competicao) for n in range(300)]
+    competicao.receber_inscricoes(inscricoes)
+    for inscricao in inscricoes[:-10]:  # as últimas ficam sem volta
+        for _ in range(gerador.randint(1, 12)):
+            inscricao.adicionar_tomada_de_tempo(TomadaDeTempo(round(gerador.uniform(9, 20), 1)))
+    return competicao
+
+
+def _linhas(resultados):
+    return [(res.posicao, res.inscricao.id, res.melhor_tempo) for res in resultados]
+
+
+@pytest.mark.parametrize("com_numpy", [False, True])
+def test_modo_vetorizado_coincide_com_ranking_incremental(competicao_com_voltas, monkeypatch, com_numpy):
+    # Arrange
+    if com_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(classificacao_vetorizada, "np", None)
+
+    # Act
+    incremental = competicao_com_voltas.gerar_classificacao()
+    vetorizada = competicao_com_voltas.gerar_classificacao(modo="vetorizado")
+    top10 = competicao_com_voltas.gerar_classificacao(limite=10, modo="vetorizado")
+
+    # Assert
+    assert len(vetorizada) == 290
+    assert _linhas(vetorizada) == _linhas(incremental)
+    assert _linhas(top10) == _linhas(incremental[:10])
+
+
+def test_modo_de_classificacao_invalido_lanca_erro(competicao_com_voltas):
+    # Act & Assert
+    with pytest.raises(ValueError, match="Modo de classificação inválido"):
+        competicao_com_voltas.gerar_classificacao(modo="mágico")
@@ -1,7 +1,9 @@
+import io
 import pytest
 from esqueleto import (
     CompeticaoCombate, CompeticaoSeguidorDeLinha, Evento, Robo, Inscricao, 
-    StatusInscricao, Resultado, TomadaDeTempo
+    StatusInscricao, Resultado, TomadaDeTempo, Juiz, StatusLuta, PainelDeVisualizacao,
+    AtualizacaoClassificacao, AtualizacaoLuta
 )
 
 @pytest.fixture
@@ -55,4 +57,156 @@ def test_inscricao_get_melhor_tempo_com_lista_vazia():
     melhor_tempo = inscricao.get_melhor_tempo()
     
     # Assert
-    assert melhor_tempo is None
\ No newline at end of file
+    assert melhor_tempo is None
+
+def test_gerar_classificacao_ordena_pelo_melhor_tempo(evento_vazio):
+    # Arrange
+    comp_seguidor = CompeticaoSeguidorDeLinha("Seguidor Rápido", evento_vazio)
+    inscricoes = [Inscricao(Robo(nome, 0.5), comp_seguidor) for nome in ("A", "B", "C")]
+    for inscricao in inscricoes:
+        comp_seguidor.receber_inscricao(inscricao)
+
+    # Act
+    inscricoes[0].adicionar_tomada_de_tempo(TomadaDeTempo(15.0))
+    inscricoes[1].adicionar_tomada_de_tempo(TomadaDeTempo(12.0))
+    inscricoes[2].adicionar_tomada_de_tempo(TomadaDeTempo(20.0))
+    inscricoes[2].adicionar_tomada_de_tempo(TomadaDeTempo(11.5))
+    classificacao = comp_seguidor.gerar_classificacao()
+
+    # Assert
+    assert [res.inscricao.robo.nome for res in classificacao] == ["C", "B", "A"]
+    assert [res.posicao for res in classificacao] == [1, 2, 3]
+    assert classificacao[0].melhor_tempo == 11.5
+    assert inscricoes[2].get_melhor_tempo() == 11.5
+
+
+def test_gerar_classificacao_com_limite_e_empate(evento_vazio):
+    # Arrange
+    comp_seguidor = CompeticaoSeguidorDeLinha("Seguidor Empate", evento_vazio)
+    tempos = {"A": 10.0, "B": 10.0, "C": 9.0, "D": 13.0}
+    for nome, tempo in tempos.items():
+        inscricao = Inscricao(Robo(nome, 0.5), comp_seguidor)
+        comp_seguidor.receber_inscricao(inscricao)
+        inscricao.adicionar_tomada_de_tempo(TomadaDeTempo(tempo))
+
+    # Act
+    top3 = comp_seguidor.gerar_classificacao(limite=3)
+
+    # Assert
+    assert [(res.posicao, res.inscricao.robo.nome) for res in top3] == [(1, "C"), (2, "A"), (2, "B")]
+
+
+def test_painel_classificacao_escreve_na_saida_informada(evento_vazio):
+    # Arrange
+    comp_seguidor = CompeticaoSeguidorDeLinha("Seguidor Painel", evento_vazio)
+    inscricao = Inscricao(Robo("Veloz", 0.5), comp_seguidor)
+    comp_seguidor.receber_inscricao(inscricao)
+    inscricao.adicionar_tomada_de_tempo(TomadaDeTempo(9.5))
+    saida = io.StringIO()
+
+    # Act
+    PainelDeVisualizacao().ver_classificacao_seguidor(comp_seguidor, saida=saida)
+
+    # Assert
+    assert "1º: Veloz (9.5s)" in saida.getvalue()
+
+
+def _combate_com_aprovados(evento, quantidade):
+    comp_combate = CompeticaoCombate("Combate Chave", evento)
+    for numero in range(quantidade):
+        inscricao = Inscricao(Robo(f"Robo {numero + 1}", 1.0), comp_combate)
+        comp_combate.receber_inscricao(inscricao)
+        inscricao.status = StatusInscricao.APROVADA
+    return comp_combate
+
+
+def test_gerar_estrutura_combate_cria_lutas_com_byes(evento_vazio):
+    # Arrange
+    comp_combate = _combate_com_aprovados(evento_vazio, 5)
+
+    # Act
+    comp_combate.gerar_estrutura()
+    chave = comp_combate.chave_batalha
+
+    # Assert
+    primeira_rodada = [luta for luta in chave.lutas if luta.rodada == 1]
+    assert len(chave.lutas) == 4  # n - 1 lutas numa eliminatória simples
+    assert len(primeira_rodada) == 1
+    assert {primeira_rodada[0].competidor1.robo.nome, primeira_rodada[0].competidor2.robo.nome} == {"Robo 4", "Robo 5"}
+    assert chave.get_luta(2).competidor1.robo.nome == "Robo 1"  # semente 1 passa direto pelo bye
+
+
+def test_juiz_registrar_vencedor_avanca_ate_o_campeao(evento_vazio):
+    # Arrange
+    juiz = Juiz("Juiz", "juiz@teste.com", "123")
+    comp_combate = _combate_com_aprovados(evento_vazio, 4)
+    comp_combate.gerar_estrutura()
+    chave = comp_combate.chave_batalha
+
+    # Act
+    for luta in list(chave.lutas):
+        juiz.registrar_vencedor_luta(luta, luta.competidor1)
+
+    # Assert
+    final = chave.get_luta(1)
+    assert final.status == StatusLuta.CONCLUIDA
+    assert chave.campeao is final.vencedor
+    assert chave.campeao.robo.nome == "Robo 1"
+
+
+def test_chave_com_4096_inscricoes_avanca_pela_posicao(evento_vazio):
+    # Arrange
+    comp_combate = _combate_com_aprovados(evento_vazio, 4096)
+    comp_combate.gerar_estrutura()
+    chave = comp_combate.chave_batalha
+    luta = chave.lutas[0]
+
+    # Act
+    luta.registrar_resultado(luta.competidor2)
+    chave.avancar_vencedor(luta)
+
+    # Assert
+    assert len(chave.lutas) == 4095
+    luta_seguinte = chave.get_luta(luta.posicao // 2)
+    assert luta.competidor2 in (luta_seguinte.competidor1, luta_seguinte.competidor2)
+
+
+def test_assinante_recebe_apenas_a_linha_que_mudou(evento_vazio):
+    # Arrange
+    comp_seguidor = CompeticaoSeguidorDeLinha("Seguidor Ao Vivo", evento_vazio)
+    inscricoes = [Inscricao(Robo(nome, 0.5), comp_seguidor) for nome in ("A", "B", "C")]
+    comp_seguidor.receber_inscricoes(inscricoes)
+    for inscricao, tempo in zip(inscricoes, (10.0, 11.0, 12.0)):
+        inscricao.adicionar_tomada_de_tempo(TomadaDeTempo(tempo))
+    recebidas = []
+    comp_seguidor.assinar(recebidas.append)
+    saida = io.StringIO()
+    PainelDeVisualizacao().acompanhar(comp_seguidor, saida)
+
+    # Act
+    Juiz("Juiz", "juiz@teste.com", "123").registrar_tomada_de_tempo(inscricoes[2], 9.5)
+
+    # Assert
+    assert len(recebidas) == 1
+    delta = recebidas[0]
+    assert isinstance(delta, AtualizacaoClassificacao)
+    assert (delta.inscricao, delta.linha_anterior, delta.linha_nova, delta.melhor_tempo) == (inscricoes[2], 3, 1, 9.5)
+    assert saida.getvalue() == "C: 3º -> 1º (novo melhor 9.5s)\n"
+
+
+def test_assinante_recebe_conclusao_de_luta(evento_vazio):
+    # Arrange
+    comp_combate = _combate_com_aprovados(evento_vazio, 2)
+    comp_combate.gerar_estrutura()
+    recebidas = []
+    comp_combate.assinar(recebidas.append)
+    final = comp_combate.chave_batalha.get_luta(1)
+
+    # Act
+    Juiz("Juiz", "juiz@teste.com", "123").registrar_vencedor_luta(final, final.competidor1)
+
+    # Assert
+    assert len(recebidas) == 1
+    assert isinstance(recebidas[0], AtualizacaoLuta)
+    assert recebidas[0].posicao_seguinte == 0
+    assert "avança para campeão" in PainelDeVisualizacao.formatar_atualizacao(recebidas[0])
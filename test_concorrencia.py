@@ -0,0 +1,103 @@
+import random
+import sys
+import threading
+import time
+from esqueleto import (
+    CompeticaoCombate, CompeticaoSeguidorDeLinha, Inscricao, Juiz, Luta, Robo, StatusInscricao, StatusLuta
+)
+from ratings import recalcular_ratings
+
+
+def _rodar_em_threads(alvos):
+    threads = [threading.Thread(target=alvo) for alvo in alvos]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_juizes_concorrentes_mantem_invariantes_da_chave():
+    # Arrange
+    competicao = CompeticaoCombate("Combate Estresse", None)
+    for numero in range(1000):
+        inscricao = Inscricao(Robo(f"Robo {numero}", 1.0), competicao)
+        competicao.receber_inscricao(inscricao)
+        inscricao.status = StatusInscricao.APROVADA
+    competicao.gerar_estrutura()
+    chave = competicao.chave_batalha
+    juizes = [Juiz(f"Juiz {n}", f"juiz{n}@teste.com", "x") for n in range(8)]
+
+    def julgar(luta, juiz):
+        # Cada luta é julgada por duas threads ao mesmo tempo, que esperam os competidores chegarem
+        while luta.competidor1 is None or luta.competidor2 is None:
+            time.sleep(0.005)
+        juiz.registrar_vencedor_luta(luta, luta.competidor1 if luta.posicao % 3 else luta.competidor2)
+
+    # Act
+    alvos = [lambda luta=luta, n=n: julgar(luta, juizes[n % len(juizes)]) for luta in chave.lutas for n in range(2)]
+    random.Random(7).shuffle(alvos)
+    _rodar_em_threads(alvos)
+
+    # Assert
+    assert len(alvos) == 1998
+    assert all(luta.status == StatusLuta.CONCLUIDA for luta in chave.lutas)
+    for luta in chave.lutas:
+        filhas = [chave.get_luta(2 * luta.posicao), chave.get_luta(2 * luta.posicao + 1)]
+        vindos_das_filhas = {filha.vencedor for filha in filhas if filha is not None}
+        assert vindos_das_filhas <= {luta.competidor1, luta.competidor2}
+    final = chave.get_luta(1)
+    assert chave.campeao is final.vencedor
+    vitorias = {}
+    for luta in chave.lutas:
+        vitorias[luta.vencedor.id] = vitorias.get(luta.vencedor.id, 0) + 1
+    assert sum(vitorias.values()) == len(chave.lutas)
+    assert max(vitorias.values()) <= 10  # ninguém avançou duas vezes na mesma rodada
+
+
+def test_tomadas_concorrentes_mantem_ranking_consistente():
+    # Arrange
+    competicao = CompeticaoSeguidorDeLinha("Seguidor Estresse", None)
+    inscricoes = [Inscricao(Robo(f"Robo {n}", 0.5), competicao) for n in range(50)]
+    competicao.receber_inscricoes(inscricoes)
+    juiz = Juiz("Juiz", "juiz@teste.com", "x")
+    gerador = random.Random(3)
+    tempos = [(gerador.choice(inscricoes), round(gerador.uniform(8, 30), 2)) for _ in range(2000)]
+
+    # Act
+    _rodar_em_threads([lambda i=i, t=t: juiz.registrar_tomada_de_tempo(i, t) for i, t in tempos])
+
+    # Assert
+    classificacao = competicao.gerar_classificacao()
+    assert len(classificacao) == len({id(i) for i, _ in tempos})
+    assert sum(len(inscricao.tomadas_de_tempo) for inscricao in inscricoes) == 2000
+    for resultado in classificacao:
+        assert resultado.melhor_tempo == min(resultado.inscricao.tomadas_de_tempo.tempos)
+    assert [r.melhor_tempo for r in classificacao] == sorted(r.melhor_tempo for r in classificacao)
+
+
+def test_ratings_de_robos_em_varias_chaves_seguem_a_ordem_dos_resultados():
+    # Arrange
+    robos = [Robo(f"Robo {n}", 1.0) for n in range(4)]
+    gerador = random.Random(11)
+    lutas = []
+    for numero in range(8):
+        competicao = CompeticaoCombate(f"Chave {numero}", None)
+        inscricoes = [Inscricao(robo, competicao) for robo in robos]
+        for _ in range(100):
+            competidor1, competidor2 = gerador.sample(inscricoes, 2)
+            lutas.append(Luta(1, competidor1, competidor2))
+    iniciais = {robo.id: robo.rating for robo in robos}
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+
+    # Act
+    try:
+        _rodar_em_threads([lambda luta=luta: luta.registrar_resultado(luta.competidor1) for luta in lutas])
+    finally:
+        sys.setswitchinterval(intervalo)
+
+    # Assert
+    historico = [(luta.competidor1.robo.id, luta.competidor2.robo.id)
+                 for luta in sorted(lutas, key=lambda luta: luta.sequencia_resultado)]
+    esperados = recalcular_ratings(historico, iniciais)
+    assert all(abs(robo.rating - esperados[robo.id]) < 1e-6 for robo in robos)
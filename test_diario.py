@@ -0,0 +1,82 @@
+import os
+import threading
+import pytest
+from datetime import date
+from esqueleto import Organizador, LiderDeEquipe, Juiz, StatusLuta
+from diario import DiarioWAL, recuperar
+from persistencia import salvar_snapshot, carregar_snapshot
+
+
+@pytest.fixture
+def cenario():
+    organizador = Organizador("Org", "org@wal.com", "123")
+    evento = organizador.criar_evento("Torneio WAL", date(2025, 6, 1), date(2025, 6, 2))
+    lider = LiderDeEquipe("Líder", "lider@wal.com", "456")
+    equipe = lider.cadastrar_equipe("Equipe WAL")
+    robos = [lider.cadastrar_robo(f"Robo {n}", 1.0) for n in range(4)]
+    seguidor = organizador.adicionar_competicao(evento, "Seguidor", "seguidor")
+    combate = organizador.adicionar_competicao(evento, "Combate", "combate")
+    lider.inscrever_robos(robos, seguidor)
+    for inscricao in lider.inscrever_robos(robos, combate):
+        organizador.aprovar_inscricao(inscricao)
+    combate.gerar_estrutura()
+    return evento, equipe
+
+
+def test_juizes_concorrentes_compartilham_fsync(cenario, tmp_path):
+    # Arrange
+    evento, equipe = cenario
+    salvar_snapshot(evento, str(tmp_path / "base.snap"), [equipe])
+    wal = DiarioWAL(str(tmp_path / "wal"), espera_de_grupo=0.005)
+    seguidor = evento.competicoes[0]
+    juizes = [Juiz(f"Juiz {n}", f"j{n}@wal.com", "x") for n in range(8)]
+    for juiz in juizes:
+        juiz.diario = wal
+
+    def trabalho(juiz, inscricao):
+        for volta in range(25):
+            juiz.registrar_tomada_de_tempo(inscricao, 10.0 + volta)
+
+    # Act
+    threads = [threading.Thread(target=trabalho, args=(juiz, seguidor.inscricoes[n % 4])) for n, juiz in enumerate(juizes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wal.fechar()
+    restaurado, _ = carregar_snapshot(str(tmp_path / "base.snap"))
+    _, _, aplicadas = recuperar(str(tmp_path / "wal"), restaurado)
+
+    # Assert
+    assert aplicadas == 200
+    assert wal.total_fsyncs < 200
+    assert sum(len(insc.tomadas_de_tempo) for insc in restaurado.competicoes[0].inscricoes) == 200
+
+
+def test_compactar_gera_checkpoint_e_recuperar_reaplica_o_restante(cenario, tmp_path):
+    # Arrange
+    evento, equipe = cenario
+    diretorio = str(tmp_path / "wal")
+    wal = DiarioWAL(diretorio, tamanho_maximo_segmento=64)
+    juiz = Juiz("Juiz", "juiz@wal.com", "x")
+    juiz.diario = wal
+    seguidor, combate = evento.competicoes
+    juiz.registrar_tomada_de_tempo(seguidor.inscricoes[0], 13.0)
+    juiz.registrar_tomada_de_tempo(seguidor.inscricoes[1], 12.0)
+    juiz.registrar_tomada_de_tempo(seguidor.inscricoes[2], 11.0)
+
+    # Act
+    wal.compactar(evento, [equipe])
+    luta = combate.chave_batalha.lutas[0]
+    juiz.registrar_vencedor_luta(luta, luta.competidor1)
+    juiz.registrar_tomada_de_tempo(seguidor.inscricoes[3], 9.0)
+    wal.fechar()
+    restaurado, equipes, aplicadas = recuperar(diretorio)
+
+    # Assert
+    assert aplicadas == 2
+    assert equipes[0].nome == "Equipe WAL"
+    assert len([nome for nome in os.listdir(diretorio) if nome.startswith("checkpoint.")]) == 1
+    seguidor_restaurado, combate_restaurado = restaurado.competicoes
+    assert [res.melhor_tempo for res in seguidor_restaurado.gerar_classificacao()] == [9.0, 11.0, 12.0, 13.0]
+    assert combate_restaurado.chave_batalha.get_luta(luta.posicao).status == StatusLuta.CONCLUIDA
@@ -1,5 +1,5 @@
 import pytest
-from esqueleto import Luta, Inscricao, Robo, CompeticaoCombate, StatusLuta, TomadaDeTempo
+from esqueleto import Luta, Inscricao, Robo, CompeticaoCombate, StatusLuta, TomadaDeTempo, RegistroDeVoltas
 from datetime import datetime
 
 @pytest.fixture
@@ -57,4 +57,22 @@ def test_tomada_de_tempo_criacao_armazena_dados_corretamente():
     
     # Assert
     assert tomada.tempo_em_segundos == tempo_esperado
-    assert isinstance(tomada.data_registro, datetime)
\ No newline at end of file
+    assert isinstance(tomada.data_registro, datetime)
+
+
+def test_registro_de_voltas_guarda_tempos_em_colunas(inscricao_mock_1):
+    # Arrange
+    tempos = [14.2, 12.9, 13.5]
+
+    # Act
+    for tempo in tempos:
+        inscricao_mock_1.adicionar_tomada_de_tempo(TomadaDeTempo(tempo))
+    voltas = inscricao_mock_1.tomadas_de_tempo
+
+    # Assert
+    assert isinstance(voltas, RegistroDeVoltas)
+    assert list(voltas.tempos) == tempos
+    assert [volta.tempo_em_segundos for volta in voltas] == tempos
+    assert isinstance(voltas[1].data_registro, datetime)
+    assert voltas.melhor_tempo() == 12.9
+    assert voltas.indices_por_tempo() == [1, 2, 0]
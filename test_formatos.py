@@ -0,0 +1,284 @@
+import random
+import pytest
+from datetime import date
+from esqueleto import Organizador, Inscricao, Juiz, Robo, StatusInscricao, StatusLuta
+from formatos import ChaveDuplaEliminacao, ChaveSuica, ChaveTodosContraTodos, ELIMINATORIA_DUPLA, SUICO, TODOS_CONTRA_TODOS
+from persistencia import DiarioDeAcoes, carregar_snapshot, reaplicar_diario, salvar_snapshot
+
+
+@pytest.fixture
+def evento():
+    organizador = Organizador("Org", "org@formatos.com", "123")
+    return organizador.criar_evento("Torneio de Formatos", date(2025, 11, 1), date(2025, 11, 2))
+
+
+def _combate(evento, quantidade):
+    combate = evento.organizador.adicionar_competicao(evento, "Combate", "combate")
+    for numero in range(quantidade):
+        inscricao = Inscricao(Robo(f"Robo {numero + 1}", 1.0), combate)
+        combate.receber_inscricao(inscricao)
+        inscricao.status = StatusInscricao.APROVADA
+    return combate
+
+
+def _disputar_tudo(chave, escolher=lambda luta: luta.competidor1):
+    """Registra resultados até não haver mais lutas pendentes com dois competidores."""
+    while True:
+        pendentes = [luta for luta in chave.lutas if luta.status != StatusLuta.CONCLUIDA
+                     and luta.competidor1 is not None and luta.competidor2 is not None]
+        if not pendentes:
+            return
+        for luta in pendentes:
+            chave.registrar_vencedor(luta, escolher(luta))
+
+
+def test_todos_contra_todos_gera_cada_confronto_uma_vez(evento):
+    # Arrange
+    combate = _combate(evento, 5)
+
+    # Act
+    combate.gerar_estrutura(TODOS_CONTRA_TODOS)
+    chave = combate.chave_batalha
+
+    # Assert
+    assert isinstance(chave, ChaveTodosContraTodos)
+    confrontos = {frozenset((luta.competidor1.id, luta.competidor2.id)) for luta in chave.lutas}
+    assert len(chave.lutas) == len(confrontos) == 10
+    for rodada in range(1, 6):
+        robos_da_rodada = [insc.id for luta in chave.lutas if luta.rodada == rodada
+                           for insc in (luta.competidor1, luta.competidor2)]
+        assert len(robos_da_rodada) == len(set(robos_da_rodada)) == 4  # um folga por rodada
+
+
+def test_todos_contra_todos_atualiza_tabela_a_cada_resultado(evento):
+    # Arrange
+    combate = _combate(evento, 4)
+    combate.gerar_estrutura(TODOS_CONTRA_TODOS)
+    chave = combate.chave_batalha
+    semente = combate.inscricoes[0]
+    escolher = lambda luta: semente if semente in (luta.competidor1, luta.competidor2) else luta.competidor2
+
+    # Act
+    _disputar_tudo(chave, escolher)
+
+    # Assert
+    tabela = chave.classificacao()
+    assert (tabela[0].inscricao, tabela[0].pontos, tabela[0].lutas) == (semente, 3, 3)
+    assert chave.campeao is semente
+    assert sum(linha.pontos for linha in tabela) == len(chave.lutas)
+
+
+def test_corrigir_resultado_desfaz_ponto_anterior(evento):
+    # Arrange
+    combate = _combate(evento, 4)
+    combate.gerar_estrutura(TODOS_CONTRA_TODOS)
+    chave = combate.chave_batalha
+    luta = chave.lutas[0]
+    chave.registrar_vencedor(luta, luta.competidor1)
+
+    # Act
+    chave.registrar_vencedor(luta, luta.competidor2)
+
+    # Assert
+    assert chave.pontos(luta.competidor1) == 0
+    assert chave.pontos(luta.competidor2) == 1
+
+
+def test_suico_nao_repete_adversarios_e_gera_rodadas_sozinho(evento):
+    # Arrange
+    combate = _combate(evento, 16)
+
+    # Act
+    combate.gerar_estrutura(SUICO)
+    chave = combate.chave_batalha
+    _disputar_tudo(chave)
+
+    # Assert
+    assert isinstance(chave, ChaveSuica)
+    assert chave.rodada_atual == chave.total_rodadas == 4
+    confrontos = [frozenset((luta.competidor1.id, luta.competidor2.id)) for luta in chave.lutas]
+    assert len(confrontos) == len(set(confrontos)) == 32
+    tabela = chave.classificacao()
+    assert tabela[0].pontos == 4 and chave.campeao is tabela[0].inscricao
+    assert [linha.pontos for linha in tabela].count(4) == 1
+
+
+def test_suico_com_numero_impar_da_folga_a_cada_rodada(evento):
+    # Arrange
+    combate = _combate(evento, 7)
+
+    # Act
+    combate.gerar_estrutura(SUICO, total_rodadas=3)
+    chave = combate.chave_batalha
+    _disputar_tudo(chave)
+
+    # Assert
+    assert len(chave.lutas) == 9
+    assert sum(linha.pontos for linha in chave.classificacao()) == 9 + 3  # vitórias + folgas
+
+
+def test_suico_emparelha_2000_robos(evento):
+    # Arrange
+    combate = _combate(evento, 2000)
+
+    # Act
+    combate.gerar_estrutura(SUICO, total_rodadas=5)
+    chave = combate.chave_batalha
+    _disputar_tudo(chave, lambda luta: min(luta.competidor1, luta.competidor2, key=lambda insc: insc.id))
+
+    # Assert
+    confrontos = [frozenset((luta.competidor1.id, luta.competidor2.id)) for luta in chave.lutas]
+    assert len(confrontos) == len(set(confrontos)) == 5000
+
+
+def test_suico_so_repete_adversario_quando_nao_ha_alternativa(evento):
+    # Arrange
+    # Com n >= 12 e até 5 rodadas jogadas, cada robô ainda tem n - 6 >= n / 2 adversários
+    # inéditos: pelo teorema de Dirac existe sempre um emparelhamento sem revanche.
+    chaves = []
+    for quantidade in [*range(12, 65), 100, 151, 257]:
+        combate = _combate(evento, quantidade)
+        combate.gerar_estrutura(SUICO, total_rodadas=6)
+        chaves.append((quantidade, combate.chave_batalha))
+
+    # Act
+    for quantidade, chave in chaves:
+        aleatorio = random.Random(quantidade)
+        _disputar_tudo(chave, lambda luta: aleatorio.choice((luta.competidor1, luta.competidor2)))
+
+    # Assert
+    com_revanche = []
+    for quantidade, chave in chaves:
+        confrontos = [frozenset((luta.competidor1.id, luta.competidor2.id)) for luta in chave.lutas]
+        if len(confrontos) != len(set(confrontos)):
+            com_revanche.append(quantidade)
+    assert com_revanche == []
+
+
+def test_suico_recusa_corrigir_rodada_ja_encerrada(evento):
+    # Arrange
+    combate = _combate(evento, 4)
+    combate.gerar_estrutura(SUICO)
+    chave = combate.chave_batalha
+    primeira_rodada = list(chave.lutas)
+    for luta in primeira_rodada:
+        chave.registrar_vencedor(luta, luta.competidor1)
+
+    # Act / Assert
+    with pytest.raises(ValueError, match="rodada seguinte"):
+        chave.registrar_vencedor(primeira_rodada[0], primeira_rodada[0].competidor2)
+
+
+def test_dupla_eliminacao_exige_duas_derrotas(evento):
+    # Arrange
+    combate = _combate(evento, 8)
+    combate.gerar_estrutura(ELIMINATORIA_DUPLA)
+    chave = combate.chave_batalha
+    derrotas = {}
+
+    def escolher(luta):
+        perdedor = luta.competidor2
+        derrotas[perdedor.id] = derrotas.get(perdedor.id, 0) + 1
+        return luta.competidor1
+
+    # Act
+    _disputar_tudo(chave, escolher)
+
+    # Assert
+    assert isinstance(chave, ChaveDuplaEliminacao)
+    assert chave.campeao is not None and chave.final is not None
+    assert len(chave.lutas) == 2 * 8 - 2  # sem final de desempate
+    assert sorted(derrotas.values()) == [2] * 7
+    assert chave.campeao.id not in derrotas
+    assert chave.rotulo_da_rodada(chave.final) == "Grande final"
+
+
+def test_dupla_eliminacao_com_byes_e_final_de_desempate(evento):
+    # Arrange
+    combate = _combate(evento, 6)
+    combate.gerar_estrutura(ELIMINATORIA_DUPLA)
+    chave = combate.chave_batalha
+
+    # Act
+    _disputar_tudo(chave, lambda luta: luta.competidor2 if luta is chave.final else luta.competidor1)
+
+    # Assert
+    assert chave.final_desempate is not None
+    assert chave.campeao is chave.final_desempate.vencedor
+    assert len(chave.lutas) == 2 * 6 - 1
+    finalistas = {chave.final.competidor1, chave.final.competidor2}
+    assert {luta.rodada for luta in chave.lutas if chave.rotulo_da_rodada(luta).startswith("Repescagem")}
+    assert chave.campeao in finalistas
+
+
+def test_dupla_eliminacao_informa_dependencias_da_repescagem(evento):
+    # Arrange
+    combate = _combate(evento, 4)
+    combate.gerar_estrutura(ELIMINATORIA_DUPLA)
+    chave = combate.chave_batalha
+    primeira_rodada = [luta for luta in chave.lutas if luta.rodada == 1]
+
+    # Act
+    for luta in primeira_rodada:
+        chave.registrar_vencedor(luta, luta.competidor1)
+    repescagem = chave.lutas[-1]
+
+    # Assert
+    assert chave.rotulo_da_rodada(repescagem) == "Repescagem 1"
+    assert set(chave.lutas_anteriores(repescagem)) == set(primeira_rodada)
+    assert repescagem in chave.lutas_seguintes(primeira_rodada[0])
+
+
+def test_formato_invalido_lanca_erro(evento):
+    # Arrange
+    combate = _combate(evento, 4)
+
+    # Act / Assert
+    with pytest.raises(ValueError, match="Formato de chave inválido"):
+        combate.gerar_estrutura("Mata-mata triplo")
+
+
+@pytest.mark.parametrize("formato", [ELIMINATORIA_DUPLA, SUICO, TODOS_CONTRA_TODOS])
+def test_snapshot_restaura_formatos_dinamicos(evento, tmp_path, formato):
+    # Arrange
+    combate = _combate(evento, 6)
+    combate.gerar_estrutura(formato)
+    chave = combate.chave_batalha
+    for luta in list(chave.lutas)[:5]:
+        if luta.competidor1 is not None and luta.competidor2 is not None:
+            chave.registrar_vencedor(luta, luta.competidor2)
+    caminho = str(tmp_path / "formatos.snap")
+
+    # Act
+    salvar_snapshot(evento, caminho)
+    restaurado, _ = carregar_snapshot(caminho)
+    chave_restaurada = restaurado.competicoes[0].chave_batalha
+
+    # Assert
+    assert type(chave_restaurada) is type(chave)
+    resumo = lambda c: [(luta.id, luta.rodada, luta.status, luta.vencedor and luta.vencedor.id) for luta in c.lutas]
+    assert resumo(chave_restaurada) == resumo(chave)
+
+
+def test_diario_reaplica_vitorias_em_lutas_criadas_apos_o_snapshot(evento, tmp_path):
+    # Arrange
+    combate = _combate(evento, 4)
+    combate.gerar_estrutura(SUICO)
+    chave = combate.chave_batalha
+    caminho_snapshot = str(tmp_path / "suico.snap")
+    salvar_snapshot(evento, caminho_snapshot)
+    juiz = Juiz("Juiz", "juiz@formatos.com", "789")
+    juiz.diario = DiarioDeAcoes(str(tmp_path / "suico.diario"))
+    while chave.campeao is None:
+        for luta in [luta for luta in chave.lutas if luta.status != StatusLuta.CONCLUIDA]:
+            juiz.registrar_vencedor_luta(luta, luta.competidor1)
+    juiz.diario.fechar()
+
+    # Act
+    restaurado, _ = carregar_snapshot(caminho_snapshot)
+    reaplicar_diario(restaurado, str(tmp_path / "suico.diario"))
+
+    # Assert
+    chave_restaurada = restaurado.competicoes[0].chave_batalha
+    assert [luta.id for luta in chave_restaurada.lutas] == [luta.id for luta in chave.lutas]
+    assert chave_restaurada.campeao.id == chave.campeao.id
@@ -0,0 +1,159 @@
+import gc
+import threading
+import pytest
+import identificadores
+from identificadores import (
+    AlocadorDeIds, AlocadorSequencial, AlocadorSnowflake, configurar_alocador, get_alocador, obter_por_id, reatribuir_id
+)
+from datetime import date
+from esqueleto import CompeticaoCombate, CompeticaoSeguidorDeLinha, Juiz, Organizador, Robo, Equipe, LiderDeEquipe
+
+
+@pytest.fixture
+def alocador_sequencial():
+    anterior = get_alocador()
+    alocador = AlocadorSequencial()
+    configurar_alocador(alocador)
+    yield alocador
+    configurar_alocador(anterior)
+
+
+def test_alocador_sequencial_usa_contador_por_tipo(alocador_sequencial):
+    # Act
+    robos = [Robo(f"Robo {n}", 1.0) for n in range(3)]
+    lider = LiderDeEquipe("Líder", "lider@ids.com", "123")
+    equipe = Equipe("Equipe", lider)
+
+    # Assert
+    assert [robo.id for robo in robos] == [1, 2, 3]
+    assert equipe.id == 1
+
+
+def test_subclasses_dividem_o_espaco_de_ids_da_entidade(alocador_sequencial):
+    # Act
+    organizador = Organizador("Org", "org@ids.com", "1")
+    usuarios = [organizador, Juiz("Juiz", "juiz@ids.com", "2"), LiderDeEquipe("Líder", "lider@ids.com", "3")]
+    evento = organizador.criar_evento("Etapa", date(2025, 1, 1), date(2025, 1, 2))
+    combate = organizador.adicionar_competicao(evento, "Combate", "combate")
+    seguidor = organizador.adicionar_competicao(evento, "Seguidor", "seguidor")
+
+    # Assert
+    assert [usuario.id for usuario in usuarios] == [1, 2, 3]
+    assert (combate.id, seguidor.id) == (1, 2)
+    assert obter_por_id(CompeticaoSeguidorDeLinha, seguidor.id) is seguidor
+    assert obter_por_id(CompeticaoCombate, seguidor.id) is None
+
+
+def test_obter_por_id_nao_mantem_objetos_mortos(alocador_sequencial):
+    # Arrange
+    robo = Robo("Efêmero", 1.0)
+    id_robo = robo.id
+    assert obter_por_id(Robo, id_robo) is robo
+
+    # Act
+    del robo
+    gc.collect()
+
+    # Assert
+    assert obter_por_id(Robo, id_robo) is None
+
+
+def test_reatribuir_id_reserva_o_id_restaurado(alocador_sequencial):
+    # Arrange
+    robo = Robo("Restaurado", 1.0)
+
+    # Act
+    reatribuir_id(robo, 50)
+    proximo = Robo("Novo", 1.0)
+
+    # Assert
+    assert obter_por_id(Robo, 50) is robo
+    assert proximo.id == 51
+
+
+def test_alocador_snowflake_gera_ids_unicos_e_crescentes():
+    # Arrange
+    alocador = AlocadorSnowflake(no=7)
+
+    # Act
+    ids = [alocador.proximo("Robo") for _ in range(10000)]
+
+    # Assert
+    assert ids == sorted(set(ids))
+    assert all(id_gerado < 2 ** 63 for id_gerado in ids)
+    assert (ids[0] >> 12) & 0x3FF == 7
+
+
+def test_alocador_snowflake_nao_adianta_o_relogio(monkeypatch):
+    # Arrange
+    relogio = [1_750_000_000.0]
+    monkeypatch.setattr(identificadores.time, "time", lambda: relogio[0])
+    # sleep de verdade sempre dorme um pouco além do pedido
+    monkeypatch.setattr(identificadores.time, "sleep", lambda segundos: relogio.__setitem__(0, relogio[0] + segundos + 1e-4))
+    alocador = AlocadorSnowflake()
+
+    # Act
+    ids = [alocador.proximo("Robo") for _ in range(5 * 4096)]
+    ultimo_ms = AlocadorSnowflake._agora_ms()
+    relogio[0] += 0.001  # um reinício leva pelo menos um milissegundo
+    reiniciado = AlocadorSnowflake().proximo("Robo")
+
+    # Assert
+    assert relogio[0] >= 1_750_000_000.004
+    assert ids == sorted(set(ids)) and ids[-1] >> 22 <= ultimo_ms
+    assert reiniciado > ids[-1]
+
+
+def test_alocador_snowflake_reservar_nao_espera_e_nao_repete(monkeypatch):
+    # Arrange
+    alocador = AlocadorSnowflake(no=3)
+    restaurados = [alocador.proximo("Robo") for _ in range(1000)]
+    dormidas = []
+    monkeypatch.setattr(identificadores.time, "sleep", dormidas.append)
+    novo = AlocadorSnowflake(no=3)
+    adiantado = (AlocadorSnowflake._agora_ms() + 60_000) << 22
+
+    # Act
+    for id_restaurado in restaurados:
+        novo.reservar("Robo", id_restaurado)
+    depois_dos_restaurados = novo.proximo("Robo")
+    novo.reservar("Robo", adiantado)
+    depois_do_adiantado = novo.proximo("Robo")
+    novo.reservar("Robo", restaurados[0])
+
+    # Assert
+    assert dormidas == []
+    assert depois_dos_restaurados > restaurados[-1]
+    assert depois_do_adiantado == adiantado | (3 << 12) | 1
+    assert novo.proximo("Robo") > depois_do_adiantado
+
+
+def test_alocador_base_e_abstrato():
+    # Act / Assert
+    with pytest.raises(TypeError):
+        AlocadorDeIds()
+
+
+def test_alocador_snowflake_nao_repete_entre_threads():
+    # Arrange
+    alocador = AlocadorSnowflake()
+    gerados = [[] for _ in range(8)]
+
+    def gerar(destino):
+        for numero in range(5000):
+            destino.append(alocador.proximo("Robo"))
+            if numero % 100 == 0:
+                alocador.reservar("Robo", destino[-1])
+
+    threads = [threading.Thread(target=gerar, args=(destino,)) for destino in gerados]
+
+    # Act
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Assert
+    ids = [id_gerado for destino in gerados for id_gerado in destino]
+    assert len(set(ids)) == len(ids) == 40000
+    assert all(destino == sorted(destino) for destino in gerados)
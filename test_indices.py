@@ -0,0 +1,165 @@
+import types
+import pytest
+from datetime import date, datetime, timedelta
+from esqueleto import Organizador, Inscricao, Juiz, LiderDeEquipe, Robo, TomadaDeTempo
+from indices import IndiceDoTorneio
+from persistencia import DiarioDeAcoes, carregar_snapshot, reaplicar_diario, salvar_snapshot
+
+
+@pytest.fixture
+def indice():
+    indice = IndiceDoTorneio()
+    indice.ativar()
+    yield indice
+    indice.desativar()
+
+
+@pytest.fixture
+def organizador():
+    return Organizador("Org", "org@indices.com", "123")
+
+
+def _evento_com_equipe(organizador, nome, lider):
+    evento = organizador.criar_evento(nome, date(2025, 6, 1), date(2025, 6, 2))
+    combate = organizador.adicionar_competicao(evento, "Combate", "combate")
+    seguidor = organizador.adicionar_competicao(evento, "Seguidor", "seguidor")
+    lider.inscrever_robos(lider.equipe.robos, combate)
+    lider.inscrever_robos(lider.equipe.robos, seguidor)
+    return evento, combate, seguidor
+
+
+def _lider_com_robos(quantidade):
+    lider = LiderDeEquipe("Líder", "lider@indices.com", "456")
+    lider.cadastrar_equipe("Equipe Índice")
+    for numero in range(quantidade):
+        lider.cadastrar_robo(f"Robo {numero}", 1.0)
+    return lider
+
+
+def test_inscricoes_da_equipe_cruzam_eventos(indice, organizador):
+    # Arrange
+    lider = _lider_com_robos(2)
+
+    # Act
+    _evento_com_equipe(organizador, "Etapa 1", lider)
+    _evento_com_equipe(organizador, "Etapa 2", lider)
+
+    # Assert
+    inscricoes = indice.inscricoes_da_equipe(lider.equipe)
+    assert isinstance(inscricoes, types.GeneratorType)
+    assert len(list(inscricoes)) == 8
+    assert len(list(indice.inscricoes_do_robo(lider.equipe.robos[0]))) == 4
+
+
+def test_lutas_do_robo_acompanham_o_avanco_na_chave(indice, organizador):
+    # Arrange
+    lider = _lider_com_robos(4)
+    _, combate, _ = _evento_com_equipe(organizador, "Etapa 1", lider)
+    for inscricao in combate.inscricoes:
+        organizador.aprovar_inscricao(inscricao)
+    combate.gerar_estrutura()
+    primeira = combate.chave_batalha.lutas[0]
+    robo = primeira.competidor1.robo
+
+    # Act
+    Juiz("Juiz", "juiz@indices.com", "789").registrar_vencedor_luta(primeira, primeira.competidor1)
+
+    # Assert
+    assert list(indice.lutas_do_robo(robo)) == [primeira, combate.chave_batalha.get_luta(1)]
+    assert list(indice.lutas_do_robo(primeira.competidor2.robo)) == [primeira]
+
+
+def test_correcao_de_vencedor_tira_o_robo_da_luta_seguinte(indice, organizador):
+    # Arrange
+    lider = _lider_com_robos(4)
+    _, combate, _ = _evento_com_equipe(organizador, "Etapa 1", lider)
+    for inscricao in combate.inscricoes:
+        organizador.aprovar_inscricao(inscricao)
+    combate.gerar_estrutura()
+    primeira = combate.chave_batalha.lutas[0]
+    final = combate.chave_batalha.get_luta(1)
+    juiz = Juiz("Juiz", "juiz@indices.com", "789")
+    juiz.registrar_vencedor_luta(primeira, primeira.competidor1)
+
+    # Act
+    juiz.registrar_vencedor_luta(primeira, primeira.competidor2)
+
+    # Assert
+    assert list(indice.lutas_do_robo(primeira.competidor1.robo)) == [primeira]
+    assert list(indice.lutas_do_robo(primeira.competidor2.robo)) == [primeira, final]
+
+
+def test_voltas_do_juiz_no_dia(indice, organizador):
+    # Arrange
+    lider = _lider_com_robos(2)
+    _, _, seguidor = _evento_com_equipe(organizador, "Etapa 1", lider)
+    juiz, outro_juiz = Juiz("Z", "z@indices.com", "1"), Juiz("W", "w@indices.com", "2")
+    ontem = datetime.now() - timedelta(days=1)
+    seguidor.inscricoes[0].adicionar_tomada_de_tempo(TomadaDeTempo(9.0, ontem.timestamp(), juiz.id))
+
+    # Act
+    juiz.registrar_tomada_de_tempo(seguidor.inscricoes[0], 12.0)
+    juiz.registrar_tomada_de_tempo(seguidor.inscricoes[1], 11.0)
+    outro_juiz.registrar_tomada_de_tempo(seguidor.inscricoes[1], 10.0)
+
+    # Assert
+    voltas = [(insc.robo.nome, tomada.tempo_em_segundos, tomada.id_juiz)
+              for insc, tomada in indice.voltas_do_dia(date.today(), juiz)]
+    assert voltas == [("Robo 0", 12.0, juiz.id), ("Robo 1", 11.0, juiz.id)]
+    assert len(list(indice.voltas_do_dia(date.today()))) == 3
+
+
+def test_inscricoes_entre_datas(indice, organizador):
+    # Arrange
+    evento = organizador.criar_evento("Etapa", date(2025, 6, 1), date(2025, 6, 2))
+    seguidor = organizador.adicionar_competicao(evento, "Seguidor", "seguidor")
+    datas = [datetime(2025, 5, dia) for dia in (20, 3, 12, 28)]
+
+    # Act
+    for numero, data in enumerate(datas):
+        seguidor.receber_inscricao(Inscricao(Robo(f"R{numero}", 0.5), seguidor, data))
+
+    # Assert
+    periodo = indice.inscricoes_entre(datetime(2025, 5, 10), datetime(2025, 5, 28))
+    assert [insc.data_inscricao.day for insc in periodo] == [12, 20]
+
+
+def test_carregar_indexa_grafo_existente_e_desativar_para_de_indexar(organizador, tmp_path):
+    # Arrange
+    lider = _lider_com_robos(2)
+    evento, _, seguidor = _evento_com_equipe(organizador, "Etapa 1", lider)
+    Juiz("Z", "z@indices.com", "1").registrar_tomada_de_tempo(seguidor.inscricoes[0], 12.0)
+    caminho = str(tmp_path / "indices.snap")
+    salvar_snapshot(evento, caminho, [lider.equipe])
+    indice = IndiceDoTorneio()
+
+    # Act
+    restaurado, equipes = carregar_snapshot(caminho)
+    indice.carregar([restaurado])
+    seguidor_restaurado = restaurado.competicoes[1]
+    seguidor_restaurado.inscricoes[1].adicionar_tomada_de_tempo(TomadaDeTempo(11.0))
+
+    # Assert
+    assert len(list(indice.inscricoes_da_equipe(equipes[0]))) == 4
+    voltas = list(indice.voltas_do_dia(date.today()))
+    assert [(insc.robo.nome, tomada.id_juiz != 0) for insc, tomada in voltas] == [("Robo 0", True)]
+
+
+def test_diario_preserva_o_juiz_de_cada_volta(organizador, tmp_path):
+    # Arrange
+    lider = _lider_com_robos(1)
+    evento, _, seguidor = _evento_com_equipe(organizador, "Etapa 1", lider)
+    caminho_snapshot = str(tmp_path / "juiz.snap")
+    salvar_snapshot(evento, caminho_snapshot, [lider.equipe])
+    juiz = Juiz("Z", "z@indices.com", "1")
+    juiz.diario = DiarioDeAcoes(str(tmp_path / "juiz.diario"))
+
+    # Act
+    juiz.registrar_tomada_de_tempo(seguidor.inscricoes[0], 12.0)
+    juiz.diario.fechar()
+    restaurado, _ = carregar_snapshot(caminho_snapshot)
+    reaplicar_diario(restaurado, str(tmp_path / "juiz.diario"))
+
+    # Assert
+    voltas = restaurado.competicoes[1].inscricoes[0].tomadas_de_tempo
+    assert [(tomada.tempo_em_segundos, tomada.id_juiz) for tomada in voltas] == [(12.0, juiz.id)]
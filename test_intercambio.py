@@ -0,0 +1,177 @@
+import io
+import json
+import threading
+import tracemalloc
+import pytest
+from datetime import date
+import autenticacao
+from esqueleto import Organizador, Juiz, StatusInscricao
+from intercambio import JSONL, exportar_classificacoes, exportar_lutas, importar
+
+CSV_BASICO = """tipo,equipe,lider,email,senha,nome,funcao,robo,peso,competicao,data,status
+equipe,Equipe A,Ana,ana@a.com,123,,,,,,,
+membro,Equipe A,,,,Beto,Mecânico,,,,,
+robo,Equipe A,,,,,,Trovão,1.5,,,
+robo,Equipe A,,,,,,Relâmpago,1.2,,,
+inscricao,Equipe A,,,,,,Trovão,,Combate,2025-05-10T10:00:00,Aprovada
+inscricao,Equipe A,,,,,,Relâmpago,,Seguidor,,
+"""
+
+
+@pytest.fixture
+def evento():
+    organizador = Organizador("Org", "org@intercambio.com", "123")
+    evento = organizador.criar_evento("Etapa", date(2025, 6, 1), date(2025, 6, 2))
+    organizador.adicionar_competicao(evento, "Combate", "combate")
+    organizador.adicionar_competicao(evento, "Seguidor", "seguidor")
+    return evento
+
+
+def test_importa_equipes_membros_robos_e_inscricoes(evento):
+    # Act
+    relatorio = importar(evento, io.StringIO(CSV_BASICO))
+
+    # Assert
+    assert relatorio.total_erros == 0
+    assert relatorio.importadas == {"equipe": 1, "membro": 1, "robo": 2, "inscricao": 2}
+    equipe = relatorio.equipes[0]
+    assert (equipe.lider.email, [m.nome for m in equipe.membros]) == ("ana@a.com", ["Beto"])
+    combate, seguidor = evento.competicoes
+    inscricao = combate.inscricoes[0]
+    assert (inscricao.robo.nome, inscricao.status, inscricao.data_inscricao.day) == ("Trovão", StatusInscricao.APROVADA, 10)
+    assert seguidor.contar_inscricoes(StatusInscricao.PENDENTE) == 1
+
+
+def test_importacao_nao_espera_o_hash_das_senhas(evento, monkeypatch):
+    # Arrange
+    linhas = "".join(f"equipe,Equipe {numero},Líder {numero},lider{numero}@a.com,senha{numero},,,,,,,\n" for numero in range(50))
+    liberar, calculados = threading.Event(), []
+
+    def gerar_depois_de_liberado(senha, custo=None):
+        liberar.wait(5)
+        calculados.append(senha)
+        return f"hash-{senha}"
+
+    monkeypatch.setattr(autenticacao, "gerar_hash_de_senha", gerar_depois_de_liberado)
+
+    # Act
+    try:
+        relatorio = importar(evento, io.StringIO(CSV_BASICO.splitlines(keepends=True)[0] + linhas))
+        durante = list(calculados)
+    finally:
+        liberar.set()
+
+    # Assert
+    assert relatorio.importadas["equipe"] == 50 and durante == []
+    assert relatorio.equipes[7].lider.senha_hash == "hash-senha7"
+    assert [equipe.lider.senha_hash for equipe in relatorio.equipes] == [f"hash-senha{n}" for n in range(50)]
+
+
+def test_mesmo_robo_no_combate_e_no_seguidor_com_o_mesmo_id(evento):
+    # Arrange
+    combate, seguidor = evento.competicoes
+    seguidor.id = combate.id
+    texto = CSV_BASICO.replace("Relâmpago,,Seguidor", "Trovão,,Seguidor")
+
+    # Act
+    relatorio = importar(evento, io.StringIO(texto))
+
+    # Assert
+    assert relatorio.total_erros == 0
+    assert [inscricao.robo.nome for inscricao in seguidor.inscricoes] == ["Trovão"]
+
+
+def test_linhas_invalidas_viram_erros_sem_interromper(evento):
+    # Arrange
+    linhas = [
+        {"tipo": "equipe", "equipe": "Equipe B", "lider": "Bia", "email": "bia@b.com", "senha": "1"},
+        {"tipo": "robo", "equipe": "Equipe B", "robo": "Pesado", "peso": "muito"},
+        {"tipo": "robo", "equipe": "Equipe Z", "robo": "Fantasma", "peso": 1},
+        {"tipo": "robo", "equipe": "Equipe B", "robo": "Leve", "peso": 0.8},
+        {"tipo": "inscricao", "equipe": "Equipe B", "robo": "Leve", "competicao": "Sumô"},
+        {"tipo": "inscricao", "equipe": "Equipe B", "robo": "Leve", "competicao": "Combate"},
+        {"tipo": "inscricao", "equipe": "Equipe B", "robo": "Leve", "competicao": "Combate"},
+        {"tipo": "torcida"},
+    ]
+    texto = "\n".join(json.dumps(linha) for linha in linhas[:4]) + "\n{quebrado\n"
+    texto += "\n".join(json.dumps(linha) for linha in linhas[4:]) + "\n"
+
+    # Act
+    relatorio = importar(evento, io.StringIO(texto), JSONL, tamanho_lote=2)
+
+    # Assert
+    assert [(erro.linha, erro.mensagem.split(":")[0].split(" '")[0]) for erro in relatorio.erros] == [
+        (2, "Campo"), (3, "Equipe"), (5, "JSON inválido."), (6, "Competição"),
+        (8, "Robô já inscrito nesta competição."), (9, "Tipo de linha inválido"),
+    ]
+    assert relatorio.linhas == 9
+    assert len(evento.competicoes[0].inscricoes) == 1
+
+
+def test_importa_com_equipes_existentes(evento):
+    # Arrange
+    primeira = importar(evento, io.StringIO(CSV_BASICO))
+    nova_inscricao = "tipo,equipe,robo,competicao\ninscricao,Equipe A,Trovão,Seguidor\n"
+
+    # Act
+    relatorio = importar(evento, io.StringIO(nova_inscricao), equipes=primeira.equipes)
+
+    # Assert
+    assert relatorio.total_erros == 0
+    assert [insc.robo.nome for insc in evento.competicoes[1].inscricoes] == ["Relâmpago", "Trovão"]
+
+
+def test_importacao_grande_usa_memoria_limitada(evento):
+    # Arrange
+    def gerar(total):
+        yield "tipo,equipe,lider,email,senha,robo,peso,competicao\n"
+        yield "equipe,Equipe G,Gil,gil@g.com,1,,,\n"
+        for numero in range(total):
+            yield f"robo,Equipe G,,,,R{numero},1.0,\n"
+            yield f"inscricao,Equipe G,,,,R{numero},,Seguidor\n"
+
+    class Origem(io.TextIOBase):
+        """Arquivo que gera o conteúdo sob demanda, sem o texto inteiro em memória."""
+        def __init__(self, total):
+            self._linhas = gerar(total)
+
+        def __iter__(self):
+            return self._linhas
+
+    # Act
+    tracemalloc.start()
+    relatorio = importar(evento, Origem(5000), tamanho_lote=250)
+    atual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Assert
+    assert relatorio.importadas["inscricao"] == 5000
+    assert pico - atual < 1024 * 1024  # além dos objetos criados, só um lote por vez
+
+
+def test_exporta_classificacao_e_lutas(evento, tmp_path):
+    # Arrange
+    importar(evento, io.StringIO(CSV_BASICO.replace("Relâmpago,,Seguidor,,", "Relâmpago,,Combate,,Aprovada")))
+    combate, seguidor = evento.competicoes
+    combate.gerar_estrutura()
+    juiz = Juiz("Juiz", "juiz@intercambio.com", "1")
+    luta = combate.chave_batalha.lutas[0]
+    juiz.registrar_vencedor_luta(luta, luta.competidor2)
+    insc = importar(evento, io.StringIO("tipo,equipe,robo,competicao\ninscricao,Equipe A,Trovão,Seguidor\n"),
+                    equipes=[combate.inscricoes[0].robo.equipe])
+    juiz.registrar_tomada_de_tempo(seguidor.inscricoes[0], 12.5)
+    saida_csv = io.StringIO()
+
+    # Act
+    total_lutas = exportar_lutas(evento, saida_csv)
+    total_tempos = exportar_classificacoes(evento, str(tmp_path / "classificacao.jsonl"))
+
+    # Assert
+    assert insc.total_erros == 0
+    assert (total_lutas, total_tempos) == (1, 1)
+    cabecalho, linha = saida_csv.getvalue().splitlines()
+    assert cabecalho == "competicao,luta,rodada,fase,competidor1,competidor2,vencedor,status"
+    assert linha.endswith(f",{luta.competidor2.robo.nome},Concluída")
+    with open(tmp_path / "classificacao.jsonl", encoding="utf-8") as arquivo:
+        assert json.loads(arquivo.readline()) == {
+            "competicao": "Seguidor", "posicao": 1, "robo": "Trovão", "equipe": "Equipe A", "melhor_tempo": 12.5}
@@ -0,0 +1,51 @@
+import io
+import pytest
+from log_eventos import configurar_log, desativar_log, encerrar_log
+from esqueleto import Organizador
+from datetime import date
+
+
+@pytest.fixture(autouse=True)
+def log_limpo():
+    yield
+    encerrar_log()
+
+
+def test_log_desligado_por_padrao_nao_escreve_nada():
+    # Arrange
+    saida = io.StringIO()
+    configurar_log(saida=saida)
+    desativar_log()
+
+    # Act
+    Organizador("Org", "org@log.com", "123").criar_evento("Evento Mudo", date(2025, 1, 1), date(2025, 1, 2))
+
+    # Assert
+    assert saida.getvalue() == ""
+
+
+def test_log_configurado_escreve_mensagem_formatada():
+    # Arrange
+    saida = io.StringIO()
+    configurar_log(saida=saida)
+
+    # Act
+    Organizador("Org", "org@log.com", "123").criar_evento("Evento Log", date(2025, 1, 1), date(2025, 1, 2))
+
+    # Assert
+    assert saida.getvalue() == "Organizador Org criou o evento 'Evento Log'.\n"
+
+
+def test_log_assincrono_entrega_mensagens_ao_encerrar():
+    # Arrange
+    saida = io.StringIO()
+    configurar_log(saida=saida, assincrono=True)
+    organizador = Organizador("Org", "org@log.com", "123")
+
+    # Act
+    for numero in range(3):
+        organizador.criar_evento(f"Evento {numero}", date(2025, 1, 1), date(2025, 1, 2))
+    encerrar_log()
+
+    # Assert
+    assert saida.getvalue().count("criou o evento") == 3
@@ -0,0 +1,140 @@
+import io
+import urllib.request
+import pytest
+from datetime import date
+from esqueleto import Organizador, LiderDeEquipe, Juiz, PainelDeVisualizacao
+from metricas import (
+    Histograma, ativar_metricas, desativar_metricas, gravar_prometheus, instantaneo, medir, servir_prometheus,
+    texto_prometheus, zerar_metricas,
+)
+
+
+@pytest.fixture
+def metricas_ligadas():
+    zerar_metricas()
+    ativar_metricas()
+    yield
+    desativar_metricas()
+    zerar_metricas()
+
+
+@pytest.fixture
+def cenario():
+    organizador = Organizador("Org", "org@metricas.com", "123")
+    evento = organizador.criar_evento("Etapa", date(2025, 6, 1), date(2025, 6, 2))
+    seguidor = organizador.adicionar_competicao(evento, "Seguidor", "seguidor")
+    combate = organizador.adicionar_competicao(evento, "Combate", "combate")
+    lider = LiderDeEquipe("Líder", "lider@metricas.com", "456")
+    lider.cadastrar_equipe("Equipe")
+    robos = [lider.cadastrar_robo(f"Robo {n}", 1.0) for n in range(4)]
+    return lider, robos, seguidor, combate, Juiz("Juiz", "juiz@metricas.com", "789")
+
+
+def test_operacoes_contadas_por_nome_e_competicao(metricas_ligadas, cenario):
+    # Arrange
+    lider, robos, seguidor, combate, juiz = cenario
+    inscricoes = lider.inscrever_robos(robos, seguidor)
+
+    # Act
+    for tempo in (12.0, 11.0, 13.0):
+        juiz.registrar_tomada_de_tempo(inscricoes[0], tempo)
+    PainelDeVisualizacao().ver_classificacao_seguidor(seguidor, saida=io.StringIO())
+
+    # Assert
+    dados = instantaneo()
+    operacoes = dados["operacoes"]
+    assert operacoes["Juiz.registrar_tomada_de_tempo"]["chamadas"] == 3
+    assert operacoes["CompeticaoSeguidorDeLinha.atualizar_ranking"]["chamadas"] == 2  # só melhoras de tempo
+    assert operacoes["Competicao.receber_inscricoes"]["chamadas"] == 1
+    assert operacoes["PainelDeVisualizacao.ver_classificacao_seguidor"]["chamadas"] == 1
+    linha = operacoes["Juiz.registrar_tomada_de_tempo"]
+    assert 0 < linha["p50"] <= linha["p99"] <= linha["maximo"]
+    assert dados["competicoes"] == {("CompeticaoSeguidorDeLinha", seguidor.id): {"nome": "Seguidor", "inscricoes": 4, "voltas": 3}}
+
+
+def test_competicoes_de_tipos_diferentes_com_o_mesmo_id(metricas_ligadas, cenario):
+    # Arrange
+    lider, robos, seguidor, combate, _ = cenario
+    combate.id = seguidor.id
+
+    # Act
+    with medir("lote_seguidor", seguidor):
+        lider.inscrever_robos(robos[:3], seguidor)
+    with medir("lote_combate", combate):
+        lider.inscrever_robos(robos[3:], combate)
+    dados = instantaneo()
+    texto = texto_prometheus()
+
+    # Assert
+    assert dados["competicoes"] == {
+        ("CompeticaoCombate", combate.id): {"nome": "Combate", "inscricoes": 1, "voltas": 0},
+        ("CompeticaoSeguidorDeLinha", seguidor.id): {"nome": "Seguidor", "inscricoes": 3, "voltas": 0},
+    }
+    assert f'soft_competicao_inscricoes{{competicao="Combate",tipo="CompeticaoCombate",id="{combate.id}"}} 1' in texto
+    assert (f'soft_competicao_inscricoes{{competicao="Seguidor",tipo="CompeticaoSeguidorDeLinha",id="{seguidor.id}"}} 3'
+            in texto)
+
+
+def test_desativadas_os_metodos_sao_os_originais(cenario):
+    # Arrange
+    original = Juiz.__dict__["registrar_tomada_de_tempo"]
+    zerar_metricas()
+
+    # Act
+    ativar_metricas()
+    cronometrado = Juiz.__dict__["registrar_tomada_de_tempo"]
+    desativar_metricas()
+    lider, robos, seguidor, _, juiz = cenario
+    juiz.registrar_tomada_de_tempo(lider.inscrever_robo(robos[0], seguidor), 10.0)
+
+    # Assert
+    assert cronometrado is not original and cronometrado.__wrapped__ is original
+    assert Juiz.__dict__["registrar_tomada_de_tempo"] is original
+    assert instantaneo()["operacoes"] == {}
+
+
+def test_percentis_do_histograma():
+    # Arrange
+    histograma = Histograma()
+
+    # Act
+    for _ in range(90):
+        histograma.registrar(0.001)
+    for _ in range(10):
+        histograma.registrar(0.5)
+
+    # Assert
+    assert histograma.total == 100
+    assert histograma.percentil(0.5) < 0.0011
+    assert 0.25 < histograma.percentil(0.99) <= 0.5
+    assert histograma.maximo == 0.5
+
+
+def test_exporta_texto_prometheus_em_arquivo_e_http(metricas_ligadas, cenario, tmp_path):
+    # Arrange
+    lider, robos, _, combate, juiz = cenario
+    for inscricao in lider.inscrever_robos(robos, combate):
+        inscricao.competicao.evento.organizador.aprovar_inscricao(inscricao)
+    combate.gerar_estrutura()
+    with medir("lote_manual", combate):
+        luta = combate.chave_batalha.lutas[0]
+        juiz.registrar_vencedor_luta(luta, luta.competidor1)
+    caminho = str(tmp_path / "soft.prom")
+
+    # Act
+    gravar_prometheus(caminho)
+    servidor = servir_prometheus()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{servidor.server_address[1]}/metrics") as resposta:
+            via_http = resposta.read().decode("utf-8")
+    finally:
+        servidor.shutdown()
+
+    # Assert
+    with open(caminho, encoding="utf-8") as arquivo:
+        texto = arquivo.read()
+    assert 'soft_operacao_segundos_count{operacao="Juiz.registrar_vencedor_luta"} 1' in texto
+    assert 'soft_operacao_segundos_bucket{operacao="lote_manual",le="+Inf"} 1' in texto
+    assert f'soft_competicao_lutas{{competicao="Combate",tipo="CompeticaoCombate",id="{combate.id}"}} 3' in texto
+    assert via_http.splitlines()[:2] == texto.splitlines()[:2]
+    assert texto_prometheus().count("# TYPE") == 4
@@ -0,0 +1,139 @@
+import pytest
+from datetime import date
+from esqueleto import Organizador, LiderDeEquipe, Juiz, StatusInscricao, StatusLuta
+from identificadores import AlocadorSequencial, configurar_alocador, get_alocador
+from persistencia import (
+    DiarioDeAcoes, ErroDeSnapshot, carregar_snapshot, reaplicar_diario, salvar_snapshot
+)
+
+
+@pytest.fixture
+def cenario():
+    """Evento com uma competição de combate (chave gerada) e uma de seguidor de linha."""
+    organizador = Organizador("Org", "org@snap.com", "123")
+    evento = organizador.criar_evento("Torneio Salvo", date(2025, 5, 1), date(2025, 5, 3))
+    lider = LiderDeEquipe("Líder", "lider@snap.com", "456")
+    equipe = lider.cadastrar_equipe("Equipe Snap")
+    lider.adicionar_membro("Ana", "Piloto")
+    robos = [lider.cadastrar_robo(f"Robo {n}", 1.0 + n) for n in range(3)]
+    combate = organizador.adicionar_competicao(evento, "Combate", "combate")
+    seguidor = organizador.adicionar_competicao(evento, "Seguidor", "seguidor")
+    for inscricao in lider.inscrever_robos(robos, combate):
+        organizador.aprovar_inscricao(inscricao)
+    inscricoes_seguidor = lider.inscrever_robos(robos[:2], seguidor)
+    combate.gerar_estrutura()
+    juiz = Juiz("Juiz", "juiz@snap.com", "789")
+    juiz.registrar_tomada_de_tempo(inscricoes_seguidor[0], 14.0)
+    juiz.registrar_tomada_de_tempo(inscricoes_seguidor[1], 12.5)
+    return evento, equipe, juiz
+
+
+def test_snapshot_restaura_grafo_do_evento(cenario, tmp_path):
+    # Arrange
+    evento, equipe, _ = cenario
+    caminho = str(tmp_path / "evento.snap")
+
+    # Act
+    salvar_snapshot(evento, caminho, [equipe])
+    restaurado, equipes = carregar_snapshot(caminho)
+
+    # Assert
+    assert restaurado.id == evento.id and restaurado.nome == evento.nome
+    assert restaurado.data_fim == date(2025, 5, 3)
+    assert equipes[0].lider.equipe is equipes[0]
+    assert equipes[0].lider.senha_hash == equipe.lider.senha_hash and equipes[0].lider.verificar_senha("456")
+    assert [membro.nome for membro in equipes[0].membros] == ["Ana"]
+    combate, seguidor = restaurado.competicoes
+    assert all(inscricao.competicao is combate for inscricao in combate.inscricoes)
+    assert combate.contar_inscricoes(StatusInscricao.APROVADA) == 3
+    assert [luta.id for luta in combate.chave_batalha.lutas] == [luta.id for luta in evento.competicoes[0].chave_batalha.lutas]
+    classificacao = seguidor.gerar_classificacao()
+    assert [(res.inscricao.robo.nome, res.melhor_tempo) for res in classificacao] == [("Robo 1", 12.5), ("Robo 0", 14.0)]
+    assert len(seguidor.inscricoes[0].tomadas_de_tempo) == 1
+
+
+def test_diario_reaplica_acoes_dos_juizes_apos_snapshot(cenario, tmp_path):
+    # Arrange
+    evento, equipe, juiz = cenario
+    caminho_snapshot = str(tmp_path / "evento.snap")
+    caminho_diario = str(tmp_path / "evento.diario")
+    salvar_snapshot(evento, caminho_snapshot, [equipe])
+    juiz.diario = DiarioDeAcoes(caminho_diario)
+    combate, seguidor = evento.competicoes
+    luta = combate.chave_batalha.lutas[0]
+    juiz.registrar_vencedor_luta(luta, luta.competidor2)
+    juiz.registrar_tomada_de_tempo(seguidor.inscricoes[0], 11.0)
+    juiz.diario.fechar()
+
+    # Act
+    restaurado, _ = carregar_snapshot(caminho_snapshot)
+    aplicadas = reaplicar_diario(restaurado, caminho_diario)
+
+    # Assert
+    assert aplicadas == 2
+    luta_restaurada = restaurado.competicoes[0].chave_batalha.get_luta(luta.posicao)
+    assert luta_restaurada.status == StatusLuta.CONCLUIDA
+    assert luta_restaurada.vencedor.id == luta.competidor2.id
+    assert restaurado.competicoes[1].gerar_classificacao()[0].melhor_tempo == 11.0
+
+
+def test_diario_nao_grava_correcao_recusada_nem_vencedor_repetido(cenario, tmp_path):
+    # Arrange
+    evento, equipe, juiz = cenario
+    caminho_snapshot = str(tmp_path / "evento.snap")
+    caminho_diario = str(tmp_path / "evento.diario")
+    salvar_snapshot(evento, caminho_snapshot, [equipe])
+    juiz.diario = DiarioDeAcoes(caminho_diario)
+    chave = evento.competicoes[0].chave_batalha
+    luta, final = chave.lutas
+    juiz.registrar_vencedor_luta(luta, luta.competidor1)
+    juiz.registrar_vencedor_luta(final, final.competidor1)
+
+    # Act
+    with pytest.raises(ValueError, match="seguinte já foi concluída"):
+        juiz.registrar_vencedor_luta(luta, luta.competidor2)
+    juiz.registrar_vencedor_luta(final, final.competidor1)
+    juiz.diario.fechar()
+    restaurado, _ = carregar_snapshot(caminho_snapshot)
+    aplicadas = reaplicar_diario(restaurado, caminho_diario)
+
+    # Assert
+    assert aplicadas == 2
+    assert restaurado.competicoes[0].chave_batalha.campeao.id == chave.campeao.id
+    assert luta.vencedor is luta.competidor1
+
+
+def test_voltas_novas_apos_restaurar_nao_repetem_ids(cenario, tmp_path):
+    # Arrange
+    evento, equipe, juiz = cenario
+    caminho_snapshot = str(tmp_path / "evento.snap")
+    caminho_diario = str(tmp_path / "evento.diario")
+    salvar_snapshot(evento, caminho_snapshot, [equipe])
+    juiz.diario = DiarioDeAcoes(caminho_diario)
+    juiz.registrar_tomada_de_tempo(evento.competicoes[1].inscricoes[0], 11.0)
+    juiz.diario.fechar()
+    anterior = get_alocador()
+    configurar_alocador(AlocadorSequencial())  # como num processo novo
+
+    # Act
+    try:
+        restaurado, _ = carregar_snapshot(caminho_snapshot)
+        reaplicar_diario(restaurado, caminho_diario)
+        inscricoes = restaurado.competicoes[1].inscricoes
+        antigas = [volta.id for inscricao in inscricoes for volta in inscricao.tomadas_de_tempo]
+        nova = Juiz("Outro", "outro@snap.com", "1").registrar_tomada_de_tempo(inscricoes[1], 10.0)
+    finally:
+        configurar_alocador(anterior)
+
+    # Assert
+    assert len(antigas) == 3 and nova.id not in antigas and nova.id > max(antigas)
+
+
+def test_carregar_arquivo_invalido_lanca_erro(tmp_path):
+    # Arrange
+    caminho = tmp_path / "lixo.snap"
+    caminho.write_bytes(b"nao e snapshot")
+
+    # Act & Assert
+    with pytest.raises(ErroDeSnapshot):
+        carregar_snapshot(str(caminho))
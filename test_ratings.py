@@ -0,0 +1,162 @@
+import random
+import pytest
+from datetime import date
+import ratings
+from esqueleto import Organizador, Inscricao, Luta, Robo, StatusInscricao, StatusLuta
+from formatos import SUICO
+from persistencia import carregar_snapshot, salvar_snapshot
+from ratings import RATING_INICIAL, recalcular_ratings, recalcular_temporada, variacao_elo
+
+
+@pytest.fixture
+def evento():
+    organizador = Organizador("Org", "org@ratings.com", "123")
+    return organizador.criar_evento("Temporada", date(2025, 12, 1), date(2025, 12, 2))
+
+
+def _combate(evento, robos):
+    combate = evento.organizador.adicionar_competicao(evento, "Combate", "combate")
+    for robo in robos:
+        inscricao = Inscricao(robo, combate)
+        combate.receber_inscricao(inscricao)
+        inscricao.status = StatusInscricao.APROVADA
+    return combate
+
+
+def test_registrar_resultado_transfere_pontos_de_elo(evento):
+    # Arrange
+    combate = _combate(evento, [Robo("A", 1.0), Robo("B", 1.0)])
+    luta = Luta(1, *combate.inscricoes)
+
+    # Act
+    luta.registrar_resultado(luta.competidor2)
+
+    # Assert
+    assert luta.competidor2.robo.rating == RATING_INICIAL + 16.0
+    assert luta.competidor1.robo.rating == RATING_INICIAL - 16.0
+    assert luta.variacao_rating == 16.0
+
+
+def test_repetir_ou_corrigir_resultado_nao_acumula_elo(evento):
+    # Arrange
+    combate = _combate(evento, [Robo("A", 1.0), Robo("B", 1.0)])
+    luta = Luta(1, *combate.inscricoes)
+    luta.registrar_resultado(luta.competidor1)
+
+    # Act
+    luta.registrar_resultado(luta.competidor1)
+    luta.registrar_resultado(luta.competidor2)
+
+    # Assert
+    assert luta.competidor1.robo.rating == RATING_INICIAL - 16.0
+    assert luta.competidor2.robo.rating == RATING_INICIAL + 16.0
+
+
+def test_gerar_estrutura_usa_rating_como_semente(evento):
+    # Arrange
+    robos = [Robo(f"Robo {n}", 1.0) for n in range(5)]
+    robos[4].rating = 1700.0
+    robos[2].rating = 1600.0
+    combate = _combate(evento, robos)
+
+    # Act
+    combate.gerar_estrutura()
+
+    # Assert
+    assert [insc.robo.nome for insc in combate.sementes()][:3] == ["Robo 4", "Robo 2", "Robo 0"]
+    assert combate.chave_batalha.get_luta(2).competidor1.robo.nome == "Robo 4"  # semente 1 passa pelo bye
+
+
+def test_sementes_empatadas_seguem_a_ordem_de_inscricao(evento):
+    # Arrange
+    combate = evento.organizador.adicionar_competicao(evento, "Combate", "combate")
+    inscricoes = [Inscricao(Robo(f"Robo {n}", 1.0), combate) for n in range(4)]
+    for inscricao in inscricoes:
+        combate.receber_inscricao(inscricao)
+
+    # Act
+    for inscricao in reversed(inscricoes):
+        evento.organizador.aprovar_inscricao(inscricao)
+
+    # Assert
+    assert combate.sementes() == inscricoes
+
+
+def test_suico_emparelha_metade_forte_contra_metade_fraca(evento):
+    # Arrange
+    robos = [Robo(f"Robo {n}", 1.0) for n in range(4)]
+    for robo, rating in zip(robos, (1400.0, 1800.0, 1500.0, 1700.0)):
+        robo.rating = rating
+    combate = _combate(evento, robos)
+
+    # Act
+    combate.gerar_estrutura(SUICO)
+
+    # Assert
+    pares = {frozenset((luta.competidor1.robo.nome, luta.competidor2.robo.nome)) for luta in combate.chave_batalha.lutas}
+    assert pares == {frozenset(("Robo 1", "Robo 2")), frozenset(("Robo 3", "Robo 0"))}
+
+
+def _sequencial(historico):
+    valores = {}
+    for vencedor, perdedor in historico:
+        variacao = variacao_elo(valores.get(vencedor, RATING_INICIAL), valores.get(perdedor, RATING_INICIAL))
+        valores[vencedor] = valores.get(vencedor, RATING_INICIAL) + variacao
+        valores[perdedor] = valores.get(perdedor, RATING_INICIAL) - variacao
+    return valores
+
+
+@pytest.mark.parametrize("sem_numpy", [False, True])
+def test_recalculo_em_lote_coincide_com_aplicacao_sequencial(monkeypatch, sem_numpy):
+    # Arrange
+    if sem_numpy:
+        monkeypatch.setattr(ratings, "np", None)
+    gerador = random.Random(3)
+    historico = []
+    for _ in range(3000):
+        vencedor, perdedor = gerador.sample(range(200), 2)
+        historico.append((vencedor, perdedor))
+
+    # Act
+    recalculados = recalcular_ratings(historico)
+
+    # Assert
+    esperados = _sequencial(historico)
+    assert recalculados.keys() == esperados.keys()
+    assert all(recalculados[robo] == pytest.approx(esperados[robo]) for robo in esperados)
+
+
+def test_recalcular_temporada_reproduz_ratings_incrementais(evento):
+    # Arrange
+    robos = [Robo(f"Robo {n}", 1.0) for n in range(8)]
+    combate = _combate(evento, robos)
+    combate.gerar_estrutura()
+    chave = combate.chave_batalha
+    while chave.campeao is None:
+        for luta in [luta for luta in chave.lutas if luta.status != StatusLuta.CONCLUIDA and luta.competidor2]:
+            chave.registrar_vencedor(luta, luta.competidor2)
+    incrementais = {robo.id: robo.rating for robo in robos}
+
+    # Act
+    recalcular_temporada([evento], robos)
+
+    # Assert
+    assert all(robo.rating == pytest.approx(incrementais[robo.id]) for robo in robos)
+
+
+def test_snapshot_preserva_ratings(evento, tmp_path):
+    # Arrange
+    combate = _combate(evento, [Robo("A", 1.0), Robo("B", 1.0), Robo("C", 1.0), Robo("D", 1.0)])
+    combate.gerar_estrutura(SUICO)
+    luta = combate.chave_batalha.lutas[0]
+    combate.chave_batalha.registrar_vencedor(luta, luta.competidor2)
+    caminho = str(tmp_path / "ratings.snap")
+
+    # Act
+    salvar_snapshot(evento, caminho)
+    restaurado, _ = carregar_snapshot(caminho)
+
+    # Assert
+    assert ({insc.robo.nome: insc.robo.rating for insc in restaurado.competicoes[0].inscricoes}
+            == {insc.robo.nome: insc.robo.rating for insc in combate.inscricoes})
+    assert restaurado.competicoes[0].chave_batalha.lutas[0].variacao_rating == luta.variacao_rating
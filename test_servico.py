@@ -0,0 +1,145 @@
+import asyncio
+import json
+import threading
+import time
+import pytest
+from datetime import date
+from esqueleto import Organizador, LiderDeEquipe, Juiz
+from servico import ServicoDoTorneio, iniciar_servidor
+
+
+@pytest.fixture
+def cenario():
+    organizador = Organizador("Org", "org@servico.com", "123")
+    evento = organizador.criar_evento("Torneio Async", date(2025, 7, 1), date(2025, 7, 2))
+    lider = LiderDeEquipe("Líder", "lider@servico.com", "456")
+    lider.cadastrar_equipe("Equipe Async")
+    robos = [lider.cadastrar_robo(f"Robo {n}", 0.5) for n in range(3)]
+    seguidor = organizador.adicionar_competicao(evento, "Seguidor", "seguidor")
+    inscricoes = lider.inscrever_robos(robos, seguidor)
+    return evento, seguidor, inscricoes
+
+
+def test_escritas_concorrentes_sao_aplicadas_em_lotes(cenario):
+    # Arrange
+    _, seguidor, inscricoes = cenario
+    juiz = Juiz("Juiz", "juiz@servico.com", "x")
+    servico = ServicoDoTorneio(tamanho_fila=8, tamanho_lote=16)
+
+    async def cenario_async():
+        tarefas = [servico.registrar_tomada_de_tempo(juiz, inscricoes[n % 3], 10.0 + n) for n in range(60)]
+        tomadas = await asyncio.gather(*tarefas)
+        texto = await servico.ver_classificacao_seguidor(seguidor, limite=1)
+        await servico.encerrar()
+        return tomadas, texto
+
+    # Act
+    tomadas, texto = asyncio.run(cenario_async())
+
+    # Assert
+    assert len(tomadas) == 60
+    assert sum(len(inscricao.tomadas_de_tempo) for inscricao in inscricoes) == 60
+    assert "1º: Robo 0 (10.0s)" in texto
+
+
+def test_competicoes_com_o_mesmo_id_tem_filas_separadas(cenario):
+    # Arrange
+    evento, seguidor, inscricoes = cenario
+    combate = evento.organizador.adicionar_competicao(evento, "Combate", "combate")
+    combate.id = seguidor.id
+    lider = inscricoes[0].robo.equipe.lider
+    servico = ServicoDoTorneio()
+
+    async def cenario_async():
+        inscricao = await servico.inscrever_robo(lider, inscricoes[0].robo, combate)
+        await servico.registrar_tomada_de_tempo(Juiz("Juiz", "juiz2@servico.com", "x"), inscricoes[0], 9.0)
+        filas = len(servico._filas)
+        await servico.encerrar()
+        return inscricao, filas
+
+    # Act
+    inscricao, filas = asyncio.run(cenario_async())
+
+    # Assert
+    assert filas == 2
+    assert inscricao.competicao is combate
+
+
+def test_leitura_esperando_a_trava_nao_bloqueia_o_laco(cenario):
+    # Arrange
+    _, seguidor, _ = cenario
+    servico = ServicoDoTorneio()
+    trava_tomada, liberar = threading.Event(), threading.Event()
+
+    def juiz_esperando_fsync():
+        with seguidor.trava:
+            trava_tomada.set()
+            liberar.wait(5)
+
+    juiz = threading.Thread(target=juiz_esperando_fsync)
+    juiz.start()
+    trava_tomada.wait(5)
+
+    async def cenario_async():
+        leitura = asyncio.ensure_future(servico.ver_classificacao_seguidor(seguidor))
+        inicio = time.monotonic()
+        voltas = 0
+        while time.monotonic() - inicio < 0.2:
+            await asyncio.sleep(0.01)
+            voltas += 1
+        pendente = not leitura.done()
+        liberar.set()
+        return voltas, pendente, await leitura
+
+    # Act
+    voltas, pendente, texto = asyncio.run(cenario_async())
+    juiz.join()
+
+    # Assert
+    assert pendente and voltas >= 5
+    assert "CLASSIFICAÇÃO DE 'Seguidor'" in texto
+
+
+def test_leituras_simultaneas_compartilham_a_mesma_renderizacao(cenario):
+    # Arrange
+    _, seguidor, _ = cenario
+    servico = ServicoDoTorneio()
+    chamadas = []
+    gerar_original = seguidor.gerar_classificacao
+    seguidor.gerar_classificacao = lambda limite=None: chamadas.append(limite) or gerar_original(limite)
+
+    async def cenario_async():
+        return await asyncio.gather(*(servico.ver_classificacao_seguidor(seguidor) for _ in range(1000)))
+
+    # Act
+    textos = asyncio.run(cenario_async())
+
+    # Assert
+    assert len(set(textos)) == 1
+    assert len(chamadas) == 1
+
+
+def test_servidor_responde_consulta_json(cenario):
+    # Arrange
+    evento, _, _ = cenario
+    servico = ServicoDoTorneio()
+
+    async def cenario_async():
+        servidor = await iniciar_servidor(servico, porta=0)
+        porta = servidor.sockets[0].getsockname()[1]
+        leitor, escritor = await asyncio.open_connection("127.0.0.1", porta)
+        escritor.write(json.dumps({"op": "evento", "evento": evento.id}).encode() + b"\n")
+        escritor.write(json.dumps({"op": "desconhecida"}).encode() + b"\n")
+        await escritor.drain()
+        respostas = [json.loads(await leitor.readline()) for _ in range(2)]
+        escritor.close()
+        servidor.close()
+        await servidor.wait_closed()
+        return respostas
+
+    # Act
+    ok, erro = asyncio.run(cenario_async())
+
+    # Assert
+    assert ok["ok"] and "Competição: Seguidor" in ok["texto"]
+    assert erro == {"ok": False, "erro": "Operação desconhecida."}
@@ -135,6 +135,17 @@ class TestOrganizador:
         # Assert
         assert inscricao_mock.status == StatusInscricao.APROVADA
 
+    def test_aprovar_inscricao_move_inscricao_para_grupo_de_aprovadas(self, organizador, competicao_combate_mock, inscricao_mock):
+        # Arrange
+        competicao_combate_mock.receber_inscricao(inscricao_mock)
+
+        # Act
+        organizador.aprovar_inscricao(inscricao_mock)
+
+        # Assert
+        assert competicao_combate_mock.inscricoes_por_status(StatusInscricao.APROVADA) == [inscricao_mock]
+        assert competicao_combate_mock.contar_inscricoes(StatusInscricao.PENDENTE) == 0
+
 
 class TestLiderDeEquipe:
     def test_cadastrar_equipe_pela_primeira_vez(self):
@@ -185,6 +196,40 @@ class TestLiderDeEquipe:
         assert inscricao.status == StatusInscricao.PENDENTE
         assert inscricao in competicao_combate_mock.inscricoes
 
+    def test_inscrever_robo_ja_inscrito_lanca_erro(self, lider_de_equipe, competicao_combate_mock):
+        # Arrange
+        robo = lider_de_equipe.cadastrar_robo("Repetido", 1.0)
+        lider_de_equipe.inscrever_robo(robo, competicao_combate_mock)
+
+        # Act & Assert
+        with pytest.raises(ValueError, match="Robô já inscrito nesta competição"):
+            lider_de_equipe.inscrever_robo(robo, competicao_combate_mock)
+        assert competicao_combate_mock.robo_inscrito(robo)
+        assert len(competicao_combate_mock.inscricoes) == 1
+
+    def test_inscrever_robos_em_lote_ignora_repetidos(self, lider_de_equipe, competicao_combate_mock):
+        # Arrange
+        robos = [lider_de_equipe.cadastrar_robo(f"Lote {n}", 1.0) for n in range(3)]
+        lider_de_equipe.inscrever_robo(robos[0], competicao_combate_mock)
+
+        # Act
+        inscricoes = lider_de_equipe.inscrever_robos(robos + [robos[1]], competicao_combate_mock)
+
+        # Assert
+        assert [inscricao.robo for inscricao in inscricoes] == robos[1:]
+        assert len(competicao_combate_mock.inscricoes) == 3
+        assert competicao_combate_mock.contar_inscricoes(StatusInscricao.PENDENTE) == 3
+
+    def test_inscrever_robos_em_lote_com_robo_de_outra_equipe_nao_inscreve_nenhum(self, lider_de_equipe, competicao_combate_mock):
+        # Arrange
+        robo_valido = lider_de_equipe.cadastrar_robo("Válido", 1.0)
+        robo_intruso = Robo("Robô Intruso", 1.0)
+
+        # Act & Assert
+        with pytest.raises(Exception, match="Robô não pertence à equipe deste líder"):
+            lider_de_equipe.inscrever_robos([robo_valido, robo_intruso], competicao_combate_mock)
+        assert competicao_combate_mock.inscricoes == []
+
     def test_inscrever_robo_que_nao_pertence_a_equipe_lanca_erro(self, lider_de_equipe, competicao_combate_mock):
         # Arrange
         robo_intruso = Robo("Robô Intruso", 1.0)  # Este robô não foi cadastrado pelo líder